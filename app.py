@@ -8,7 +8,8 @@ Version 3.2 - Alle Bugs gefixt
 import os
 import json
 import logging
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for
+from datetime import datetime, timedelta
+from flask import Flask, render_template, jsonify, request, session, redirect, url_for, Response
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash
 
@@ -16,19 +17,16 @@ from werkzeug.security import check_password_hash
 import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from bots.lkw_bot import LKWBotController
-from utils.config import load_ssh_config, save_ssh_config, parse_ssh_command
-from utils.users import User, init_users, load_users, save_users, load_user
-
-# Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('lkw-bot.log'),
-        logging.StreamHandler()
-    ]
-)
+from bots.fleet import BotFleet
+from bots.metrics import render_prometheus
+from bots.status_stream import sse_events
+from bots.truck_events import summary_to_dict, merge_summaries
+from utils.config import load_ssh_config, parse_ssh_command
+from utils.users import User, init_users, load_users, save_users, load_user, get_user_data
+from utils.logging_setup import setup_logging
+
+# Logging: Queue + Listener-Thread, Rotation, Ringpuffer für /api/admin/logs
+logging_control = setup_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Flask App
@@ -46,9 +44,28 @@ def load_user_wrapper(username):
 # Initialisiere Benutzer
 init_users()
 
-# Bot Instanz
-ssh_config = load_ssh_config('ssh_config.json')
-lkw_bot = LKWBotController(ssh_config)
+# Bot-Flotte (devices.json, sonst ein Gerät aus ssh_config.json)
+fleet = BotFleet('devices.json', 'ssh_config.json')
+
+ALL_DEVICES = 'all'
+STREAM_HEARTBEAT = 15  # Sekunden ohne Änderung bis zum Keepalive-Kommentar
+
+
+def requested_device():
+    """Geräte-ID aus ?device= bzw. JSON-Feld 'device' (None = erstes Gerät)"""
+    device_id = request.args.get('device')
+    if not device_id and request.is_json:
+        device_id = (request.get_json(silent=True) or {}).get('device')
+    return device_id
+
+
+def get_bot():
+    """Angefragter Bot oder None"""
+    return fleet.get(requested_device())
+
+
+def device_not_found():
+    return jsonify({'error': f'Unbekanntes Gerät: {requested_device()}'}), 404
 
 # ==================== ROUTES ====================
 
@@ -58,10 +75,9 @@ def login():
         username = request.form.get('username')
         password = request.form.get('password')
         
-        users = load_users()
+        user_data = get_user_data(username)
         
-        if username in users:
-            user_data = users[username]
+        if user_data is not None:
             if user_data.get('blocked', False):
                 error = "Benutzer ist gesperrt"
                 return render_template('login.html', error=error)
@@ -94,40 +110,84 @@ def index():
 @app.route('/api/status')
 @login_required
 def api_status():
-    return jsonify({
-        'running': lkw_bot.running,
-        'paused': lkw_bot.paused,
-        'status': lkw_bot.status,
-        'last_action': lkw_bot.last_action,
-        'trucks_processed': lkw_bot.trucks_processed,
-        'trucks_shared': lkw_bot.trucks_shared,
-        'trucks_skipped': lkw_bot.trucks_skipped,
-        'adb_connected': lkw_bot.adb_connected,
-        'current_user': lkw_bot.current_user
-    })
+    if requested_device() == ALL_DEVICES:
+        return jsonify(fleet.status())
+    lkw_bot = get_bot()
+    if lkw_bot is None:
+        return device_not_found()
+    status = lkw_bot.status_dict()
+    status['devices'] = fleet.ids()
+    return jsonify(status)
+
+@app.route('/api/status/stream')
+@login_required
+def api_status_stream():
+    """Server-Sent Events: erst Snapshot, danach nur geänderte Felder"""
+    lkw_bot = get_bot()
+    if lkw_bot is None:
+        return device_not_found()
+    events = sse_events(lkw_bot.status_channel, heartbeat=STREAM_HEARTBEAT, on_idle=lkw_bot.publish_status)
+    return Response(events, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/metrics')
+def api_metrics():
+    """Prometheus-Metriken aller Geräte (Login oder Bearer-Token aus METRICS_TOKEN)"""
+    token = os.environ.get('METRICS_TOKEN')
+    token_ok = token and request.headers.get('Authorization') == f'Bearer {token}'
+    if not token_ok and not current_user.is_authenticated:
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(render_prometheus(fleet.all()), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/start', methods=['POST'])
 @login_required
 def api_start():
-    users = load_users()
-    if current_user.username in users and users[current_user.username].get('blocked', False):
+    if current_user.blocked:
         return jsonify({'error': 'User is blocked'}), 403
     
-    with lkw_bot.lock:
+    if requested_device() == ALL_DEVICES:
+        bots = fleet.all()
+    else:
+        bots = [get_bot()]
+        if bots[0] is None:
+            return device_not_found()
+    
+    def used_by_other(lkw_bot):
         # Admin kann immer übernehmen
-        if lkw_bot.current_user and lkw_bot.current_user != current_user.username:
-            if current_user.role != 'admin':
-                return jsonify({'error': f'Bot wird bereits von {lkw_bot.current_user} verwendet'}), 409
-            lkw_bot.stop()
-        
-        lkw_bot.start(current_user.username)
-        logger.info(f"Bot started by {current_user.username}")
+        return (current_user.role != 'admin' and lkw_bot.current_user
+                and lkw_bot.current_user != current_user.username)
     
-    return jsonify({'success': True})
+    # Erst alle Geräte prüfen: bei device=all entweder alle starten oder keins
+    busy = {lkw_bot.device_id: lkw_bot.current_user for lkw_bot in bots if used_by_other(lkw_bot)}
+    if busy:
+        users = ', '.join(sorted(set(busy.values())))
+        return jsonify({'error': f'Bot wird bereits von {users} verwendet', 'busy': busy}), 409
+    
+    started = []
+    for lkw_bot in bots:
+        with lkw_bot.lock:
+            # Zwischen Prüfung und Start übernommen: dieses Gerät auslassen
+            if used_by_other(lkw_bot):
+                busy[lkw_bot.device_id] = lkw_bot.current_user
+                continue
+            if lkw_bot.current_user and lkw_bot.current_user != current_user.username:
+                lkw_bot.stop()
+            
+            lkw_bot.start(current_user.username)
+            started.append(lkw_bot.device_id)
+            logger.info(f"{lkw_bot.bot_name} started by {current_user.username}")
+    
+    result = {'success': not busy, 'started': started, 'busy': busy}
+    if busy:
+        result['error'] = f"Nicht gestartet (belegt): {', '.join(sorted(busy))}"
+    return jsonify(result)
 
 @app.route('/api/pause', methods=['POST'])
 @login_required
 def api_pause():
+    lkw_bot = get_bot()
+    if lkw_bot is None:
+        return device_not_found()
     lkw_bot.pause()
     logger.info(f"Bot paused by {current_user.username}")
     return jsonify({'success': True})
@@ -135,18 +195,29 @@ def api_pause():
 @app.route('/api/stop', methods=['POST'])
 @login_required
 def api_stop():
-    with lkw_bot.lock:
-        lkw_bot.stop()
-        lkw_bot.current_user = None
-        logger.info(f"Bot stopped by {current_user.username}")
+    if requested_device() == ALL_DEVICES:
+        bots = fleet.all()
+    else:
+        bots = [get_bot()]
+        if bots[0] is None:
+            return device_not_found()
+    
+    for lkw_bot in bots:
+        with lkw_bot.lock:
+            lkw_bot.stop()
+            lkw_bot.current_user = None
+            logger.info(f"{lkw_bot.bot_name} stopped by {current_user.username}")
     return jsonify({'success': True})
 
 @app.route('/api/settings', methods=['GET', 'POST'])
 @login_required
 def api_settings():
+    lkw_bot = get_bot()
+    if lkw_bot is None:
+        return device_not_found()
+    
     if request.method == 'POST':
-        users = load_users()
-        if current_user.username in users and users[current_user.username].get('blocked', False):
+        if current_user.blocked:
             return jsonify({'error': 'User is blocked'}), 403
         
         data = request.json
@@ -160,7 +231,7 @@ def api_settings():
         if current_user.role == 'admin':
             lkw_bot.share_mode = data.get('share_mode', 'world')
         else:
-            user_data = users.get(current_user.username, {})
+            user_data = get_user_data(current_user.username) or {}
             if user_data.get('can_choose_share_mode', True):
                 lkw_bot.share_mode = data.get('share_mode', 'world')
             else:
@@ -170,8 +241,7 @@ def api_settings():
         logger.info(f"Settings changed by {current_user.username}")
         return jsonify({'success': True})
     else:
-        users = load_users()
-        user_data = users.get(current_user.username, {})
+        user_data = get_user_data(current_user.username) or {}
         
         # Admin kann immer wählen
         can_choose = current_user.role == 'admin' or user_data.get('can_choose_share_mode', True)
@@ -191,6 +261,9 @@ def api_settings():
 @app.route('/api/reset_stats', methods=['POST'])
 @login_required
 def api_reset_stats():
+    lkw_bot = get_bot()
+    if lkw_bot is None:
+        return device_not_found()
     lkw_bot.trucks_processed = 0
     lkw_bot.trucks_shared = 0
     lkw_bot.trucks_skipped = 0
@@ -206,12 +279,68 @@ def admin():
         return redirect(url_for('index'))
     return render_template('admin.html', user=current_user)
 
+@app.route('/admin/stats')
+@login_required
+def admin_stats():
+    if current_user.role != 'admin':
+        return redirect(url_for('index'))
+    return render_template('stats.html', user=current_user)
+
+def parse_time_arg(name, default):
+    """ISO-Zeitpunkt aus der Query; mit Zeitzone (z.B. 'Z', '+02:00') in naive Ortszeit umgerechnet"""
+    value = request.args.get(name)
+    if not value:
+        return default
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        # Rollups und Ereignisse verwenden naive Ortszeit
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+@app.route('/api/admin/stats')
+@login_required
+def api_admin_stats():
+    """Truck-Statistik für [start, end] aus den Rollups; ?events=1 liefert zusätzlich Rohereignisse"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        end = parse_time_arg('end', datetime.now())
+        start = parse_time_arg('start', end - timedelta(days=7))
+    except ValueError:
+        return jsonify({'error': 'Ungültiges Datum (ISO-Format erwartet)'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 1000)), 1), 10000)
+    except ValueError:
+        return jsonify({'error': 'Ungültiges limit (Ganzzahl erwartet)'}), 400
+    
+    if requested_device() in (None, ALL_DEVICES):
+        bots = fleet.all()
+    else:
+        bots = [get_bot()]
+        if bots[0] is None:
+            return device_not_found()
+    
+    result = summary_to_dict(merge_summaries(bot.truck_events.summary(start, end) for bot in bots))
+    result['start'] = start.isoformat()
+    result['end'] = end.isoformat()
+    if request.args.get('events'):
+        trucks = []
+        for bot in bots:
+            trucks.extend(bot.truck_events.events(start, end, limit))
+        result['trucks'] = sorted(trucks, key=lambda t: t['timestamp'])[:limit]
+    return jsonify(result)
+
 @app.route('/api/admin/ssh_config', methods=['GET', 'POST'])
 @login_required
 def api_admin_ssh_config():
     if current_user.role != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
     
+    lkw_bot = get_bot()
+    if lkw_bot is None:
+        return device_not_found()
+    
     if request.method == 'POST':
         data = request.json
         ssh_command = data.get('ssh_command', '').strip()
@@ -228,14 +357,15 @@ def api_admin_ssh_config():
                 return jsonify({'error': 'Ungültiger SSH-Command und kein manueller Port'}), 400
             local_adb_port = parsed.get('local_port')
         
-        config = {
+        # Erweiterte Optionen (z.B. capture_mode) beibehalten
+        config = fleet.load_device_config(lkw_bot.device_id)
+        config.update({
             'ssh_command': ssh_command,
             'ssh_password': ssh_password,
             'local_adb_port': local_adb_port
-        }
+        })
         
-        if save_ssh_config(config, 'ssh_config.json'):
-            lkw_bot.ssh_config = config
+        if fleet.save_device_config(lkw_bot.device_id, config):
             if lkw_bot.running:
                 logger.info("Bot running, restarting SSH tunnel...")
                 lkw_bot.close_ssh_tunnel()
@@ -247,7 +377,7 @@ def api_admin_ssh_config():
         else:
             return jsonify({'error': 'Fehler beim Speichern'}), 500
     else:
-        config = load_ssh_config('ssh_config.json')
+        config = fleet.load_device_config(lkw_bot.device_id)
         return jsonify({
             'ssh_command': config.get('ssh_command', ''),
             'ssh_password': config.get('ssh_password', ''),
@@ -260,6 +390,9 @@ def api_admin_ssh_config():
 def api_admin_test_ssh():
     if current_user.role != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
+    lkw_bot = get_bot()
+    if lkw_bot is None:
+        return device_not_found()
     try:
         lkw_bot.close_ssh_tunnel()
         import time
@@ -282,14 +415,13 @@ def api_admin_users():
     users = load_users()
     user_list = []
     for username, data in users.items():
-        user_obj = load_user(username)
         user_list.append({
             'username': username,
             'role': data['role'],
             'blocked': data.get('blocked', False),
             'can_choose_share_mode': data.get('can_choose_share_mode', True),
             'forced_share_mode': data.get('forced_share_mode', None),
-            'can_use_zombie_bot': user_obj.can_use_zombie_bot if user_obj else False
+            'can_use_zombie_bot': data.get('role') == 'admin' or data.get('can_use_zombie_bot', False)
         })
     return jsonify({'users': user_list})
 
@@ -311,6 +443,38 @@ def api_admin_toggle_block(username):
         return jsonify({'success': True})
     return jsonify({'error': 'User not found'}), 404
 
+@app.route('/api/admin/logs')
+@login_required
+def api_admin_logs():
+    """Letzte Log-Einträge aus dem Ringpuffer (?limit=&level=&logger=&since=<id>)"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 200)), 1), 2000)
+        since = request.args.get('since')
+        since = int(since) if since else None
+    except ValueError:
+        return jsonify({'error': 'limit/since müssen Zahlen sein'}), 400
+    records = logging_control.ring.tail(limit, request.args.get('level'), request.args.get('logger'), since)
+    return jsonify({'records': records, 'last_id': logging_control.ring.sequence})
+
+@app.route('/api/admin/logs/levels', methods=['GET', 'POST'])
+@login_required
+def api_admin_log_levels():
+    """Log-Level zur Laufzeit: POST {"logger": "bots.lkw_bot", "level": "DEBUG"}"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    if request.method == 'POST':
+        data = request.json or {}
+        try:
+            logging_control.set_level(data.get('logger', 'root'), data.get('level', 'INFO'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        logger.info(f"Log level {data.get('logger', 'root')}={data.get('level', 'INFO')} set by {current_user.username}")
+    return jsonify({'levels': logging_control.levels()})
+
 @app.route('/api/admin/maintenance', methods=['POST'])
 @login_required
 def api_admin_maintenance():
@@ -319,7 +483,8 @@ def api_admin_maintenance():
     
     data = request.json
     enabled = data.get('enabled', False)
-    lkw_bot.maintenance_mode = enabled
+    for lkw_bot in fleet.all():
+        lkw_bot.maintenance_mode = enabled
     
     # Speichere in Datei
     try:
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-Benchmarks für Erkennung und Parsing mit Genauigkeit und Baseline-Vergleich
+
+Korpus-Verzeichnis:
+    labels.json
+    maps/*.png      Karten-Screenshots
+    info/*.png      Info-Panels
+    glyphs.npz      optional, Glyph-Bank passend zum Korpus
+
+Beispiel-Korpus mit Baseline: benchmarks/fixtures/corpus und
+benchmarks/baseline.json (erzeugt mit benchmarks/synthetic.py).
+
+labels.json:
+    {
+      "server_number": "49",
+      "maps": {"leer.png": 0, "ein_lkw.png": {"count": 1, "positions": [[412, 880]]}},
+      "info": {"info_01.png": {"staerke": "12.5M", "server": "49"}},
+      "strings": {"12,5M": 12.5, "125M": 12.5, "abc": null}
+    }
+
+Aufruf:
+    python benchmarks/bench_hotpaths.py benchmarks/fixtures/corpus [--runs 10] [--threshold 0.40]
+        [--baseline benchmarks/baseline.json] [--save-baseline] [--tolerance 0.25]
+
+Mit --baseline schlägt der Lauf fehl (Exit-Code 1), wenn der Median einer
+Funktion um mehr als --tolerance langsamer ist oder die Genauigkeit sinkt.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+from bots.glyphs import glyph_recognizer, GLYPH_FILE
+from bots.lkw_bot import LKWBotController
+from bots.dedup import DedupStore
+from bots.phash import HashIndex
+from bots.template_cache import get_template
+
+# Absolute Toleranz für sehr schnelle Funktionen (Timer-Rauschen)
+MIN_SLACK_MS = 0.05
+
+
+class Bench:
+    """Sammelt Laufzeiten und Treffer pro Funktion"""
+
+    def __init__(self, runs):
+        self.runs = runs
+        self.samples = {}
+        self.correct = {}
+        self.total = {}
+
+    def time(self, name, fn, *args):
+        """fn runs-mal ausführen, Laufzeiten speichern, letztes Ergebnis zurückgeben"""
+        samples = self.samples.setdefault(name, [])
+        result = None
+        for _ in range(self.runs):
+            start = time.perf_counter()
+            result = fn(*args)
+            samples.append((time.perf_counter() - start) * 1000)
+        return result
+
+    def check(self, name, ok):
+        self.total[name] = self.total.get(name, 0) + 1
+        self.correct[name] = self.correct.get(name, 0) + (1 if ok else 0)
+
+    def results(self):
+        results = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            total = self.total.get(name, 0)
+            results[name] = {
+                'calls': len(ordered),
+                'median_ms': round(statistics.median(ordered), 3),
+                'p95_ms': round(ordered[max(0, int(len(ordered) * 0.95) - 1)], 3),
+                'accuracy': round(self.correct.get(name, 0) / total, 4) if total else None,
+                'cases': total
+            }
+        return results
+
+
+def load_images(directory):
+    images = {}
+    if not os.path.isdir(directory):
+        return images
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith('.png'):
+            frame = cv2.imread(os.path.join(directory, name))
+            if frame is not None:
+                images[name] = frame
+    return images
+
+
+def map_correct(matches, label, tolerance):
+    """Anzahl stimmt und jede gelabelte Position hat einen Treffer in der Nähe"""
+    if isinstance(label, int):
+        label = {'count': label}
+    matches = matches or []
+    if len(matches) != label['count']:
+        return False
+    return all(any(abs(mx - x) <= tolerance and abs(my - y) <= tolerance for mx, my, _ in matches)
+               for x, y in label.get('positions', []))
+
+
+def normalize_text(text):
+    return (text or '').replace(' ', '').replace(',', '.').upper()
+
+
+def bench_maps(bench, bot, corpus, labels):
+    template = get_template(bot.TEMPLATE_FILE)
+    tolerance = max(template.width, template.height) // 2 if template is not None else 10
+    for name, frame in load_images(os.path.join(corpus, 'maps')).items():
+        matches = bench.time('rentier_lkw_finden', bot.rentier_lkw_finden, frame)
+        if name in labels.get('maps', {}):
+            bench.check('rentier_lkw_finden', map_correct(matches, labels['maps'][name], tolerance))
+
+
+def bench_info(bench, bot, corpus, labels):
+    info_labels = labels.get('info', {})
+    for name, frame in load_images(os.path.join(corpus, 'info')).items():
+        label = info_labels.get(name, {})
+
+        def fresh(fn):
+            # Neue Frame-ID pro Aufruf: kein OCR-Cache-Treffer, echte Kosten
+            def run():
+                bot.store_frame('info.png', frame)
+                return fn()
+            return run
+
+        staerke = bench.time('ocr_staerke', fresh(bot.ocr_staerke))
+        server = bench.time('ocr_server', fresh(bot.ocr_server))
+        passend = bench.time('ist_server_passend', fresh(bot.ist_server_passend))
+        if 'staerke' in label:
+            bench.check('ocr_staerke', normalize_text(staerke) == normalize_text(label['staerke']))
+        if 'server' in label:
+            bench.check('ocr_server', server == str(label['server']))
+            bench.check('ist_server_passend', passend == (str(label['server']) == str(bot.server_number)))
+
+
+def bench_strings(bench, bot, labels):
+    for text, expected in labels.get('strings', {}).items():
+        value = bench.time('staerke_float_wert', bot.staerke_float_wert, text)
+        ok = value is None if expected is None else value is not None and abs(value - expected) < 1e-6
+        bench.check('staerke_float_wert', ok)
+
+
+def bench_dedup(bench, workdir, entries=2000):
+    store = DedupStore(os.path.join(workdir, 'bench_staerken.txt'), ttl=900)
+    index = HashIndex(os.path.join(workdir, 'bench_hashes.txt'), ttl=900)
+    for i in range(entries):
+        store.add(f"{i / 10:.1f}M")
+        index.add((i * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF, f"{i / 10:.1f}M")
+
+    for i in range(0, entries, max(1, entries // 50)):
+        key = f"{i / 10:.1f}M"
+        # Reiner Lookup ("in") und Lookup mit Verlängerung (nur im Speicher) getrennt
+        bench.check('dedup_lookup', bench.time('dedup_lookup', store.__contains__, key))
+        bench.check('dedup_lookup', not bench.time('dedup_lookup', store.__contains__, f"x{i}"))
+        bench.check('dedup_touch', bench.time('dedup_touch', store.get, key, True) is not None)
+        h = (i * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        # Ein gekipptes Bit muss noch als bekannt gelten
+        bench.check('hash_lookup', bench.time('hash_lookup', index.lookup, h ^ 1) is not None)
+
+
+def compare(results, baseline, tolerance):
+    """Liste der Regressionen gegenüber der Baseline"""
+    failures = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            failures.append(f"{name}: fehlt im aktuellen Lauf")
+            continue
+        limit = base['median_ms'] * (1 + tolerance) + MIN_SLACK_MS
+        if current['median_ms'] > limit:
+            failures.append(f"{name}: median {current['median_ms']} ms > {limit:.3f} ms "
+                            f"(Baseline {base['median_ms']} ms)")
+        if base.get('accuracy') is not None and (current['accuracy'] or 0) < base['accuracy']:
+            failures.append(f"{name}: Genauigkeit {current['accuracy']} < Baseline {base['accuracy']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--threshold', type=float, default=LKWBotController.MATCH_THRESHOLD)
+    parser.add_argument('--baseline', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           'baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    with open(os.path.join(args.corpus, 'labels.json'), 'r', encoding='utf-8') as f:
+        labels = json.load(f)
+
+    # Korpus mit eigener Glyph-Bank (z.B. synthetisch): diese statt der globalen verwenden
+    corpus_glyphs = os.path.join(args.corpus, GLYPH_FILE)
+    if os.path.exists(corpus_glyphs):
+        glyph_recognizer.path = corpus_glyphs
+
+    workdir = tempfile.mkdtemp(prefix='bench_hotpaths_')
+    bot = LKWBotController({'workdir': workdir}, device_id='bench')
+    bot.MATCH_THRESHOLD = args.threshold
+    bot.server_number = str(labels.get('server_number', bot.server_number))
+    # Jeder Frame soll voll gematcht werden
+    bot.frame_gate = None
+    bot.analysis_pool = None
+
+    bench = Bench(args.runs)
+    bench_maps(bench, bot, args.corpus, labels)
+    bench_info(bench, bot, args.corpus, labels)
+    bench_strings(bench, bot, labels)
+    bench_dedup(bench, workdir)
+    results = bench.results()
+
+    print(f"{'Funktion':<22} {'n':>6} {'median ms':>10} {'p95 ms':>10} {'Genauigkeit':>12}")
+    for name, r in results.items():
+        accuracy = f"{r['accuracy'] * 100:.1f}%" if r['accuracy'] is not None else '-'
+        print(f"{name:<22} {r['calls']:>6} {r['median_ms']:>10.3f} {r['p95_ms']:>10.3f} {accuracy:>12}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'threshold': args.threshold, 'results': results}, f, indent=2)
+        print(f"Baseline gespeichert: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Keine Baseline vorhanden (--save-baseline zum Anlegen)")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    failures = compare(results, baseline['results'], args.tolerance)
+    if failures:
+        print("\nREGRESSION:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print(f"\nOK gegenüber Baseline (Toleranz {args.tolerance * 100:.0f}%)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: echter Bot-Loop gegen das Fake-Gerät (aufgezeichnete Session)
+
+Session aufzeichnen: "record_session": "sessions/run1" in der ssh_config
+setzen und den Bot normal laufen lassen (siehe bots/fake_device.py).
+
+Ohne aufgezeichnete Session: --synthetic erzeugt eine synthetische Session
+(benchmarks/synthetic.py) samt Glyph-Bank in einem temporären Verzeichnis.
+
+Aufruf:
+    python benchmarks/bench_loop.py sessions/run1 [--minutes 5] [--backend native]
+        [--capture png] [--pipeline] [--latency-scale 1.0] [--seed 0] [--json ergebnis.json]
+    python benchmarks/bench_loop.py --synthetic [--minutes 1]
+
+Mit --backend subprocess wird tools/fake_adb (adb-Ersatz) vor PATH gesetzt.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import functools
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bots.lkw_bot import LKWBotController
+from bots.fake_device import Session, FakeDevice, FakeAdbServer
+from bots.glyphs import glyph_recognizer, GLYPH_FILE
+
+# Bot-Methoden, deren Latenz einzeln gemessen wird
+STAGES = ('make_screenshot_robust', 'rentier_lkw_finden', 'open_truck', 'decide_truck',
+          'execute_decision', 'handle_no_truck')
+
+
+def instrument(bot, timings):
+    """Ersetzt die Stufen-Methoden der Instanz durch zeitmessende Wrapper"""
+    for name in STAGES:
+        method = getattr(bot, name)
+
+        @functools.wraps(method)
+        def timed(*args, _method=method, _samples=timings.setdefault(name, []), **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                _samples.append((time.perf_counter() - start) * 1000)
+
+        setattr(bot, name, timed)
+
+
+def summarize(samples):
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+    return {
+        'count': len(samples),
+        'median_ms': round(statistics.median(ordered), 1),
+        'p95_ms': round(ordered[max(0, int(len(ordered) * 0.95) - 1)], 1),
+        'max_ms': round(ordered[-1], 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('session', nargs='?')
+    parser.add_argument('--synthetic', action='store_true', help='synthetische Session erzeugen und verwenden')
+    parser.add_argument('--minutes', type=float, default=5)
+    parser.add_argument('--backend', choices=('native', 'subprocess', 'async'), default='native')
+    parser.add_argument('--capture', choices=('png', 'raw'), default='png')
+    parser.add_argument('--pipeline', action='store_true')
+    parser.add_argument('--latency-scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='Ergebnis zusätzlich als JSON speichern')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from synthetic import make_session
+        args.session = make_session(tempfile.mkdtemp(prefix='bench_session_'), args.seed)
+    elif not args.session:
+        parser.error('Session-Verzeichnis oder --synthetic angeben')
+
+    # Session mit eigener Glyph-Bank (z.B. synthetisch): diese statt der globalen verwenden
+    session_glyphs = os.path.join(args.session, GLYPH_FILE)
+    if os.path.exists(session_glyphs):
+        glyph_recognizer.path = session_glyphs
+
+    random.seed(args.seed)
+    session = Session(args.session)
+    latency = {k: v * args.latency_scale for k, v in session.latency.items()}
+    device = FakeDevice(session, latency=latency, seed=args.seed)
+    server = FakeAdbServer(device)
+    server.start()
+
+    if args.backend != 'native':
+        os.environ['PATH'] = os.path.join(ROOT, 'tools', 'fake_adb') + os.pathsep + os.environ.get('PATH', '')
+
+    ssh_config = {
+        'local_adb_port': server.port,
+        'direct_adb': True,
+        'adb_backend': args.backend,
+        'capture_mode': args.capture,
+        'pipeline_mode': args.pipeline,
+        'workdir': tempfile.mkdtemp(prefix='bench_loop_')
+    }
+    bot = LKWBotController(ssh_config, device_id='bench')
+    timings = {}
+    instrument(bot, timings)
+
+    start = time.time()
+    bot.start('benchmark')
+    deadline = start + args.minutes * 60
+    while time.time() < deadline and bot.running:
+        time.sleep(1)
+    bot.stop()
+    elapsed = time.time() - start
+    server.stop()
+
+    hours = elapsed / 3600
+    status = bot.status_dict()
+    result = {
+        'session': args.session,
+        'backend': args.backend,
+        'capture': args.capture,
+        'pipeline': args.pipeline,
+        'seconds': round(elapsed, 1),
+        'trucks_processed': status['trucks_processed'],
+        'trucks_shared': status['trucks_shared'],
+        'trucks_per_hour': round(status['trucks_processed'] / hours, 1) if hours else 0.0,
+        'shared_per_hour': round(status['trucks_shared'] / hours, 1) if hours else 0.0,
+        'stages': {name: summarize(samples) for name, samples in timings.items()},
+        'device': device.to_dict(),
+        'capture_stats': status['capture'],
+        'detection': status['detection'],
+        'resilience': status['resilience'],
+        'pipeline_stats': status['pipeline']
+    }
+
+    print(f"{elapsed:.0f}s, {args.backend}/{args.capture}{' pipeline' if args.pipeline else ''}: "
+          f"{result['trucks_per_hour']} LKW/h ({result['trucks_processed']} verarbeitet, "
+          f"{result['trucks_shared']} geteilt)")
+    print(f"{'Stufe':<24} {'n':>6} {'median ms':>10} {'p95 ms':>10}")
+    for name in STAGES:
+        s = result['stages'].get(name, {'count': 0})
+        if s['count']:
+            print(f"{name:<24} {s['count']:>6} {s['median_ms']:>10.1f} {s['p95_ms']:>10.1f}")
+    print(f"Gerät: {result['device']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
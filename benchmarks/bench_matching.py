@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Template Matching 'full' vs. 'pyramid'
+
+Aufruf:
+    python benchmarks/bench_matching.py screen1.png screen2.png ... [--runs 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+from bots.lkw_bot import LKWBotController
+from bots.template_cache import get_template
+from bots.matching import match_full, match_pyramid
+
+
+def time_mode(fn, frames, template, runs, **kwargs):
+    """CPU-Zeit pro Frame in ms und Treffer des letzten Durchlaufs"""
+    cpu_ms = []
+    results = []
+    for frame in frames:
+        for _ in range(runs):
+            start = time.process_time()
+            matches = fn(frame, template, LKWBotController.MATCH_THRESHOLD,
+                         LKWBotController.MAX_CANDIDATES, **kwargs)
+            cpu_ms.append((time.process_time() - start) * 1000)
+        results.append(matches)
+    return cpu_ms, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('screenshots', nargs='+')
+    parser.add_argument('--template', default=LKWBotController.TEMPLATE_FILE)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--scale', type=float, default=0.5)
+    parser.add_argument('--refine-window', type=int, default=8)
+    args = parser.parse_args()
+
+    template = get_template(args.template)
+    if template is None:
+        sys.exit(f"Template {args.template} nicht gefunden")
+    frames = [cv2.imread(p) for p in args.screenshots]
+    if any(f is None for f in frames):
+        sys.exit("Screenshot konnte nicht geladen werden")
+
+    full_ms, full_res = time_mode(match_full, frames, template, args.runs)
+    pyr_ms, pyr_res = time_mode(match_pyramid, frames, template, args.runs,
+                                scale=args.scale, refine_window=args.refine_window)
+
+    print(f"{'Modus':<10} {'median ms':>10} {'p95 ms':>10}")
+    for name, samples in (('full', full_ms), ('pyramid', pyr_ms)):
+        p95 = sorted(samples)[int(len(samples) * 0.95) - 1] if len(samples) >= 20 else max(samples)
+        print(f"{name:<10} {statistics.median(samples):>10.2f} {p95:>10.2f}")
+
+    # Kandidaten-Mengen vergleichen: Reihenfolge bei gleichem Score ist beliebig,
+    # daher jeder full-Treffer gegen den nächstgelegenen Pyramiden-Treffer
+    tolerance = max(template.width, template.height) // 2
+    print()
+    for path, full, pyr in zip(args.screenshots, full_res, pyr_res):
+        full, pyr = full or [], pyr or []
+        if not full and not pyr:
+            print(f"{path}: kein Treffer (beide)")
+            continue
+        print(f"{path}: {compare_candidates(full, pyr, tolerance)}")
+
+
+def _distance(a, b):
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+
+def compare_candidates(full, pyr, tolerance):
+    """Größte Abweichung zwischen zugeordneten Treffern sowie fehlende/zusätzliche Kandidaten"""
+    worst = 0
+    missed = []
+    for candidate in full:
+        nearest = min((_distance(candidate, other) for other in pyr), default=None)
+        if nearest is None or nearest > tolerance:
+            missed.append(candidate[:2])
+        else:
+            worst = max(worst, nearest)
+    extra = [c[:2] for c in pyr if all(_distance(c, other) > tolerance for other in full)]
+    text = f"{len(full)} full / {len(pyr)} pyramid, max. Abweichung {worst} px"
+    if missed:
+        text += f", FEHLT in pyramid: {missed}"
+    if extra:
+        text += f", ZUSÄTZLICH in pyramid: {extra}"
+    return text
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetische Test-Daten ohne echtes Gerät: Session für bench_loop.py und
+gelabelter Korpus für bench_hotpaths.py, jeweils mit passender Glyph-Bank.
+
+Karten bestehen aus einem glatten Hintergrund mit eingefügtem
+rentier_template.png, Info-Panels aus Stärke und Server in den Boxen des
+Bots. Gleicher Seed = gleiche Bilder.
+
+Aufruf:
+    python benchmarks/synthetic.py session benchmarks/fixtures/session [--seed 0]
+    python benchmarks/synthetic.py corpus benchmarks/fixtures/corpus [--seed 0]
+"""
+
+import os
+import sys
+import json
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import cv2
+import numpy as np
+
+from bots.lkw_bot import LKWBotController as Bot
+from bots.glyphs import GlyphBank, GLYPH_FILE, segment, normalize
+from bots.fake_device import SESSION_FILE
+
+WIDTH, HEIGHT = 720, 1280
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+GLYPH_CHARS = '0123456789.M'
+
+# Stärke, Server, Position (Mitte) des LKWs auf der Karte
+TRUCKS = [
+    ('12.5M', '49', (240, 520)),
+    ('8.3M', '49', (460, 700)),
+    ('12.8M', '49', (330, 420)),
+    ('20.1M', '51', (520, 560)),
+    ('8.3M', '49', (180, 760)),
+    ('15.0M', '49', (400, 300)),
+]
+
+SESSION_LATENCY = {'screencap_ms': 60, 'tap_ms': 20, 'shell_ms': 10, 'jitter_ms': 5}
+
+
+def background(seed):
+    """Flacher Karten-Hintergrund mit leichtem Verlauf (gut komprimierbar)"""
+    rng = np.random.default_rng(seed)
+    top, bottom = rng.integers(60, 140, size=(2, 3))
+    ramp = np.linspace(0.0, 1.0, HEIGHT // 40)[:, None, None]
+    bands = np.round(top + (bottom - top) * ramp).astype(np.uint8)
+    return np.ascontiguousarray(np.repeat(np.repeat(bands, 40, axis=0), WIDTH, axis=1))
+
+
+def paste_truck(frame, center, template):
+    th, tw = template.shape[:2]
+    x, y = center[0] - tw // 2, center[1] - th // 2
+    frame[y:y + th, x:x + tw] = template
+    return frame
+
+
+def put_text_in_box(frame, text, box, scale=0.8):
+    """Weiße Schrift, links in der Box, vertikal zentriert"""
+    x1, y1, x2, y2 = box
+    (w, h), _ = cv2.getTextSize(text, FONT, scale, 2)
+    cv2.putText(frame, text, (x1 + 4, y1 + (y2 - y1 + h) // 2), FONT, scale, (255, 255, 255), 2, cv2.LINE_AA)
+    return frame
+
+
+def map_frame(seed, template, centers=()):
+    frame = background(seed)
+    for center in centers:
+        paste_truck(frame, center, template)
+    return frame
+
+
+def info_frame(map_img, strength, server):
+    """Info-Panel über der Karte (deckt die Übergangs-Region des Truck-Taps ab)"""
+    frame = map_img.copy()
+    x1, y1, x2, y2 = Bot.TRANSITIONS_NEW['truck']
+    cv2.rectangle(frame, (x1, y1), (x2, y2), (40, 30, 30), -1)
+    put_text_in_box(frame, server, Bot.SERVER_BOX, scale=0.7)
+    put_text_in_box(frame, strength, Bot.STAERKE_BOX)
+    return frame
+
+
+def dialog_frame(frame, region, color):
+    frame = frame.copy()
+    x1, y1, x2, y2 = region
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, -1)
+    cv2.rectangle(frame, (x1, y1), (x2, y2), (20, 20, 20), 4)
+    return frame
+
+
+def glyph_bank():
+    """Glyph-Bank aus derselben Schrift wie die Info-Panels"""
+    labels, vectors = [], []
+    for scale in (0.7, 0.8):
+        crop = np.zeros((50, 40 * len(GLYPH_CHARS), 3), dtype=np.uint8)
+        for i, char in enumerate(GLYPH_CHARS):
+            put_text_in_box(crop, char, (i * 40, 0, i * 40 + 40, 50), scale)
+        glyphs = segment(crop)
+        if len(glyphs) != len(GLYPH_CHARS):
+            raise RuntimeError(f"Glyph-Segmentierung: {len(glyphs)} statt {len(GLYPH_CHARS)} Zeichen")
+        for char, glyph in zip(GLYPH_CHARS, glyphs):
+            labels.append(char)
+            vectors.append(normalize(glyph))
+    return GlyphBank(labels, np.stack(vectors))
+
+
+def _region_around(center, radius=30):
+    x, y = center
+    return [x - radius, y - radius, x + radius, y + radius]
+
+
+def make_session(out_dir, seed=0):
+    """
+    Zustandsgraph wie im Spiel: Karte -> (Tap auf LKW) Info -> ESC -> nächste
+    Karte, bzw. Info -> Teilen -> Bestätigung 1 -> Bestätigung 2 -> Info ->
+    ESC. Jede zweite Karte ist leer (ESC ohne LKW).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    template = cv2.imread(os.path.join(ROOT, Bot.TEMPLATE_FILE))
+    coords = Bot.COORDS_NEW
+    transitions = Bot.TRANSITIONS_NEW
+    esc = _region_around(coords['esc'])
+    states = {}
+    frames = {}
+
+    n = len(TRUCKS)
+    for k, (strength, server, center) in enumerate(TRUCKS):
+        next_map = f'map{(k + 1) % n}'
+        map_img = map_frame(seed + k, template, [center])
+        info_img = info_frame(map_img, strength, server)
+        share_img = dialog_frame(info_img, transitions['share'], (200, 200, 200))
+        confirm_img = dialog_frame(share_img, transitions['share_confirm1'], (90, 160, 90))
+        frames.update({f'map{k}': map_img, f'info{k}': info_img, f'share{k}': share_img,
+                       f'confirm{k}': confirm_img, f'empty{k}': map_frame(seed + 100 + k, template)})
+
+        states[f'map{k}'] = {'taps': [{'region': _region_around(center, 40), 'next': [f'info{k}']}],
+                             'default': f'map{k}'}
+        # ESC auf dem Info-Panel: abwechselnd direkt zur nächsten Karte oder erst auf eine leere
+        states[f'info{k}'] = {'taps': [{'region': esc, 'next': [f'empty{k}', next_map]},
+                                       {'region': _region_around(coords['share']), 'next': [f'share{k}']}],
+                              'default': f'info{k}'}
+        states[f'share{k}'] = {'taps': [{'region': _region_around(coords['share_confirm1']),
+                                         'next': [f'confirm{k}']}],
+                               'default': f'share{k}'}
+        states[f'confirm{k}'] = {'taps': [{'region': _region_around(coords['share_confirm2']),
+                                           'next': [f'info{k}']}],
+                                 'default': f'confirm{k}'}
+        states[f'empty{k}'] = {'taps': [{'region': esc, 'next': [next_map]}], 'default': f'empty{k}'}
+
+    for state, frame in frames.items():
+        cv2.imwrite(os.path.join(out_dir, f'{state}.png'), frame)
+        states[state]['frame'] = f'{state}.png'
+    with open(os.path.join(out_dir, SESSION_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'start': 'map0', 'size': [WIDTH, HEIGHT], 'latency': SESSION_LATENCY, 'states': states},
+                  f, indent=1, sort_keys=True)
+    glyph_bank().save(os.path.join(out_dir, GLYPH_FILE))
+    return out_dir
+
+
+def make_corpus(out_dir, seed=0):
+    """Korpus im Format von bench_hotpaths.py (labels.json, maps/, info/)"""
+    template = cv2.imread(os.path.join(ROOT, Bot.TEMPLATE_FILE))
+    os.makedirs(os.path.join(out_dir, 'maps'), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, 'info'), exist_ok=True)
+    labels = {'server_number': '49', 'maps': {}, 'info': {}, 'strings': {
+        '12,5M': 12.5, '125M': 12.5, '8.3M': 8.3, '20.1 M': 20.1, 'abc': None}}
+
+    cv2.imwrite(os.path.join(out_dir, 'maps', 'leer.png'), map_frame(seed, template))
+    labels['maps']['leer.png'] = 0
+    centers = [center for _, _, center in TRUCKS]
+    for count in (1, 2, 3):
+        name = f'lkw_{count}.png'
+        cv2.imwrite(os.path.join(out_dir, 'maps', name), map_frame(seed + count, template, centers[:count]))
+        labels['maps'][name] = {'count': count, 'positions': [list(c) for c in centers[:count]]}
+
+    for k, (strength, server, center) in enumerate(TRUCKS[:4]):
+        name = f'info_{k + 1:02d}.png'
+        cv2.imwrite(os.path.join(out_dir, 'info', name),
+                    info_frame(map_frame(seed + k, template, [center]), strength, server))
+        labels['info'][name] = {'staerke': strength, 'server': server}
+
+    with open(os.path.join(out_dir, 'labels.json'), 'w', encoding='utf-8') as f:
+        json.dump(labels, f, indent=2, ensure_ascii=False)
+    glyph_bank().save(os.path.join(out_dir, GLYPH_FILE))
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=('session', 'corpus'))
+    parser.add_argument('out_dir')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    out = make_session(args.out_dir, args.seed) if args.kind == 'session' else make_corpus(args.out_dir, args.seed)
+    print(f"{args.kind} erzeugt: {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADB-Backends: subprocess (adb-Binary) und nativer Protokoll-Client
+Version 3.2
+"""
+
+import os
+import socket
+import struct
+import subprocess
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ADB-Protokoll Konstanten
+A_CNXN = 0x4e584e43
+A_AUTH = 0x48545541
+A_OPEN = 0x4e45504f
+A_OKAY = 0x59414b4f
+A_CLSE = 0x45534c43
+A_WRTE = 0x45545257
+
+A_VERSION = 0x01000000
+MAX_PAYLOAD = 256 * 1024
+
+AUTH_TOKEN = 1
+AUTH_SIGNATURE = 2
+AUTH_RSAPUBLICKEY = 3
+
+ADB_KEY_FILE = os.path.join(os.path.expanduser('~'), '.android', 'adbkey')
+
+
+class AdbError(Exception):
+    """Fehler bei einem ADB-Kommando"""
+
+
+class AdbTimeout(AdbError):
+    """Zeitüberschreitung bei einem ADB-Kommando"""
+
+
+class SubprocessAdb:
+    """ADB über das adb-Binary (ein Prozess pro Kommando)"""
+
+    name = 'subprocess'
+
+    def __init__(self):
+        self.serial = None
+
+    def connect(self, serial, timeout=10):
+        """adb connect"""
+        self.serial = serial
+        result = subprocess.run(['adb', 'connect', serial], capture_output=True, text=True, timeout=timeout)
+        out = result.stdout.lower()
+        return 'connected' in out or 'already' in out
+
+    def disconnect(self, serial=None, timeout=5):
+        """adb disconnect"""
+        serial = serial or self.serial
+        if serial:
+            subprocess.run(['adb', 'disconnect', serial], timeout=timeout, capture_output=True)
+
+    def _run(self, mode, args, timeout):
+        if not self.serial:
+            raise AdbError("Kein Gerät verbunden")
+        cmd = ['adb', '-s', self.serial, mode] + [str(a) for a in args]
+        try:
+            result = subprocess.run(cmd, timeout=timeout, capture_output=True)
+        except subprocess.TimeoutExpired:
+            raise AdbTimeout(f"{mode} {' '.join(map(str, args))}: Timeout")
+        if result.returncode != 0:
+            raise AdbError(f"{mode} {' '.join(map(str, args))}: {result.stderr[:200]}")
+        return result.stdout
+
+    def shell(self, args, timeout=10):
+        """adb shell"""
+        return self._run('shell', args, timeout)
+
+    def exec_out(self, args, timeout=15):
+        """adb exec-out (binärsicher)"""
+        return self._run('exec-out', args, timeout)
+
+
+class _Stream:
+    """Ein gemultiplexter ADB-Stream (OPEN ... CLSE)"""
+
+    def __init__(self, local_id):
+        self.local_id = local_id
+        self.remote_id = 0
+        self.data = bytearray()
+        self.opened = threading.Event()
+        self.closed = threading.Event()
+        self.error = None
+
+
+class NativeAdb:
+    """
+    Spricht das ADB-Transportprotokoll direkt über den Tunnel-Socket.
+    Eine TCP-Verbindung für die gesamte Bot-Laufzeit, jedes Kommando
+    ist ein eigener Stream auf dieser Verbindung.
+    """
+
+    name = 'native'
+
+    def __init__(self, key_file=ADB_KEY_FILE):
+        self.serial = None
+        self.key_file = key_file
+        self.sock = None
+        self.max_payload = MAX_PAYLOAD
+        self.reader_thread = None
+        self.send_lock = threading.Lock()
+        self.streams_lock = threading.Lock()
+        self.streams = {}
+        self.next_id = 1
+        self.connected = False
+
+    # ---------- Low-Level ----------
+
+    def _send(self, command, arg0, arg1, data=b''):
+        header = struct.pack('<6I', command, arg0, arg1, len(data),
+                             sum(data) & 0xffffffff, command ^ 0xffffffff)
+        with self.send_lock:
+            self.sock.sendall(header + data)
+
+    def _recv_exact(self, n):
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self.sock.recv(n - len(buf))
+            if not chunk:
+                raise AdbError("Verbindung vom Gerät geschlossen")
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def _recv(self):
+        command, arg0, arg1, length, _crc, magic = struct.unpack('<6I', self._recv_exact(24))
+        if magic != command ^ 0xffffffff:
+            raise AdbError("Ungültiger ADB-Header")
+        data = self._recv_exact(length) if length else b''
+        return command, arg0, arg1, data
+
+    # ---------- Verbindung ----------
+
+    def connect(self, serial, timeout=10):
+        """Baut die Verbindung auf und führt den CNXN/AUTH-Handshake durch"""
+        self.disconnect()
+        self.serial = serial
+        host, port = serial.rsplit(':', 1)
+        try:
+            self.sock = socket.create_connection((host, int(port)), timeout=timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._send(A_CNXN, A_VERSION, MAX_PAYLOAD, b'host::\0')
+            self._handshake()
+        except (OSError, AdbError) as e:
+            logger.warning(f"ADB-Native: Verbindung zu {serial} fehlgeschlagen: {e}")
+            self._close_socket()
+            return False
+
+        self.sock.settimeout(None)
+        self.connected = True
+        self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self.reader_thread.start()
+        logger.info(f"ADB-Native: Verbunden mit {serial}")
+        return True
+
+    def _handshake(self):
+        signed = False
+        while True:
+            command, arg0, arg1, data = self._recv()
+            if command == A_CNXN:
+                self.max_payload = min(arg1, MAX_PAYLOAD) or MAX_PAYLOAD
+                return
+            if command != A_AUTH or arg0 != AUTH_TOKEN:
+                raise AdbError(f"Unerwartete Antwort im Handshake: {command:#x}")
+            if not signed:
+                self._send(A_AUTH, AUTH_SIGNATURE, 0, self._sign(data))
+                signed = True
+            else:
+                # Schlüssel unbekannt - Public Key senden (muss am Gerät bestätigt werden)
+                self._send(A_AUTH, AUTH_RSAPUBLICKEY, 0, self._public_key() + b'\0')
+
+    def _sign(self, token):
+        try:
+            from cryptography.hazmat.primitives import hashes, serialization
+            from cryptography.hazmat.primitives.asymmetric import padding, utils
+        except ImportError:
+            raise AdbError("ADB-Auth benötigt das Paket 'cryptography'")
+        if not os.path.exists(self.key_file):
+            raise AdbError(f"ADB-Key {self.key_file} nicht gefunden")
+        with open(self.key_file, 'rb') as f:
+            key = serialization.load_pem_private_key(f.read(), password=None)
+        # Token wird von adbd als SHA1-Digest behandelt
+        return key.sign(token, padding.PKCS1v15(), utils.Prehashed(hashes.SHA1()))
+
+    def _public_key(self):
+        pub_file = self.key_file + '.pub'
+        if not os.path.exists(pub_file):
+            raise AdbError(f"ADB-Public-Key {pub_file} nicht gefunden")
+        with open(pub_file, 'rb') as f:
+            return f.read().strip()
+
+    def disconnect(self, serial=None, timeout=5):
+        """Schließt die Verbindung und beendet alle offenen Streams"""
+        self.connected = False
+        self._close_socket()
+        self._fail_streams(AdbError("Verbindung getrennt"))
+        if self.reader_thread and self.reader_thread is not threading.current_thread():
+            self.reader_thread.join(timeout=timeout)
+        self.reader_thread = None
+
+    def _close_socket(self):
+        if self.sock:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def _fail_streams(self, error):
+        with self.streams_lock:
+            streams = list(self.streams.values())
+            self.streams.clear()
+        for stream in streams:
+            stream.error = error
+            stream.opened.set()
+            stream.closed.set()
+
+    def _reader_loop(self):
+        """Verteilt eingehende Nachrichten auf die Streams"""
+        try:
+            while self.connected:
+                command, arg0, arg1, data = self._recv()
+                with self.streams_lock:
+                    stream = self.streams.get(arg1)
+                if stream is None:
+                    if command == A_WRTE:
+                        self._send(A_CLSE, 0, arg0)
+                    continue
+
+                if command == A_OKAY:
+                    stream.remote_id = arg0
+                    stream.opened.set()
+                elif command == A_WRTE:
+                    stream.data.extend(data)
+                    self._send(A_OKAY, stream.local_id, arg0)
+                elif command == A_CLSE:
+                    with self.streams_lock:
+                        self.streams.pop(stream.local_id, None)
+                    if stream.opened.is_set():
+                        self._send(A_CLSE, stream.local_id, arg0)
+                    elif not stream.remote_id:
+                        stream.error = AdbError("Service vom Gerät abgelehnt")
+                    stream.opened.set()
+                    stream.closed.set()
+        except (OSError, AdbError) as e:
+            if self.connected:
+                logger.warning(f"ADB-Native: Verbindung verloren: {e}")
+            self.connected = False
+            self._fail_streams(AdbError(f"Verbindung verloren: {e}"))
+
+    # ---------- Services ----------
+
+    def _service(self, service, timeout):
+        if not self.connected:
+            raise AdbError("Kein Gerät verbunden")
+
+        with self.streams_lock:
+            local_id = self.next_id
+            self.next_id = self.next_id % 0x7fffffff + 1
+            stream = _Stream(local_id)
+            self.streams[local_id] = stream
+
+        self._send(A_OPEN, local_id, 0, service.encode() + b'\0')
+        if not stream.closed.wait(timeout):
+            with self.streams_lock:
+                self.streams.pop(local_id, None)
+            if stream.remote_id:
+                self._send(A_CLSE, local_id, stream.remote_id)
+            raise AdbTimeout(f"{service}: Timeout")
+        if stream.error:
+            raise stream.error
+        return bytes(stream.data)
+
+    def shell(self, args, timeout=10):
+        """shell:-Service"""
+        return self._service('shell:' + ' '.join(str(a) for a in args), timeout)
+
+    def exec_out(self, args, timeout=15):
+        """exec:-Service (binärsicher, wie adb exec-out)"""
+        return self._service('exec:' + ' '.join(str(a) for a in args), timeout)
+
+
+ADB_BACKENDS = {
+    'subprocess': SubprocessAdb,
+    'native': NativeAdb,
+}
+
+
+def create_adb_backend(name):
+    """Erzeugt das ADB-Backend laut Config"""
+    if name == 'async':
+        from .async_device import AsyncAdbBackend
+        return AsyncAdbBackend()
+    backend_cls = ADB_BACKENDS.get(name)
+    if backend_cls is None:
+        logger.warning(f"Unbekanntes ADB-Backend '{name}', verwende subprocess")
+        backend_cls = SubprocessAdb
+    return backend_cls()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analyse-Pool: Template Matching und OCR in Worker-Prozessen,
+Frames werden per Shared Memory übergeben (kein Pickling der Pixel)
+Version 3.2
+"""
+
+import time
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# ---------- Worker-Seite ----------
+
+def _attach(shm_name):
+    try:
+        # Python >= 3.13: Worker soll das Segment nicht selbst verwalten
+        return shared_memory.SharedMemory(name=shm_name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=shm_name)
+
+
+def _run_task(task, shm_name, shape, dtype, kwargs):
+    """Läuft im Worker: Frame aus dem Shared Memory lesen und Task ausführen"""
+    shm = _attach(shm_name)
+    frame = None
+    try:
+        frame = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        start = time.perf_counter()
+        result = _TASKS[task](frame, **kwargs)
+        return result, (time.perf_counter() - start) * 1000
+    finally:
+        # View freigeben, bevor das Segment geschlossen wird
+        del frame
+        shm.close()
+
+
+def _task_match(frame, template_file, threshold, max_candidates, mode='full', scale=0.5, refine_window=8):
+    from .template_cache import get_template
+    from .matching import match_full, match_pyramid
+    template = get_template(template_file)
+    if template is None:
+        return None
+    if mode == 'pyramid':
+        return match_pyramid(frame, template, threshold, max_candidates, scale=scale, refine_window=refine_window)
+    return match_full(frame, template, threshold, max_candidates)
+
+
+def _task_ocr(frame, config=''):
+    import cv2
+    from PIL import Image
+    from .ocr import get_ocr_service
+    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    return get_ocr_service().engine.image_to_string(image, config=config).strip()
+
+
+_TASKS = {
+    'match': _task_match,
+    'ocr': _task_ocr,
+}
+
+
+# ---------- Aufrufer-Seite ----------
+
+class TaskStats:
+    """Latenz pro Task-Art (Ende-zu-Ende und reine Worker-Zeit)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.worker_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, total_ms, worker_ms):
+        self.count += 1
+        self.total_ms += total_ms
+        self.worker_ms += worker_ms
+        self.max_ms = max(self.max_ms, total_ms)
+        self.last_ms = total_ms
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 1) if self.count else 0.0,
+            'avg_worker_ms': round(self.worker_ms / self.count, 1) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 1),
+            'last_ms': round(self.last_ms, 1)
+        }
+
+
+class AnalysisPool:
+    """Prozess-Pool für CPU-lastige Analyse, von allen Bots geteilt"""
+
+    def __init__(self, size):
+        self.size = size
+        ctx = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+                                          else 'spawn')
+        self.executor = ProcessPoolExecutor(max_workers=size, mp_context=ctx)
+        self._free = []
+        self._segments = []
+        self._lock = threading.Lock()
+        self.stats = {task: TaskStats() for task in _TASKS}
+        logger.info(f"Analyse-Pool mit {size} Worker(n) gestartet")
+
+    def _acquire(self, nbytes):
+        """Wiederverwendbares Shared-Memory-Segment mit mindestens nbytes"""
+        with self._lock:
+            for i, shm in enumerate(self._free):
+                if shm.size >= nbytes:
+                    return self._free.pop(i)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._segments.append(shm)
+            return shm
+
+    def _release(self, shm):
+        with self._lock:
+            self._free.append(shm)
+
+    def run(self, task, frame, timeout=30, **kwargs):
+        """Führt task auf frame in einem Worker aus und wartet auf das Ergebnis"""
+        start = time.perf_counter()
+        frame = np.ascontiguousarray(frame)
+        shm = self._acquire(frame.nbytes)
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[...] = frame
+        future = self.executor.submit(_run_task, task, shm.name, frame.shape, frame.dtype.str, kwargs)
+        try:
+            result, worker_ms = future.result(timeout=timeout)
+        except FutureTimeout:
+            # Worker liest evtl. noch: Segment nicht wiederverwenden (wird bei shutdown freigegeben)
+            logger.warning(f"Analyse-Task {task} Timeout nach {timeout}s")
+            raise
+        except Exception:
+            self._release(shm)
+            raise
+        self._release(shm)
+        self.stats[task].record((time.perf_counter() - start) * 1000, worker_ms)
+        return result
+
+    def match(self, frame, template_file, threshold, max_candidates, **kwargs):
+        return self.run('match', frame, template_file=template_file, threshold=threshold,
+                        max_candidates=max_candidates, **kwargs)
+
+    def ocr(self, crop, config=''):
+        return self.run('ocr', crop, config=config)
+
+    def to_dict(self):
+        return {'workers': self.size, 'tasks': {task: s.to_dict() for task, s in self.stats.items()}}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            for shm in self._segments:
+                shm.close()
+                shm.unlink()
+            self._segments.clear()
+            self._free.clear()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_analysis_pool(size):
+    """Prozessweiter Pool (wird beim ersten Aufruf mit size Workern erstellt)"""
+    global _pool
+    with _pool_lock:
+        if size <= 0:
+            return None
+        if _pool is None:
+            _pool = AnalysisPool(size)
+        return _pool
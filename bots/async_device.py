@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asynchrone Geräte-I/O: eine Event-Loop für alle Bots
+Version 3.2
+"""
+
+import asyncio
+import threading
+import logging
+
+from .adb_client import AdbError, AdbTimeout
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceLoop:
+    """
+    Event-Loop in einem eigenen Thread. Alle Geräte-Kommandos aller Bots
+    laufen hier, begrenzt durch eine gemeinsame Semaphore.
+    """
+
+    def __init__(self, max_concurrency=16):
+        self.max_concurrency = max_concurrency
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="device-loop", daemon=True)
+        self.thread.start()
+        self.semaphore = self.run(self._create_semaphore())
+
+    async def _create_semaphore(self):
+        return asyncio.Semaphore(self.max_concurrency)
+
+    def run(self, coro, timeout=None):
+        """Führt coro in der Loop aus und wartet synchron auf das Ergebnis"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return future.result(timeout)
+
+    async def limited(self, coro):
+        """coro mit begrenzter Gesamt-Parallelität ausführen"""
+        async with self.semaphore:
+            return await coro
+
+    def call_every(self, interval, fn, name=''):
+        """
+        Ruft fn (blockierend) alle interval Sekunden im Executor auf,
+        ohne eigenen schlafenden Thread. Rückgabe: Future zum Abbrechen.
+        """
+        async def _periodic():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.loop.run_in_executor(None, fn)
+                except Exception as e:
+                    logger.error(f"Periodischer Task {name} fehlgeschlagen: {e}")
+        return asyncio.run_coroutine_threadsafe(_periodic(), self.loop)
+
+
+_device_loop = None
+_device_loop_lock = threading.Lock()
+
+
+def get_device_loop(max_concurrency=16):
+    """Prozessweite DeviceLoop (wird beim ersten Aufruf gestartet)"""
+    global _device_loop
+    with _device_loop_lock:
+        if _device_loop is None:
+            _device_loop = DeviceLoop(max_concurrency)
+        return _device_loop
+
+
+class AsyncAdb:
+    """Geräte-I/O als Coroutinen (asyncio-Subprozesse und -Sockets)"""
+
+    def __init__(self, device_loop):
+        self.device_loop = device_loop
+        self.serial = None
+
+    async def _exec(self, args, timeout):
+        async def _run():
+            proc = await asyncio.create_subprocess_exec(
+                *[str(a) for a in args],
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                out, err = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise AdbTimeout(f"{' '.join(map(str, args[1:]))}: Timeout")
+            return proc.returncode, out, err
+        return await self.device_loop.limited(_run())
+
+    async def connect(self, serial, timeout=10):
+        self.serial = serial
+        _, out, _ = await self._exec(['adb', 'connect', serial], timeout)
+        out = out.decode(errors='replace').lower()
+        return 'connected' in out or 'already' in out
+
+    async def disconnect(self, serial=None, timeout=5):
+        serial = serial or self.serial
+        if serial:
+            await self._exec(['adb', 'disconnect', serial], timeout)
+
+    async def _device_cmd(self, mode, args, timeout):
+        if not self.serial:
+            raise AdbError("Kein Gerät verbunden")
+        code, out, err = await self._exec(['adb', '-s', self.serial, mode] + list(args), timeout)
+        if code != 0:
+            raise AdbError(f"{mode} {' '.join(map(str, args))}: {err[:200]}")
+        return out
+
+    async def shell(self, args, timeout=10):
+        return await self._device_cmd('shell', args, timeout)
+
+    async def exec_out(self, args, timeout=15):
+        return await self._device_cmd('exec-out', args, timeout)
+
+    async def tunnel_alive(self, host, port, timeout=3):
+        """Nimmt der lokale Tunnel-Port Verbindungen an?"""
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), timeout)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+
+class AsyncAdbBackend:
+    """
+    Synchrones ADB-Backend ('async') als dünne Hülle um AsyncAdb:
+    click()/make_screenshot() bleiben unverändert, die I/O läuft in der
+    gemeinsamen Event-Loop statt in blockierten Bot-Threads.
+    """
+
+    name = 'async'
+
+    def __init__(self, device_loop=None):
+        self.device_loop = device_loop or get_device_loop()
+        self.device = AsyncAdb(self.device_loop)
+
+    @property
+    def serial(self):
+        return self.device.serial
+
+    def _run(self, coro, timeout):
+        return self.device_loop.run(coro, timeout=timeout + 5)
+
+    def connect(self, serial, timeout=10):
+        return self._run(self.device.connect(serial, timeout), timeout)
+
+    def disconnect(self, serial=None, timeout=5):
+        return self._run(self.device.disconnect(serial, timeout), timeout)
+
+    def shell(self, args, timeout=10):
+        return self._run(self.device.shell(args, timeout), timeout)
+
+    def exec_out(self, args, timeout=15):
+        return self._run(self.device.exec_out(args, timeout), timeout)
+
+    def tunnel_alive(self, host, port, timeout=3):
+        return self._run(self.device.tunnel_alive(host, port, timeout), timeout)
@@ -5,18 +5,34 @@ Bot Base Class mit Auto-Reconnect
 Version 3.2
 """
 
+import os
 import subprocess
 import time
 import logging
 import threading
 
+from .capture import (CaptureStats, screencap_args, decode_screencap, region_probe, probe_diff,
+                      next_frame_id, raw_rows_args, raw_layout, decode_raw_rows)
+from .adb_client import create_adb_backend, SubprocessAdb, AdbError
+from .stream_capture import ScreenStream, parse_wm_size, probe_file_size
+from .metrics import BotMetrics
+from .resilience import RetryPolicy, CircuitBreaker, CircuitOpen, DeviceGuard
+from .status_stream import PublishedField
+
 logger = logging.getLogger(__name__)
 
 
 class BotBase:
     """Basis-Klasse für Bots mit SSH-Tunnel und Auto-Reconnect"""
     
+    # Änderungen dieser Felder gehen sofort an /api/status/stream
+    running = PublishedField()
+    paused = PublishedField()
+    adb_connected = PublishedField()
+    
     def __init__(self, bot_name, ssh_config):
+        # StatusChannel legt die Unterklasse an, sobald live_status() vollständig ist
+        self.status_channel = None
         self.bot_name = bot_name
         self.ssh_config = ssh_config
         self.running = False
@@ -27,9 +43,113 @@ class BotBase:
         # Auto-Reconnect Variablen
         self.consecutive_errors = 0
         self.max_consecutive_errors = 5
+        
+        # Eine Retry-Policy pro Operation, ein Circuit Breaker pro Gerät
+        self.retry_policies = {
+            'screenshot': RetryPolicy(attempts=3, base_delay=0.5, max_delay=4.0, budget=60),
+            'screenshot_robust': RetryPolicy(attempts=5, base_delay=0.5, max_delay=4.0, budget=90),
+            'tap': RetryPolicy(attempts=2, base_delay=0.3, max_delay=1.0, budget=10),
+            'frame': RetryPolicy(attempts=1),
+            'loop': RetryPolicy(attempts=1, base_delay=1.0, max_delay=30.0),
+        }
+        breaker = CircuitBreaker(
+            bot_name,
+            failure_threshold=ssh_config.get('circuit_failure_threshold', self.max_consecutive_errors),
+            reset_timeout=ssh_config.get('circuit_reset_timeout', 5.0)
+        )
+        self.device_guard = DeviceGuard(bot_name, self.retry_policies, breaker, on_open=self.reconnect_device)
         self.last_ssh_refresh = time.time()
         self.ssh_refresh_interval = 1800  # 30 Minuten
         self.keepalive_thread = None
+        self.keepalive_task = None
+        
+        # Tunnel-Rotation (make-before-break): aktiver lokaler Port
+        self.tunnel_lock = threading.RLock()
+        self.active_port = None
+        self.tunnel_rotations = 0
+        self.tunnel_drain_time = 2.0  # Sekunden bis der alte Tunnel geschlossen wird
+        
+        # Arbeitsverzeichnis für gerätespezifische Dateien
+        self.workdir = ssh_config.get('workdir') or '.'
+        os.makedirs(self.workdir, exist_ok=True)
+        
+        # Screenshots im Speicher statt /sdcard + pull
+        self.capture_mode = ssh_config.get('capture_mode', 'png')
+        self.frames = {}
+        self.frame_ids = {}
+        self.capture_stats = CaptureStats()
+        self.metrics = BotMetrics()
+        
+        # capture_mode 'stream': dauerhafter screenrecord-Stream statt Einzel-Screenshots
+        self.stream = None
+        self.last_tap_time = 0.0
+        self.stream_wait = float(ssh_config.get('stream_wait', 1.0))
+        self.stream_tap_latency = float(ssh_config.get('stream_tap_latency', 0.1))
+        
+        # Optional: Screenshots und Taps als Session für das Fake-Gerät aufzeichnen
+        record_dir = ssh_config.get('record_session')
+        self.recorder = None
+        if record_dir:
+            # Fake-Gerät nur laden, wenn wirklich aufgezeichnet wird
+            from .fake_device import SessionRecorder
+            self.recorder = SessionRecorder(record_dir)
+        
+        # ADB-Backend: 'subprocess' (adb-Binary), 'native' (eigener Protokoll-Client)
+        # oder 'async' (gemeinsame Event-Loop für alle Bots)
+        self.adb = create_adb_backend(ssh_config.get('adb_backend', 'subprocess'))
+        # Beim native-Backend kennt das adb-Binary (Stream) das Gerät erst nach 'adb connect'
+        self._binary_serial = None
+        
+        # Warten auf UI-Übergang statt fester Pause nach Klicks
+        self.transition_timeout = 3.0  # Sekunden
+        self.transition_threshold = 8.0  # mittlere Grauwert-Differenz
+        self.transition_poll_interval = 0.05
+        # Feste Pause nach Klicks nur, wo kein Übergang erkennbar ist (capture_mode 'file')
+        self.tap_delay = float(ssh_config.get('tap_delay', 1.0))
+        # Raw-Layout (Header, Breite, Format) für zugeschnittene Poll-Screenshots;
+        # False = Gerät kann nicht zuschneiden, volle Frames pollen
+        self._raw_layout = None
+    
+    def live_status(self):
+        """Kompakter Status für den Live-Stream (Unterklassen erweitern)"""
+        return {
+            'running': self.running,
+            'paused': self.paused,
+            'adb_connected': self.adb_connected
+        }
+    
+    def publish_status(self):
+        """Aktuellen Status im StatusChannel veröffentlichen (nur bei Änderung neue Version)"""
+        if self.status_channel is not None:
+            self.status_channel.publish(self.live_status())
+    
+    def work_path(self, name):
+        """Pfad einer Datei im Arbeitsverzeichnis des Bots"""
+        return os.path.join(self.workdir, name)
+    
+    @property
+    def adb_device(self):
+        """ADB-Geräteadresse (aktiver Tunnel-Port) oder None"""
+        local_port = self.active_port or self.ssh_config.get('local_adb_port')
+        if not local_port:
+            return None
+        return f'localhost:{local_port}'
+    
+    def capture_status(self):
+        """Capture-Statistik für /api/status (inkl. Stream und Frame-Alter)"""
+        status = self.capture_stats.to_dict()
+        status['mode'] = self.capture_mode
+        if self.stream:
+            status['stream'] = self.stream.to_dict()
+        return status
+    
+    def tunnel_status(self):
+        """Tunnel-Infos für /api/status"""
+        return {
+            'port': self.active_port,
+            'rotations': self.tunnel_rotations,
+            'last_refresh': self.last_ssh_refresh
+        }
     
     def ssh_keepalive_loop(self):
         """Hält SSH-Tunnel durch periodischen Refresh aktiv"""
@@ -38,205 +158,574 @@ class BotBase:
             time.sleep(60)
             if not self.running:
                 break
-            
-            elapsed = time.time() - self.last_ssh_refresh
-            if elapsed >= self.ssh_refresh_interval:
-                logger.info(f"{self.bot_name}: Preventiver SSH-Tunnel Refresh (30 Min)")
-                try:
-                    self.close_ssh_tunnel()
-                    time.sleep(3)
-                    if self.setup_ssh_tunnel():
-                        self.last_ssh_refresh = time.time()
-                        self.consecutive_errors = 0
-                        logger.info(f"{self.bot_name}: SSH-Tunnel erfolgreich refreshed")
-                    else:
-                        logger.warning(f"{self.bot_name}: SSH-Tunnel Refresh fehlgeschlagen")
-                except Exception as e:
-                    logger.error(f"{self.bot_name}: Fehler beim SSH-Refresh: {e}")
+            self._keepalive_tick()
         logger.info(f"{self.bot_name}: SSH-Keepalive-Thread beendet")
     
-    def setup_ssh_tunnel(self):
-        """Baut SSH-Tunnel auf"""
-        ssh_command_str = self.ssh_config.get('ssh_command')
-        ssh_password = self.ssh_config.get('ssh_password')
-        local_port = self.ssh_config.get('local_adb_port')
-
-        if not ssh_command_str or not local_port:
-            logger.error(f"{self.bot_name}: SSH-Command oder Local Port fehlt")
-            self.adb_connected = False
+    def tunnel_healthy(self):
+        """Prüft, ob der lokale Tunnel-Port erreichbar ist (nur mit async-Backend)"""
+        local_port = self.active_port
+        if not local_port or not hasattr(self.adb, 'tunnel_alive'):
+            return True
+        try:
+            return self.adb.tunnel_alive('127.0.0.1', local_port)
+        except Exception:
             return False
+    
+    def _keepalive_tick(self):
+        """Eine Keepalive-Runde: Rotation nach Intervall, Reconnect bei totem Tunnel"""
+        if not self.running:
+            return
         
-        self.close_ssh_tunnel()
+        elapsed = time.time() - self.last_ssh_refresh
+        healthy = self.tunnel_healthy()
+        if healthy and (elapsed < self.ssh_refresh_interval or self.ssh_config.get('direct_adb')):
+            return
         
-        # Parse SSH Command
+        if healthy:
+            logger.info(f"{self.bot_name}: Preventive SSH-Tunnel Rotation (30 Min)")
+        else:
+            logger.warning(f"{self.bot_name}: Tunnel-Port nicht erreichbar - Rotation")
+        try:
+            if self.rotate_ssh_tunnel():
+                self.consecutive_errors = 0
+                return
+            if healthy:
+                # Alter Tunnel läuft weiter, nächster Versuch in der nächsten Runde
+                logger.warning(f"{self.bot_name}: Rotation fehlgeschlagen, alter Tunnel bleibt aktiv")
+                return
+            logger.warning(f"{self.bot_name}: Rotation fehlgeschlagen - kompletter Reconnect")
+            self.close_ssh_tunnel()
+            time.sleep(3)
+            if self.setup_ssh_tunnel():
+                self.consecutive_errors = 0
+                logger.info(f"{self.bot_name}: SSH-Tunnel erfolgreich refreshed")
+            else:
+                logger.warning(f"{self.bot_name}: SSH-Tunnel Refresh fehlgeschlagen")
+        except Exception as e:
+            logger.error(f"{self.bot_name}: Fehler beim SSH-Refresh: {e}")
+    
+    def _tunnel_params(self):
+        """(user, host, ssh_port, remote_port) aus dem SSH-Command oder None"""
         import re
+        ssh_command_str = self.ssh_config.get('ssh_command') or ''
         user_host_match = re.search(r'([\w\.\-_]+)@([\d\.]+)', ssh_command_str)
         port_match = re.search(r'-p\s+(\d+)', ssh_command_str)
         remote_port_match = re.search(r':(\d+)\s+-Nf', ssh_command_str)
         
         if not user_host_match or not port_match or not remote_port_match:
-            logger.error(f"{self.bot_name}: Konnte SSH-Command nicht parsen")
+            return None
+        return (user_host_match.group(1), user_host_match.group(2),
+                int(port_match.group(1)), int(remote_port_match.group(1)))
+    
+    def _start_forwarder(self, params, local_port):
+        """Startet einen SSHTunnelForwarder auf local_port (0 = freier Port)"""
+        from sshtunnel import SSHTunnelForwarder
+        
+        ssh_username, ssh_host, ssh_port, remote_port = params
+        forwarder = SSHTunnelForwarder(
+            (ssh_host, ssh_port),
+            ssh_username=ssh_username,
+            ssh_password=self.ssh_config.get('ssh_password'),
+            remote_bind_address=('adb-proxy', remote_port),
+            local_bind_address=('127.0.0.1', int(local_port)),
+            set_keepalive=10.0,
+            ssh_config_file=None,
+            allow_agent=False,
+            host_pkey_directories=[]
+        )
+        forwarder.start()
+        return forwarder
+    
+    def _stop_forwarder(self, forwarder):
+        if hasattr(forwarder, 'stop'):
+            forwarder.stop()
+        else:
+            forwarder.terminate()
+            forwarder.wait(timeout=5)
+    
+    def _verify_adb(self, adb, timeout=5):
+        """Prüft per Shell-Kommando, ob das Gerät über adb antwortet"""
+        try:
+            return b'ok' in adb.shell(['echo', 'ok'], timeout=timeout)
+        except Exception as e:
+            logger.warning(f"{self.bot_name}: ADB-Prüfung auf {adb.serial} fehlgeschlagen: {e}")
+            return False
+    
+    def connect_direct(self):
+        """ADB direkt auf local_adb_port ohne SSH-Tunnel (lokaler Emulator, Fake-Gerät)"""
+        local_port = self.ssh_config.get('local_adb_port')
+        if not local_port:
+            logger.error(f"{self.bot_name}: Local Port fehlt")
+            self.adb_connected = False
             return False
         
-        ssh_username = user_host_match.group(1)
-        ssh_host = user_host_match.group(2)
-        ssh_port = int(port_match.group(1))
-        remote_port = int(remote_port_match.group(1))
+        with self.tunnel_lock:
+            self.active_port = int(local_port)
+            if self.adb.connect(self.adb_device, timeout=10):
+                logger.info(f"{self.bot_name}: ADB direkt verbunden ({self.adb.name})")
+                self.adb_connected = True
+                self.last_ssh_refresh = time.time()
+                return True
+            logger.warning(f"{self.bot_name}: ADB-Verbindung fehlgeschlagen")
+            self.adb_connected = False
+            return False
+    
+    def setup_ssh_tunnel(self):
+        """Baut SSH-Tunnel auf"""
+        if self.ssh_config.get('direct_adb'):
+            return self.connect_direct()
         
-        logger.info(f"{self.bot_name}: Starte SSH-Tunnel auf Port {local_port}...")
+        ssh_command_str = self.ssh_config.get('ssh_command')
+        local_port = self.ssh_config.get('local_adb_port')
+
+        if not ssh_command_str or not local_port:
+            logger.error(f"{self.bot_name}: SSH-Command oder Local Port fehlt")
+            self.adb_connected = False
+            return False
         
-        try:
-            from sshtunnel import SSHTunnelForwarder
-            
-            self.ssh_process = SSHTunnelForwarder(
-                (ssh_host, ssh_port),
-                ssh_username=ssh_username,
-                ssh_password=ssh_password,
-                remote_bind_address=('adb-proxy', remote_port),
-                local_bind_address=('127.0.0.1', int(local_port)),
-                set_keepalive=10.0,
-                ssh_config_file=None,
-                allow_agent=False,
-                host_pkey_directories=[]
-            )
-            
-            self.ssh_process.start()
-            logger.info(f"{self.bot_name}: SSH-Tunnel erfolgreich gestartet")
+        with self.tunnel_lock:
+            self.close_ssh_tunnel()
             
-            time.sleep(2)
+            params = self._tunnel_params()
+            if not params:
+                logger.error(f"{self.bot_name}: Konnte SSH-Command nicht parsen")
+                return False
             
-            # ADB verbinden
-            adb_cmd = ['adb', 'connect', f'localhost:{local_port}']
-            adb_result = subprocess.run(adb_cmd, capture_output=True, text=True, timeout=10)
+            logger.info(f"{self.bot_name}: Starte SSH-Tunnel auf Port {local_port}...")
             
-            if 'connected' in adb_result.stdout.lower() or 'already' in adb_result.stdout.lower():
-                logger.info(f"{self.bot_name}: ADB erfolgreich verbunden")
-                self.adb_connected = True
-                self.last_ssh_refresh = time.time()
-                return True
-            else:
-                logger.warning(f"{self.bot_name}: ADB-Verbindung fehlgeschlagen")
+            try:
+                self.ssh_process = self._start_forwarder(params, local_port)
+                self.active_port = int(local_port)
+                logger.info(f"{self.bot_name}: SSH-Tunnel erfolgreich gestartet")
+                
+                time.sleep(2)
+                
+                # ADB verbinden
+                if self.adb.connect(self.adb_device, timeout=10):
+                    logger.info(f"{self.bot_name}: ADB erfolgreich verbunden ({self.adb.name})")
+                    self.adb_connected = True
+                    self.last_ssh_refresh = time.time()
+                    return True
+                else:
+                    logger.warning(f"{self.bot_name}: ADB-Verbindung fehlgeschlagen")
+                    self.close_ssh_tunnel()
+                    self.adb_connected = False
+                    return False
+
+            except Exception as e:
+                logger.error(f"{self.bot_name}: Fehler beim SSH-Tunnel: {e}")
                 self.close_ssh_tunnel()
                 self.adb_connected = False
                 return False
-
-        except Exception as e:
-            logger.error(f"{self.bot_name}: Fehler beim SSH-Tunnel: {e}")
-            self.close_ssh_tunnel()
-            self.adb_connected = False
+    
+    def _rotation_port(self):
+        """Port für den neuen Tunnel: abwechselnd konfigurierter Port und Zweit-Port"""
+        local_port = int(self.ssh_config.get('local_adb_port'))
+        if self.active_port != local_port:
+            return local_port
+        # Ohne rotation_adb_port wählt das System einen freien Port
+        return int(self.ssh_config.get('rotation_adb_port') or 0)
+    
+    def rotate_ssh_tunnel(self):
+        """
+        Make-before-break: neuen Tunnel auf zweitem Port aufbauen, ADB darüber
+        prüfen, aktive Geräteadresse umschalten und erst dann den alten Tunnel
+        schließen. Der Bot-Loop sieht dabei keine fehlgeschlagenen Frames.
+        """
+        if self.ssh_config.get('direct_adb'):
+            return self.connect_direct()
+        if not self.ssh_config.get('ssh_command') or not self.ssh_config.get('local_adb_port'):
             return False
+        params = self._tunnel_params()
+        if not params:
+            logger.error(f"{self.bot_name}: Konnte SSH-Command nicht parsen")
+            return False
+        
+        with self.tunnel_lock:
+            if not self.ssh_process:
+                return self.setup_ssh_tunnel()
+            
+            start = time.perf_counter()
+            try:
+                forwarder = self._start_forwarder(params, self._rotation_port())
+            except Exception as e:
+                logger.warning(f"{self.bot_name}: Neuer Tunnel konnte nicht gestartet werden: {e}")
+                return False
+            
+            new_port = forwarder.local_bind_port
+            new_adb = create_adb_backend(self.adb.name)
+            try:
+                ok = (new_adb.connect(f'localhost:{new_port}', timeout=10)
+                      and self._verify_adb(new_adb))
+            except Exception as e:
+                logger.warning(f"{self.bot_name}: ADB auf Port {new_port} fehlgeschlagen: {e}")
+                ok = False
+            if not ok:
+                try:
+                    new_adb.disconnect(f'localhost:{new_port}', timeout=5)
+                    self._stop_forwarder(forwarder)
+                except Exception as e:
+                    logger.error(f"{self.bot_name}: Fehler beim Verwerfen des neuen Tunnels: {e}")
+                return False
+            
+            # Umschalten: laufende Kommandos nutzen noch das alte Backend
+            old_adb, old_forwarder, old_port = self.adb, self.ssh_process, self.active_port
+            self.adb, self.ssh_process, self.active_port = new_adb, forwarder, new_port
+            self.adb_connected = True
+            self.last_ssh_refresh = time.time()
+            self.tunnel_rotations += 1
+            self.metrics.observe('rotation', time.perf_counter() - start)
+            logger.info(f"{self.bot_name}: Tunnel rotiert {old_port} -> {new_port} "
+                        f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        
+        # Alten Tunnel erst nach Ablauf laufender Kommandos schließen
+        time.sleep(self.tunnel_drain_time)
+        try:
+            old_adb.disconnect(f'localhost:{old_port}', timeout=5)
+            self._stop_forwarder(old_forwarder)
+        except Exception as e:
+            logger.error(f"{self.bot_name}: Fehler beim Schließen des alten Tunnels: {e}")
+        return True
+    
+    def _ensure_adb_binary(self):
+        """
+        Seriennummer für Aufrufe des adb-Binarys. Das native Backend spricht
+        das Protokoll selbst, der adb-Server kennt das Gerät dann nicht:
+        einmal pro Tunnel-Port 'adb connect' nachholen.
+        """
+        serial = self.adb_device
+        if self.adb.name != 'native' or serial == self._binary_serial:
+            return serial
+        binary = SubprocessAdb()
+        if self._binary_serial:
+            try:
+                binary.disconnect(self._binary_serial, timeout=5)
+            except Exception as e:
+                logger.warning(f"{self.bot_name}: adb disconnect {self._binary_serial} fehlgeschlagen: {e}")
+        self._binary_serial = None
+        if not binary.connect(serial, timeout=10):
+            raise AdbError(f"adb connect {serial} fehlgeschlagen")
+        self._binary_serial = serial
+        return serial
+    
+    def _release_adb_binary(self):
+        if self._binary_serial:
+            try:
+                SubprocessAdb().disconnect(self._binary_serial, timeout=5)
+            except Exception as e:
+                logger.warning(f"{self.bot_name}: adb disconnect {self._binary_serial} fehlgeschlagen: {e}")
+            self._binary_serial = None
     
     def close_ssh_tunnel(self):
         """Schließt SSH-Tunnel"""
         try:
-            local_port = self.ssh_config.get('local_adb_port')
-            if local_port:
-                logger.info(f"{self.bot_name}: Trenne ADB von localhost:{local_port}")
-                subprocess.run(['adb', 'disconnect', f'localhost:{local_port}'], 
-                             timeout=5, capture_output=True)
+            self.stop_stream()
+            self._release_adb_binary()
+            adb_device = self.adb_device
+            if adb_device:
+                logger.info(f"{self.bot_name}: Trenne ADB von {adb_device}")
+                self.adb.disconnect(adb_device, timeout=5)
             
             if self.ssh_process:
                 logger.info(f"{self.bot_name}: Beende SSH-Tunnel-Prozess")
-                if hasattr(self.ssh_process, 'stop'):
-                    self.ssh_process.stop()
-                else:
-                    self.ssh_process.terminate()
-                    self.ssh_process.wait(timeout=5)
+                self._stop_forwarder(self.ssh_process)
                 self.ssh_process = None
+            self.active_port = None
+            self._raw_layout = None
 
             self.adb_connected = False
             logger.info(f"{self.bot_name}: SSH-Tunnel sauber getrennt")
         except Exception as e:
             logger.error(f"{self.bot_name}: Fehler beim Schließen: {e}")
     
-    def make_screenshot(self, filename='screen.png'):
-        """Screenshot mit Auto-Retry"""
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                local_port = self.ssh_config.get('local_adb_port')
-                if not local_port:
-                    return False
-                
-                adb_device = f'localhost:{local_port}'
-                
-                # Screenshot erstellen
-                result_screencap = subprocess.run(
-                    ['adb', '-s', adb_device, 'shell', 'screencap', '-p', f'/sdcard/{filename}'], 
-                    timeout=15, 
-                    capture_output=True
-                )
-                
-                if result_screencap.returncode != 0:
-                    raise Exception("screencap fehlgeschlagen")
-                
-                # Screenshot pullen
-                result_pull = subprocess.run(
-                    ['adb', '-s', adb_device, 'pull', f'/sdcard/{filename}', filename], 
-                    timeout=15, 
-                    capture_output=True
-                )
-                
-                import os
-                if result_pull.returncode == 0 and os.path.exists(filename):
-                    self.consecutive_errors = 0
-                    return True
-                else:
-                    raise Exception("pull fehlgeschlagen")
-                    
-            except subprocess.TimeoutExpired:
-                logger.warning(f"{self.bot_name}: Screenshot timeout, Versuch {attempt+1}/{max_retries}")
-                self.consecutive_errors += 1
-                
-                if attempt < max_retries - 1:
-                    if self.consecutive_errors >= 3:
-                        logger.error(f"{self.bot_name}: 3 Fehler - SSH-Reconnect")
-                        self.close_ssh_tunnel()
-                        time.sleep(3)
-                        self.setup_ssh_tunnel()
-                        self.consecutive_errors = 0
-                    time.sleep(2)
-                    
-            except Exception as e:
-                logger.error(f"{self.bot_name}: Screenshot-Fehler: {e}")
-                self.consecutive_errors += 1
-                
-                if attempt < max_retries - 1:
-                    if self.consecutive_errors >= 3:
-                        logger.error(f"{self.bot_name}: 3 Fehler - SSH-Reconnect")
-                        self.close_ssh_tunnel()
-                        time.sleep(3)
-                        self.setup_ssh_tunnel()
-                        self.consecutive_errors = 0
-                    time.sleep(2)
-        
-        # Kompletter Reset bei zu vielen Fehlern
-        if self.consecutive_errors >= self.max_consecutive_errors:
-            logger.error(f"{self.bot_name}: {self.max_consecutive_errors} Fehler - KOMPLETTER RESET")
-            self.close_ssh_tunnel()
-            time.sleep(5)
-            self.setup_ssh_tunnel()
-            self.consecutive_errors = 0
+    def _ensure_stream(self):
+        """Startet den Stream bzw. startet ihn nach Tunnel-Rotation neu"""
+        source = self.ssh_config.get('stream_file') or self.adb_device
+        if self.stream and self.stream.source == source:
+            return self.stream
+        self.stop_stream()
+        if not self.ssh_config.get('stream_file'):
+            source = self._ensure_adb_binary()
         
-        return False
+        size = self.ssh_config.get('stream_size')
+        if size:
+            size = tuple(int(v) for v in str(size).lower().split('x'))
+        elif os.path.isfile(source):
+            size = probe_file_size(source)
+        else:
+            size = parse_wm_size(self.adb.shell(['wm', 'size'], timeout=5))
+        
+        self.stream = ScreenStream(source, size, bit_rate=int(self.ssh_config.get('stream_bit_rate', 4000000)))
+        self.stream.start()
+        return self.stream
+    
+    def stop_stream(self):
+        if self.stream:
+            self.stream.stop()
+            self.stream = None
+    
+    def _grab_stream_frame(self, timeout):
+        """Neuester Frame aus dem Stream, möglichst jünger als der letzte Tap"""
+        stream = self._ensure_stream()
+        start = time.perf_counter()
+        item = stream.frame_after(self.last_tap_time + self.stream_tap_latency,
+                                  timeout=min(timeout, self.stream_wait))
+        if item is None:
+            # Stream läuft gerade erst an
+            item = stream.ring.wait_newer(0, timeout)
+        if item is None:
+            raise Exception("Stream liefert keine Frames")
+        self.capture_stats.record(0, (time.perf_counter() - start) * 1000)
+        # Ringpuffer-Frames sind schreibgeschützt und werden geteilt
+        return item.frame.copy()
+    
+    def grab_frame(self, timeout=15):
+        """Streamt einen Screenshot per exec-out direkt als BGR-Array"""
+        if not self.adb_device:
+            raise Exception("ADB-Port nicht konfiguriert")
+        
+        start = time.perf_counter()
+        if self.capture_mode == 'stream':
+            frame = self._grab_stream_frame(timeout)
+            self.metrics.observe('capture', time.perf_counter() - start)
+            if self.recorder:
+                self.recorder.frame(frame)
+            return frame
+        
+        data = self.adb.exec_out(screencap_args(self.capture_mode), timeout=timeout)
+        if not data:
+            raise Exception("exec-out screencap lieferte keine Daten")
+        
+        frame = decode_screencap(data, self.capture_mode)
+        elapsed = time.perf_counter() - start
+        self.capture_stats.record(len(data), elapsed * 1000)
+        self.metrics.observe('capture', elapsed)
+        if self.recorder:
+            self.recorder.frame(frame)
+        return frame
+    
+    def store_frame(self, name, frame):
+        """Legt einen Frame unter name ab und vergibt eine neue Frame-ID"""
+        self.frames[name] = frame
+        self.frame_ids[name] = next_frame_id()
     
-    def click(self, x, y):
-        """ADB Click"""
+    def get_frame(self, name='screen.png'):
+        """Liefert den zuletzt aufgenommenen Frame (Fallback: Datei)"""
+        frame = self.frames.get(name)
+        if frame is None and self.capture_mode == 'file':
+            import cv2
+            frame = cv2.imread(self.work_path(name))
+        return frame
+    
+    def _capture(self, filename):
+        """Ein Screenshot-Versuch ohne Retry (wirft bei Fehlern)"""
+        adb_device = self.adb_device
+        if not adb_device:
+            raise Exception("ADB-Port nicht konfiguriert")
+        
+        if self.capture_mode != 'file':
+            self.store_frame(filename, self.grab_frame(timeout=15))
+            return
+        
+        start = time.perf_counter()
+        # screencap + pull laufen über das adb-Binary (auch beim native-Backend)
+        adb_device = self._ensure_adb_binary()
+        local_file = self.work_path(filename)
+        if os.path.exists(local_file):
+            os.remove(local_file)
+        
+        # Screenshot erstellen
+        result_screencap = subprocess.run(
+            ['adb', '-s', adb_device, 'shell', 'screencap', '-p', f'/sdcard/{filename}'], 
+            timeout=15, 
+            capture_output=True
+        )
+        
+        if result_screencap.returncode != 0:
+            raise Exception("screencap fehlgeschlagen")
+        
+        # Screenshot pullen
+        result_pull = subprocess.run(
+            ['adb', '-s', adb_device, 'pull', f'/sdcard/{filename}', local_file], 
+            timeout=15, 
+            capture_output=True
+        )
+        
+        if result_pull.returncode != 0 or not os.path.exists(local_file):
+            raise Exception("pull fehlgeschlagen")
+        if os.path.getsize(local_file) < 1000:
+            raise Exception(f"Screenshot zu klein ({os.path.getsize(local_file)} bytes)")
+        self.frame_ids[filename] = next_frame_id()
+        self.metrics.observe('capture', time.perf_counter() - start)
+    
+    def make_screenshot(self, filename='screen.png', operation='screenshot'):
+        """Screenshot mit Retry-Policy der Operation und Circuit Breaker"""
+        if not self.adb_device:
+            return False
+        try:
+            self.device_guard.call(operation, self._capture, filename)
+        except CircuitOpen as e:
+            logger.warning(f"{self.bot_name}: Screenshot übersprungen: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"{self.bot_name}: Screenshot fehlgeschlagen: {e}")
+            return False
+        
+        self.consecutive_errors = 0
+        return True
+    
+    def reconnect_device(self):
+        """Tunnel neu aufbauen - wird einmal pro Öffnung des Circuit Breakers aufgerufen"""
+        logger.error(f"{self.bot_name}: Gerät gestört - SSH-Reconnect")
+        start = time.perf_counter()
         try:
-            local_port = self.ssh_config.get('local_adb_port')
-            if not local_port:
+            if self.rotate_ssh_tunnel():
+                return True
+            self.close_ssh_tunnel()
+            time.sleep(3)
+            return self.setup_ssh_tunnel()
+        finally:
+            self.metrics.observe('reconnect', time.perf_counter() - start)
+    
+    def click(self, x, y, delay=0, action='tap'):
+        """ADB Click (action = Name für die Klick-Metrik)"""
+        try:
+            if not self.adb_device:
                 return False
-            adb_device = f'localhost:{local_port}'
-            subprocess.run(['adb', '-s', adb_device, 'shell', 'input', 'tap', 
-                          str(x), str(y)], capture_output=True, timeout=5)
-            time.sleep(2)
+            start = time.perf_counter()
+            # self.adb erst beim Aufruf lesen (Tunnel-Rotation tauscht das Backend)
+            self.device_guard.call('tap', lambda: self.adb.shell(['input', 'tap', x, y], timeout=5))
+            self.metrics.click(action, time.perf_counter() - start)
+            self.last_tap_time = time.time()
+            if self.recorder:
+                self.recorder.tap(x, y)
+            if delay:
+                time.sleep(delay)
             return True
         except Exception as e:
             logger.error(f"{self.bot_name}: Klick-Fehler: {e}")
             return False
     
+    def _region_layout(self, timeout):
+        """Raw-Layout des Geräts (einmal ermittelt) oder None, wenn kein Zuschnitt möglich ist"""
+        if self._raw_layout is None:
+            try:
+                header = self.adb.exec_out(['screencap', '|', 'head', '-c', '12'], timeout=timeout)
+                total = int(self.adb.exec_out(['screencap', '|', 'wc', '-c'], timeout=timeout).split()[0])
+                self._raw_layout = raw_layout(header, total)
+            except Exception as e:
+                logger.warning(f"{self.bot_name}: Kein Raw-Zuschnitt auf dem Gerät ({e}) - polle volle Frames")
+                self._raw_layout = False
+        return self._raw_layout or None
+    
+    def grab_region(self, region, timeout=5):
+        """
+        Günstiger Frame zum Pollen von Übergängen: im Stream-Modus der neueste
+        Frame aus dem Ringpuffer, sonst ein auf dem Gerät auf die Zeilen der
+        Region zugeschnittener Raw-screencap (kein PNG, nur diese Zeilen).
+        (Bild, Region im Bild)
+        """
+        layout = None if self.capture_mode == 'stream' else self._region_layout(timeout)
+        if layout is None:
+            return self.grab_frame(timeout), region
+        
+        header_size, width, pixel_format = layout
+        x1, y1, x2, y2 = region
+        start = time.perf_counter()
+        data = self.adb.exec_out(raw_rows_args(header_size, width, y1, y2), timeout=timeout)
+        strip = decode_raw_rows(data, width, y2 - y1, pixel_format)
+        self.metrics.observe('poll', time.perf_counter() - start)
+        return strip, (x1, 0, x2, y2 - y1)
+    
+    def wait_for_change(self, region, reference, timeout=None, settle=False, want_frame=True):
+        """
+        Pollt bis sich die Region gegenüber der Referenz ändert. Mit
+        settle=True wird zusätzlich gewartet, bis die Region wieder stabil
+        ist. Gibt den letzten Frame zurück (mit want_frame=False ggf. nur den
+        Ausschnitt) oder None, wenn sich nichts geändert hat.
+        
+        Gepollt werden günstige Ausschnitte (grab_region); volle Frames nur,
+        wo der letzte Poll ohnehin der Rückgabewert ist: in der Settle-Phase
+        bzw. ohne settle, wenn der Frame gebraucht wird.
+        """
+        timeout = timeout or self.transition_timeout
+        deadline = time.perf_counter() + timeout
+        ref_probe = region_probe(reference, region)
+        changed = False
+        last_probe = None
+        last_crop = None
+        
+        while time.perf_counter() < deadline:
+            try:
+                if want_frame and (changed or not settle):
+                    crop, crop_region = self.device_guard.call('frame', self.grab_frame,
+                                                               timeout=max(1, timeout)), region
+                else:
+                    crop, crop_region = self.device_guard.call('frame', self.grab_region, region,
+                                                               timeout=max(1, timeout))
+            except Exception as e:
+                logger.warning(f"{self.bot_name}: Frame beim Warten fehlgeschlagen: {e}")
+                time.sleep(self.transition_poll_interval)
+                continue
+            
+            probe = region_probe(crop, crop_region)
+            last_crop = crop
+            if not changed:
+                changed = probe_diff(probe, ref_probe) >= self.transition_threshold
+                if changed and not settle:
+                    break
+            elif probe_diff(probe, last_probe) < self.transition_threshold / 2:
+                break
+            last_probe = probe
+            time.sleep(self.transition_poll_interval)
+        
+        # Geändert, aber nicht zur Ruhe gekommen: letzten Frame trotzdem verwenden
+        if not changed:
+            return None
+        if want_frame and last_crop.shape[:2] != reference.shape[:2]:
+            # Timeout direkt nach der Änderung: nur ein Ausschnitt vorhanden
+            try:
+                return self.device_guard.call('frame', self.grab_frame, timeout=max(1, timeout))
+            except Exception as e:
+                logger.warning(f"{self.bot_name}: Frame nach Übergang fehlgeschlagen: {e}")
+                return None
+        return last_crop
+    
+    def click_and_wait(self, x, y, region, reference=None, timeout=None, settle=False, action='tap',
+                       want_frame=True):
+        """Klick, danach warten bis sich die erwartete Region ändert"""
+        if region is None or self.capture_mode == 'file':
+            self.click(x, y, delay=self.tap_delay, action=action)
+            return None
+        
+        try:
+            if reference is None:
+                reference = self.device_guard.call('frame', self.grab_frame)
+        except Exception as e:
+            logger.warning(f"{self.bot_name}: Referenz-Frame fehlgeschlagen: {e}")
+            self.click(x, y, delay=self.tap_delay, action=action)
+            return None
+        
+        start = time.perf_counter()
+        if not self.click(x, y, delay=0, action=action):
+            return None
+        
+        wait_start = time.perf_counter()
+        frame = self.wait_for_change(region, reference, timeout=timeout, settle=settle, want_frame=want_frame)
+        self.metrics.observe('transition', time.perf_counter() - wait_start)
+        if frame is None:
+            logger.warning(f"{self.bot_name}: Kein UI-Übergang nach Klick ({x}, {y})")
+        else:
+            logger.debug(f"{self.bot_name}: UI-Übergang nach {(time.perf_counter() - start) * 1000:.0f} ms")
+        return frame
+    
     def start_keepalive(self):
-        """Startet Keepalive-Thread"""
+        """Startet Keepalive-Thread (bzw. periodischen Task in der Event-Loop)"""
+        if self.adb.name == 'async':
+            if not self.keepalive_task or self.keepalive_task.done():
+                self.keepalive_task = self.adb.device_loop.call_every(
+                    60, self._keepalive_tick, name=f"{self.bot_name}-keepalive")
+            return
         if not self.keepalive_thread or not self.keepalive_thread.is_alive():
             self.keepalive_thread = threading.Thread(
                 target=self.ssh_keepalive_loop, 
@@ -246,5 +735,9 @@ class BotBase:
     
     def stop_keepalive(self):
         """Stoppt Keepalive-Thread"""
+        if self.keepalive_task:
+            self.keepalive_task.cancel()
+            self.keepalive_task = None
+        
         if self.keepalive_thread:
             self.keepalive_thread.join(timeout=5)
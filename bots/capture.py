@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Screenshot-Capture direkt in den Speicher
+Version 3.2
+"""
+
+import struct
+import itertools
+import logging
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# screencap Raw-Pixelformate (android.graphics.PixelFormat)
+PIXEL_FORMAT_RGBA_8888 = 1
+PIXEL_FORMAT_RGBX_8888 = 2
+PIXEL_FORMAT_BGRA_8888 = 5
+
+# Capture-Modi: 'png' = exec-out screencap -p, 'raw' = exec-out screencap (RGBA),
+# 'file' = alter Weg über /sdcard + adb pull, 'stream' = screenrecord-Stream (stream_capture.py)
+CAPTURE_MODES = ('png', 'raw', 'file', 'stream')
+
+# Prozessweit eindeutige Frame-IDs (z.B. als OCR-Cache-Schlüssel)
+_frame_ids = itertools.count(1)
+
+
+def next_frame_id():
+    """Neue eindeutige Frame-ID"""
+    return next(_frame_ids)
+
+
+def screencap_args(mode):
+    """Liefert die screencap-Argumente für exec-out"""
+    if mode == 'raw':
+        return ['screencap']
+    return ['screencap', '-p']
+
+
+def decode_png(data):
+    """Dekodiert PNG-Bytes zu einem BGR-Array"""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    frame = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("PNG konnte nicht dekodiert werden")
+    return frame
+
+
+def decode_raw(data):
+    """Dekodiert Raw-screencap (Header + RGBA) zu einem BGR-Array"""
+    if len(data) < 12:
+        raise ValueError(f"Raw-Screenshot zu klein ({len(data)} bytes)")
+
+    width, height, pixel_format = struct.unpack_from('<III', data, 0)
+    pixel_bytes = width * height * 4
+
+    # Ab Android 9 folgt ein zusätzliches Colorspace-Feld
+    if len(data) - 16 == pixel_bytes:
+        header_size = 16
+    elif len(data) - 12 >= pixel_bytes:
+        header_size = 12
+    else:
+        raise ValueError(f"Raw-Screenshot unvollständig ({len(data)} bytes für {width}x{height})")
+
+    pixels = np.frombuffer(data, dtype=np.uint8, count=pixel_bytes, offset=header_size)
+    pixels = pixels.reshape((height, width, 4))
+
+    if pixel_format == PIXEL_FORMAT_BGRA_8888:
+        return cv2.cvtColor(pixels, cv2.COLOR_BGRA2BGR)
+    if pixel_format in (PIXEL_FORMAT_RGBA_8888, PIXEL_FORMAT_RGBX_8888):
+        return cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR)
+    raise ValueError(f"Unbekanntes Pixelformat {pixel_format}")
+
+
+def raw_rows_args(header_size, width, y1, y2):
+    """
+    exec-out-Argumente für die Zeilen y1..y2 eines Raw-screencaps: der
+    Zuschnitt läuft auf dem Gerät, übertragen werden nur diese Zeilen
+    """
+    start = header_size + y1 * width * 4
+    return ['screencap', '|', 'tail', '-c', f'+{start + 1}', '|', 'head', '-c', str((y2 - y1) * width * 4)]
+
+
+def raw_layout(header, total_bytes):
+    """(Header-Größe, Breite, Pixelformat) aus den ersten 12 Bytes und der Gesamtgröße eines Raw-screencaps"""
+    width, height, pixel_format = struct.unpack_from('<III', header, 0)
+    header_size = total_bytes - width * height * 4
+    if header_size not in (12, 16):
+        raise ValueError(f"Unerwartetes Raw-Format ({total_bytes} bytes für {width}x{height})")
+    return header_size, width, pixel_format
+
+
+def decode_raw_rows(data, width, rows, pixel_format):
+    """Dekodiert zugeschnittene Raw-Zeilen (ohne Header) zu einem BGR-Array"""
+    pixel_bytes = width * rows * 4
+    if len(data) < pixel_bytes:
+        raise ValueError(f"Raw-Ausschnitt unvollständig ({len(data)} von {pixel_bytes} bytes)")
+    pixels = np.frombuffer(data, dtype=np.uint8, count=pixel_bytes).reshape((rows, width, 4))
+    if pixel_format == PIXEL_FORMAT_BGRA_8888:
+        return cv2.cvtColor(pixels, cv2.COLOR_BGRA2BGR)
+    if pixel_format in (PIXEL_FORMAT_RGBA_8888, PIXEL_FORMAT_RGBX_8888):
+        return cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR)
+    raise ValueError(f"Unbekanntes Pixelformat {pixel_format}")
+
+
+def decode_screencap(data, mode):
+    """Dekodiert die screencap-Ausgabe je nach Modus"""
+    if mode == 'raw':
+        return decode_raw(data)
+    return decode_png(data)
+
+
+class CaptureStats:
+    """Zählt übertragene Bytes und Latenz der Screenshots"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_bytes = 0
+        self.total_ms = 0.0
+        self.last_bytes = 0
+        self.last_ms = 0.0
+
+    def record(self, nbytes, latency_ms):
+        self.count += 1
+        self.total_bytes += nbytes
+        self.total_ms += latency_ms
+        self.last_bytes = nbytes
+        self.last_ms = latency_ms
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'last_bytes': self.last_bytes,
+            'last_ms': round(self.last_ms, 1),
+            'avg_bytes': int(self.total_bytes / self.count) if self.count else 0,
+            'avg_ms': round(self.total_ms / self.count, 1) if self.count else 0.0,
+            'total_bytes': self.total_bytes
+        }
+
+
+def region_probe(frame, region, scale=4):
+    """Verkleinerter Graustufen-Ausschnitt zum schnellen Vergleichen"""
+    x1, y1, x2, y2 = region
+    crop = frame[y1:y2, x1:x2]
+    if crop.size == 0:
+        raise ValueError(f"Region {region} liegt außerhalb des Frames")
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (max(1, gray.shape[1] // scale), max(1, gray.shape[0] // scale)),
+                       interpolation=cv2.INTER_AREA)
+    return small.astype(np.int16)
+
+
+def probe_diff(a, b):
+    """Mittlere absolute Differenz zweier Probes (0-255)"""
+    return float(np.mean(np.abs(a - b)))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dedup-Store: In-Memory Set mit Ablaufzeit pro Eintrag,
+persistiert als Append-Only-Log
+Version 3.2
+"""
+
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DedupStore:
+    """
+    key -> (Ablaufzeit, Wert). get(touch=True) verlängert den Eintrag um ttl
+    (gleitendes Fenster), aber nur im Speicher; verlängerte Einträge werden
+    beim nächsten add() bzw. beim Kompaktieren mitgeschrieben. Änderungen
+    werden als Zeile 'ablauf<TAB>key<TAB>wert' angehängt, beim Start wird
+    das Log eingelesen und gelegentlich kompaktiert.
+    """
+
+    def __init__(self, path, ttl, compact_min_lines=500):
+        self.path = path
+        self.ttl = ttl
+        self.compact_min_lines = compact_min_lines
+        self._entries = {}
+        self._touched = set()
+        self._log_lines = 0
+        self._lock = threading.Lock()
+        self._replay()
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        now = time.time()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.rstrip('\n')
+                    if not line:
+                        continue
+                    self._log_lines += 1
+                    parts = line.split('\t', 2)
+                    try:
+                        expires = float(parts[0])
+                        key = parts[1]
+                        value = parts[2] if len(parts) > 2 else ''
+                    except (ValueError, IndexError):
+                        # Altes Format: eine Stärke pro Zeile
+                        expires, key, value = now + self.ttl, line, ''
+                    if expires > now:
+                        self._entries[key] = (expires, value)
+                    else:
+                        self._entries.pop(key, None)
+        except Exception as e:
+            logger.error(f"Fehler beim Einlesen von {self.path}: {e}")
+        self._compact_if_needed()
+
+    def _append(self, key, expires, value):
+        # Im Speicher verlängerte Einträge in derselben Schreiboperation sichern
+        keys = [k for k in self._touched if k != key and k in self._entries]
+        lines = [f"{self._entries[k][0]:.0f}\t{k}\t{self._entries[k][1]}\n" for k in keys]
+        lines.append(f"{expires:.0f}\t{key}\t{value}\n")
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(lines))
+            self._log_lines += len(lines)
+            self._touched.clear()
+        except Exception as e:
+            logger.error(f"Fehler beim Schreiben in {self.path}: {e}")
+        self._compact_if_needed()
+
+    def _compact_if_needed(self):
+        if self._log_lines >= max(self.compact_min_lines, 2 * len(self._entries)):
+            self._compact()
+
+    def _compact(self):
+        """Schreibt nur noch gültige Einträge (Temp-Datei + atomares Umbenennen)"""
+        now = time.time()
+        live = {k: v for k, v in self._entries.items() if v[0] > now}
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for key, (expires, value) in live.items():
+                    f.write(f"{expires:.0f}\t{key}\t{value}\n")
+            os.replace(tmp, self.path)
+            self._entries = live
+            self._log_lines = len(live)
+            self._touched.clear()
+        except Exception as e:
+            logger.error(f"Fehler beim Kompaktieren von {self.path}: {e}")
+
+    def get(self, key, touch=True):
+        """Wert zu key oder None (abgelaufen = unbekannt); touch verlängert nur im Speicher"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            now = time.time()
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            if touch:
+                self._entries[key] = (now + self.ttl, entry[1])
+                self._touched.add(key)
+            return entry[1]
+
+    def __contains__(self, key):
+        """Reiner Lookup ohne Verlängerung"""
+        return self.get(key, touch=False) is not None
+
+    def add(self, key, value=''):
+        with self._lock:
+            expires = time.time() + self.ttl
+            self._entries[key] = (expires, value)
+            self._append(key, expires, value)
+
+    def keys(self):
+        now = time.time()
+        with self._lock:
+            return [k for k, v in self._entries.items() if v[0] > now]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._compact()
+
+    def __len__(self):
+        return len(self.keys())
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fake-Gerät für Offline-Tests: spielt eine aufgezeichnete Session ab
+(Screenshots + Zustandsgraph) und spricht das ADB-Protokoll auf einem
+lokalen Port. Dazu der Recorder, der solche Sessions aufzeichnet.
+Version 3.2
+
+Session-Verzeichnis:
+    session.json
+    <state>.png        (ein Screenshot pro Zustand)
+
+session.json:
+    {
+      "start": "s1",
+      "size": [1080, 1920],
+      "latency": {"screencap_ms": 120, "tap_ms": 40, "shell_ms": 20, "jitter_ms": 15},
+      "states": {
+        "s1": {"frame": "s1.png",
+               "taps": [{"region": [x1, y1, x2, y2], "next": ["s2", "s3"]}],
+               "default": "s1"}
+      }
+    }
+
+Ein Tap in region wechselt in den nächsten Zustand aus next (reihum, damit
+Wiederholungen reproduzierbar unterschiedlich ausgehen); Taps außerhalb
+aller Regionen wechseln nach default (ohne default: Zustand bleibt).
+"""
+
+import os
+import json
+import time
+import shlex
+import random
+import socket
+import struct
+import threading
+import itertools
+import logging
+
+import cv2
+
+from .adb_client import A_CNXN, A_OPEN, A_OKAY, A_CLSE, A_WRTE, A_VERSION, MAX_PAYLOAD
+from .phash import dhash
+
+logger = logging.getLogger(__name__)
+
+SESSION_FILE = 'session.json'
+
+
+class Session:
+    """Aufgezeichnete Session: Zustände, Frames und Übergänge"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, SESSION_FILE), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.start = data['start']
+        self.states = data['states']
+        self.latency = data.get('latency', {})
+        self._frames = {}
+        self._encoded = {}
+        self._cycles = {}
+
+    def frame(self, state):
+        """BGR-Frame eines Zustands (einmal geladen)"""
+        frame = self._frames.get(state)
+        if frame is None:
+            frame = cv2.imread(os.path.join(self.path, self.states[state]['frame']))
+            if frame is None:
+                raise ValueError(f"Frame für Zustand {state} fehlt")
+            self._frames[state] = frame
+        return frame
+
+    def encoded(self, state, mode):
+        """screencap-Ausgabe eines Zustands: PNG oder Raw (Header + RGBA)"""
+        key = (state, mode)
+        data = self._encoded.get(key)
+        if data is None:
+            frame = self.frame(state)
+            if mode == 'raw':
+                h, w = frame.shape[:2]
+                rgba = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA)
+                data = struct.pack('<IIII', w, h, 1, 0) + rgba.tobytes()
+            else:
+                data = cv2.imencode('.png', frame)[1].tobytes()
+            self._encoded[key] = data
+        return data
+
+    def next_state(self, state, x, y):
+        """Folgezustand nach einem Tap auf (x, y)"""
+        info = self.states[state]
+        for i, tap in enumerate(info.get('taps', [])):
+            x1, y1, x2, y2 = tap['region']
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                cycle = self._cycles.get((state, i))
+                if cycle is None:
+                    cycle = self._cycles[(state, i)] = itertools.cycle(tap['next'])
+                return next(cycle)
+        return info.get('default', state)
+
+
+class FakeDevice:
+    """Zustandsautomat mit simulierter Latenz; versteht die Shell-Kommandos des Bots"""
+
+    def __init__(self, session, latency=None, seed=0):
+        self.session = session
+        self.latency = dict(session.latency)
+        self.latency.update(latency or {})
+        self.state = session.start
+        self.files = {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'screencaps': 0, 'taps': 0, 'transitions': 0, 'commands': 0}
+
+    def _delay(self, kind):
+        ms = self.latency.get(f'{kind}_ms', 0)
+        jitter = self.latency.get('jitter_ms', 0)
+        with self.lock:
+            ms += self.random.uniform(-jitter, jitter) if jitter else 0
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def screencap(self, mode='png'):
+        self._delay('screencap')
+        with self.lock:
+            self.stats['screencaps'] += 1
+            return self.session.encoded(self.state, mode)
+
+    def tap(self, x, y):
+        self._delay('tap')
+        with self.lock:
+            self.stats['taps'] += 1
+            new_state = self.session.next_state(self.state, x, y)
+            if new_state != self.state:
+                self.stats['transitions'] += 1
+                self.state = new_state
+
+    def execute(self, command):
+        """Führt ein shell-/exec-Kommando aus und liefert die Ausgabe (bytes)"""
+        args = shlex.split(command)
+        with self.lock:
+            self.stats['commands'] += 1
+        if not args:
+            return b''
+        if '|' in args:
+            return self._pipe(args)
+        if args[0] == 'screencap':
+            mode = 'png' if '-p' in args else 'raw'
+            target = [a for a in args[1:] if a != '-p']
+            data = self.screencap(mode)
+            if target:
+                self.files[target[0]] = data
+                return b''
+            return data
+        if args[:2] == ['input', 'tap']:
+            self.tap(int(float(args[2])), int(float(args[3])))
+            return b''
+        if args[0] == 'cat':
+            self._delay('shell')
+            return self.files.get(args[1], b'')
+        if args[:2] == ['wm', 'size']:
+            h, w = self.session.frame(self.state).shape[:2]
+            return f"Physical size: {w}x{h}\n".encode()
+        if args[0] == 'echo':
+            return (' '.join(args[1:]) + '\n').encode()
+        self._delay('shell')
+        return b''
+
+    def _pipe(self, args):
+        """Pipes mit head -c, tail -c +N und wc -c (Zuschnitt von Raw-Screenshots)"""
+        segments = [[]]
+        for arg in args:
+            if arg == '|':
+                segments.append([])
+            else:
+                segments[-1].append(arg)
+        data = self.execute(shlex.join(segments[0]))
+        for segment in segments[1:]:
+            if segment[:2] == ['head', '-c']:
+                data = data[:int(segment[2])]
+            elif segment[:2] == ['tail', '-c'] and segment[2].startswith('+'):
+                data = data[int(segment[2][1:]) - 1:]
+            elif segment[:2] == ['wc', '-c']:
+                data = f"{len(data)}\n".encode()
+            else:
+                raise ValueError(f"Pipe-Kommando nicht unterstützt: {' '.join(segment)}")
+        return data
+
+    def to_dict(self):
+        with self.lock:
+            return dict(self.stats, state=self.state)
+
+
+class FakeAdbServer:
+    """
+    Minimaler adbd auf einem lokalen TCP-Port: CNXN ohne AUTH, danach
+    shell:/exec:-Streams. Jeder Stream läuft in einem eigenen Thread, damit
+    die Latenz wie bei einem echten Gerät parallel anfällt.
+    """
+
+    def __init__(self, device, port=0, host='127.0.0.1'):
+        self.device = device
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(16)
+        self.host, self.port = self.sock.getsockname()
+        self.running = False
+        self._ids = itertools.count(1)
+
+    @property
+    def serial(self):
+        return f'{self.host}:{self.port}'
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self._accept_loop, name='fake-adbd', daemon=True).start()
+        logger.info(f"Fake-Gerät lauscht auf {self.serial}")
+
+    def stop(self):
+        self.running = False
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _recv_exact(conn, n):
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = conn.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("Client getrennt")
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def _serve(self, conn):
+        send_lock = threading.Lock()
+
+        def send(command, arg0, arg1, data=b''):
+            header = struct.pack('<6I', command, arg0, arg1, len(data),
+                                 sum(data) & 0xffffffff, command ^ 0xffffffff)
+            with send_lock:
+                conn.sendall(header + data)
+
+        try:
+            while self.running:
+                command, arg0, arg1, length, _crc, _magic = struct.unpack('<6I', self._recv_exact(conn, 24))
+                data = self._recv_exact(conn, length) if length else b''
+                if command == A_CNXN:
+                    send(A_CNXN, A_VERSION, MAX_PAYLOAD, b'device::ro.product.name=fake;\0')
+                elif command == A_OPEN:
+                    local_id = next(self._ids)
+                    send(A_OKAY, local_id, arg0)
+                    threading.Thread(target=self._run_service, daemon=True,
+                                     args=(send, local_id, arg0, data.rstrip(b'\0').decode())).start()
+                # OKAY/CLSE/WRTE vom Client brauchen keine Antwort
+        except (OSError, ConnectionError, struct.error):
+            pass
+        finally:
+            conn.close()
+
+    def _run_service(self, send, local_id, remote_id, service):
+        try:
+            _kind, _, command = service.partition(':')
+            output = self.device.execute(command)
+            for offset in range(0, len(output), MAX_PAYLOAD):
+                send(A_WRTE, local_id, remote_id, output[offset:offset + MAX_PAYLOAD])
+            send(A_CLSE, local_id, remote_id)
+        except OSError:
+            pass
+        except Exception as e:
+            logger.error(f"Fake-Gerät: Fehler bei '{service}': {e}")
+            try:
+                send(A_CLSE, local_id, remote_id)
+            except OSError:
+                pass
+
+
+class SessionRecorder:
+    """
+    Zeichnet Screenshots und Taps eines laufenden Bots als Session auf.
+    Frames mit fast gleichem dHash gelten als derselbe Zustand; ein Tap
+    zwischen zwei Screenshots wird zum Übergang vom ersten in den zweiten.
+    """
+
+    def __init__(self, path, max_distance=4, tap_radius=30, max_states=500):
+        self.path = path
+        self.max_distance = max_distance
+        self.tap_radius = tap_radius
+        self.max_states = max_states
+        self.states = {}
+        self.hashes = []
+        self.size = None
+        self.start = None
+        self.current = None
+        self.pending_tap = None
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _state_for(self, frame):
+        h = dhash(frame)
+        best, best_dist = None, None
+        for state, sh in self.hashes:
+            dist = bin(sh ^ h).count('1')
+            if best_dist is None or dist < best_dist:
+                best, best_dist = state, dist
+        if best is not None and (best_dist <= self.max_distance or len(self.states) >= self.max_states):
+            return best
+
+        state = f's{len(self.states) + 1}'
+        cv2.imwrite(os.path.join(self.path, f'{state}.png'), frame)
+        self.states[state] = {'frame': f'{state}.png', 'taps': []}
+        self.hashes.append((state, h))
+        return state
+
+    def frame(self, frame):
+        """Neuer Screenshot: Zustand bestimmen, ausstehenden Tap als Übergang eintragen"""
+        with self.lock:
+            if self.size is None:
+                self.size = [int(frame.shape[1]), int(frame.shape[0])]
+            state = self._state_for(frame)
+            if self.current is not None and self.pending_tap is not None:
+                self._add_transition(self.current, self.pending_tap, state)
+                self.save()
+            elif self.current is None:
+                self.start = state
+            self.pending_tap = None
+            self.current = state
+
+    def tap(self, x, y):
+        with self.lock:
+            self.pending_tap = (int(x), int(y))
+
+    def _add_transition(self, state, point, next_state):
+        x, y = point
+        r = self.tap_radius
+        for tap in self.states[state]['taps']:
+            x1, y1, x2, y2 = tap['region']
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                if next_state not in tap['next']:
+                    tap['next'].append(next_state)
+                return
+        self.states[state]['taps'].append({'region': [x - r, y - r, x + r, y + r], 'next': [next_state]})
+
+    def save(self):
+        """session.json atomar schreiben"""
+        data = {
+            'start': self.start,
+            'size': self.size,
+            'states': self.states
+        }
+        tmp = os.path.join(self.path, SESSION_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, SESSION_FILE))
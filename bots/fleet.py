@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bot-Flotte: mehrere LKW-Bots (ein Gerät je Bot) in einem Prozess
+Version 3.2
+"""
+
+import os
+import json
+import logging
+import threading
+
+from .lkw_bot import LKWBotController
+from utils.config import load_ssh_config, save_ssh_config
+
+logger = logging.getLogger(__name__)
+
+DEVICES_FILE = 'devices.json'
+SSH_CONFIG_FILE = 'ssh_config.json'
+DEFAULT_DEVICE = 'default'
+
+
+class BotFleet:
+    """
+    Lädt die Geräte aus devices.json und hält einen LKWBotController pro Gerät.
+    Ohne devices.json wird wie bisher ein einzelnes Gerät aus ssh_config.json
+    verwendet. Templates und OCR-Engine sind prozessweit geteilt.
+
+    devices.json:
+        {"devices": [{"id": "emu1", "ssh_command": "...", "ssh_password": "...",
+                      "local_adb_port": 7125, "workdir": "devices/emu1"}, ...]}
+    """
+
+    def __init__(self, devices_file=DEVICES_FILE, ssh_config_file=SSH_CONFIG_FILE):
+        self.devices_file = devices_file
+        self.ssh_config_file = ssh_config_file
+        self.lock = threading.Lock()
+        self.bots = {}
+        self.single_device = False
+        self.load()
+
+    def _load_device_configs(self):
+        if os.path.exists(self.devices_file):
+            try:
+                with open(self.devices_file, 'r') as f:
+                    devices = json.load(f).get('devices', [])
+                if devices:
+                    return devices
+            except Exception as e:
+                logger.error(f"Fehler beim Laden von {self.devices_file}: {e}")
+        return None
+
+    def load(self):
+        """Erstellt die Bots laut Konfiguration"""
+        devices = self._load_device_configs()
+        bots = {}
+        if devices is None:
+            self.single_device = True
+            bots[DEFAULT_DEVICE] = LKWBotController(load_ssh_config(self.ssh_config_file))
+        else:
+            self.single_device = False
+            for config in devices:
+                device_id = str(config.get('id') or f"device{len(bots) + 1}")
+                if device_id in bots:
+                    logger.error(f"Doppelte Geräte-ID {device_id} in {self.devices_file} - übersprungen")
+                    continue
+                config.setdefault('workdir', os.path.join('devices', device_id))
+                bots[device_id] = LKWBotController(config, device_id=device_id)
+        with self.lock:
+            self.bots = bots
+        logger.info(f"Bot-Flotte: {len(bots)} Gerät(e): {', '.join(bots)}")
+
+    def ids(self):
+        return list(self.bots)
+
+    def get(self, device_id=None):
+        """Bot zu device_id (ohne ID: erstes Gerät) oder None"""
+        if not device_id:
+            return next(iter(self.bots.values()), None)
+        return self.bots.get(device_id)
+
+    def all(self):
+        return list(self.bots.values())
+
+    def status(self):
+        """Status aller Geräte plus Summen"""
+        devices = {device_id: bot.status_dict() for device_id, bot in self.bots.items()}
+        return {
+            'devices': devices,
+            'total': {
+                'devices': len(devices),
+                'running': sum(1 for d in devices.values() if d['running']),
+                'adb_connected': sum(1 for d in devices.values() if d['adb_connected']),
+                'trucks_processed': sum(d['trucks_processed'] for d in devices.values()),
+                'trucks_shared': sum(d['trucks_shared'] for d in devices.values()),
+                'trucks_skipped': sum(d['trucks_skipped'] for d in devices.values()),
+            }
+        }
+
+    def stop_all(self):
+        for bot in self.all():
+            if bot.running:
+                bot.stop()
+
+    def load_device_config(self, device_id=None):
+        """SSH-Konfiguration eines Geräts"""
+        bot = self.get(device_id)
+        if self.single_device or bot is None:
+            return load_ssh_config(self.ssh_config_file)
+        return dict(bot.ssh_config)
+
+    def save_device_config(self, device_id, config):
+        """Speichert die SSH-Konfiguration eines Geräts und übernimmt sie in den Bot"""
+        bot = self.get(device_id)
+        if bot is None:
+            return False
+        if self.single_device:
+            if not save_ssh_config(config, self.ssh_config_file):
+                return False
+        else:
+            try:
+                with open(self.devices_file, 'r') as f:
+                    data = json.load(f)
+                for entry in data.get('devices', []):
+                    if str(entry.get('id')) == bot.device_id:
+                        entry.update(config)
+                        config = entry
+                tmp = self.devices_file + '.tmp'
+                with open(tmp, 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp, self.devices_file)
+            except Exception as e:
+                logger.error(f"Fehler beim Speichern von {self.devices_file}: {e}")
+                return False
+        bot.ssh_config = config
+        return True
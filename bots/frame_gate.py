@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Frame-Gate: erkennt unveränderte bzw. teilweise geänderte Frames,
+damit das Template Matching nicht unnötig wiederholt wird
+Version 3.2
+"""
+
+import logging
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+UNCHANGED = 'unchanged'
+PARTIAL = 'partial'
+CHANGED = 'changed'
+
+
+class GateStats:
+    """Wie oft das Matching übersprungen, eingeschränkt oder voll ausgeführt wurde"""
+
+    def __init__(self):
+        self.frames = 0
+        self.skipped = 0
+        self.partial = 0
+        self.full = 0
+
+    def record(self, outcome):
+        self.frames += 1
+        if outcome == UNCHANGED:
+            self.skipped += 1
+        elif outcome == PARTIAL:
+            self.partial += 1
+        else:
+            self.full += 1
+
+    def to_dict(self):
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'partial': self.partial,
+            'full': self.full,
+            'skip_ratio': round(self.skipped / self.frames, 3) if self.frames else 0.0
+        }
+
+
+class FrameGate:
+    """
+    Vergleicht jeden Frame kachelweise mit dem vorherigen (verkleinertes
+    Graustufenbild, mittlere Differenz pro Kachel). Ergebnis: unverändert,
+    teilweise geändert (mit den geänderten Bereichen) oder geändert.
+    """
+
+    def __init__(self, scale=4, tile=16, threshold=3.0, max_changed=0.5):
+        self.scale = scale
+        self.tile = tile  # Kachelgröße im verkleinerten Bild
+        self.threshold = threshold
+        self.max_changed = max_changed  # Anteil geänderter Kacheln, ab dem voll gematcht wird
+        self.previous = None
+        self.stats = GateStats()
+
+    def _signature(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, (max(1, gray.shape[1] // self.scale), max(1, gray.shape[0] // self.scale)),
+                           interpolation=cv2.INTER_AREA)
+        return small.astype(np.int16)
+
+    def _tile_diff(self, a, b):
+        """Mittlere absolute Differenz pro Kachel"""
+        t = self.tile
+        diff = np.abs(a - b).astype(np.float32)
+        h, w = diff.shape
+        diff = np.pad(diff, ((0, -h % t), (0, -w % t)), mode='edge')
+        rows, cols = diff.shape[0] // t, diff.shape[1] // t
+        return diff.reshape(rows, t, cols, t).mean(axis=(1, 3))
+
+    def check(self, frame):
+        """
+        (Ergebnis, Bereiche): Bereiche sind bei PARTIAL die Rechtecke
+        (x1, y1, x2, y2) der zusammenhängenden geänderten Kacheln in voller
+        Auflösung, sonst leer.
+        """
+        signature = self._signature(frame)
+        previous, self.previous = self.previous, signature
+        if previous is None or previous.shape != signature.shape:
+            return CHANGED, []
+
+        changed = self._tile_diff(signature, previous) >= self.threshold
+        count = int(changed.sum())
+        if count == 0:
+            return UNCHANGED, []
+        if count > changed.size * self.max_changed:
+            return CHANGED, []
+
+        n, _, boxes, _ = cv2.connectedComponentsWithStats(changed.astype(np.uint8), connectivity=8)
+        step = self.tile * self.scale
+        fh, fw = frame.shape[:2]
+        regions = []
+        for x, y, w, h, _area in boxes[1:n]:
+            regions.append((int(x * step), int(y * step),
+                            int(min(fw, (x + w) * step)), int(min(fh, (y + h) * step))))
+        return PARTIAL, regions
+
+    def reset(self):
+        """Nächster Frame wird wieder voll ausgewertet (z.B. nach Template-Wechsel)"""
+        self.previous = None
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Glyph-Erkennung für Ziffern in festen Boxen (Stärke, Server)
+Version 3.2
+"""
+
+import os
+import threading
+import logging
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GLYPH_FILE = 'glyphs.npz'
+GLYPH_SIZE = (12, 18)  # (Breite, Höhe) nach Normalisierung
+MIN_GLYPH_WIDTH = 2
+
+
+def binarize(crop):
+    """Graustufen + Otsu, Schrift immer weiß (1) auf schwarz (0)"""
+    gray = crop if crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Schrift ist die Minderheit der Pixel
+    if binary.mean() > 0.5:
+        binary = 1 - binary
+    return binary
+
+
+def segment(crop):
+    """Zerlegt den Ausschnitt per Spaltenprojektion in einzelne Zeichen"""
+    binary = binarize(crop)
+    columns = binary.sum(axis=0) > 0
+    # Start/Ende zusammenhängender Spalten mit Tinte
+    edges = np.diff(np.concatenate(([0], columns.astype(np.int8), [0])))
+    starts = np.nonzero(edges == 1)[0]
+    ends = np.nonzero(edges == -1)[0]
+
+    glyphs = []
+    for x0, x1 in zip(starts, ends):
+        if x1 - x0 < MIN_GLYPH_WIDTH:
+            continue
+        part = binary[:, x0:x1]
+        rows = np.nonzero(part.sum(axis=1))[0]
+        glyphs.append(part[rows[0]:rows[-1] + 1])
+    return glyphs
+
+
+def normalize(glyph):
+    """Skaliert ein Zeichen auf GLYPH_SIZE, mittelwertfrei, Norm 1"""
+    resized = cv2.resize(glyph.astype(np.float32), GLYPH_SIZE, interpolation=cv2.INTER_AREA)
+    vec = resized.ravel()
+    vec = vec - vec.mean()
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+class GlyphBank:
+    """Gespeicherte Zeichen-Vorlagen (Ziffern, '.', 'M')"""
+
+    def __init__(self, labels, vectors):
+        self.labels = np.asarray(labels)
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data['labels'], data['vectors'])
+
+    def save(self, path):
+        np.savez_compressed(path, labels=self.labels, vectors=self.vectors)
+
+    def recognize(self, crop):
+        """Gibt (text, confidence) zurück; confidence = schlechtester Zeichen-Score"""
+        glyphs = segment(crop)
+        if not glyphs or len(self.labels) == 0:
+            return "", 0.0
+        vecs = np.stack([normalize(g) for g in glyphs])
+        scores = vecs @ self.vectors.T  # Korrelation gegen alle Vorlagen
+        best = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(glyphs)), best]
+        return ''.join(self.labels[best]), float(confidences.min())
+
+
+class GlyphRecognizer:
+    """Lädt die Glyph-Bank einmal und bei geänderter mtime neu"""
+
+    def __init__(self, path=GLYPH_FILE):
+        self.path = path
+        self._bank = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def bank(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            if self._bank is None or mtime != self._mtime:
+                try:
+                    self._bank = GlyphBank.load(self.path)
+                    self._mtime = mtime
+                    logger.info(f"Glyph-Bank {self.path} geladen ({len(self._bank.labels)} Vorlagen)")
+                except Exception as e:
+                    logger.error(f"Glyph-Bank {self.path} konnte nicht geladen werden: {e}")
+                    self._bank = None
+            return self._bank
+
+    def recognize(self, crop):
+        """(text, confidence) oder ("", 0.0) ohne Glyph-Bank"""
+        bank = self.bank()
+        if bank is None:
+            return "", 0.0
+        return bank.recognize(crop)
+
+
+# Prozessweiter Recognizer, von allen Bots geteilt
+glyph_recognizer = GlyphRecognizer()
@@ -6,17 +6,26 @@ Version 3.2
 """
 
 import time
+import queue
 import threading
 import logging
 import cv2
-import numpy as np
 from PIL import Image
-import pytesseract
-import os
 import re
-import subprocess
 
 from .bot_base import BotBase
+from .capture import region_probe, probe_diff
+from .template_cache import get_template
+from .matching import match_full, match_pyramid, match_regions
+from .frame_gate import FrameGate, UNCHANGED, PARTIAL, CHANGED
+from .ocr import get_ocr_service
+from .glyphs import glyph_recognizer
+from .phash import dhash, HashIndex
+from .dedup import DedupStore
+from .pipeline import Pipeline
+from .analysis_pool import get_analysis_pool
+from .status_stream import StatusChannel, PublishedField
+from .truck_events import TruckEventStore, EVENTS_FILE
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +33,13 @@ logger = logging.getLogger(__name__)
 class LKWBotController(BotBase):
     """LKW-Bot mit verbessertem Screenshot-Handling"""
     
+    status = PublishedField()
+    last_action = PublishedField()
+    current_user = PublishedField()
+    trucks_processed = PublishedField()
+    trucks_shared = PublishedField()
+    trucks_skipped = PublishedField()
+    
     # Koordinaten
     COORDS_NEW = {
         'esc': (680, 70),
@@ -39,17 +55,53 @@ class LKWBotController(BotBase):
         'share_confirm2': (400, 750),
     }
     
+    # Regionen (x1, y1, x2, y2), die sich nach dem jeweiligen Klick ändern müssen.
+    # None = feste Pause wie bisher
+    TRANSITIONS_NEW = {
+        'truck': (100, 850, 620, 1050),          # Info-Panel erscheint
+        'esc': (100, 850, 620, 1050),            # Info-Panel verschwindet
+        'share': (100, 350, 620, 800),           # Share-Dialog erscheint
+        'share_confirm1': (150, 650, 650, 850),  # Bestätigungs-Dialog erscheint
+        'share_confirm2': (150, 650, 650, 850),  # Bestätigungs-Dialog schließt
+    }
+    
+    TRANSITIONS_ALLIANCE = {
+        'truck': (100, 850, 620, 1050),
+        'esc': (100, 850, 620, 1050),
+        'share': (100, 350, 620, 800),
+        'share_confirm1': (150, 650, 650, 850),
+        'share_confirm2': (150, 650, 650, 850),
+    }
+    
     # OCR Boxen
     STAERKE_BOX = (200, 950, 300, 1000)
     SERVER_BOX = (168, 881, 220, 915)
     
+    # Ausschnitt des Info-Panels für den Perceptual Hash (Server + Stärke)
+    INFO_HASH_BOX = (160, 870, 320, 1005)
+    
+    # Glyph-Erkennung: darunter Fallback auf Tesseract
+    GLYPH_MIN_CONFIDENCE = 0.80
+    
+    # Template Matching
+    MATCH_THRESHOLD = 0.40
+    MAX_CANDIDATES = 10
+    
     # Dateien
     TEMPLATE_FILE = 'rentier_template.png'
     STAERKEN_FILE = 'lkw_staerken.txt'
+    HASHES_FILE = 'lkw_hashes.txt'
     STATS_FILE = 'truck_stats.json'
     
-    def __init__(self, ssh_config):
-        super().__init__("LKW-Bot", ssh_config)
+    # Pipeline: Sekunden ohne brauchbaren Karten-Frame, bis der Executor neu anfordert
+    PIPELINE_FRAME_TIMEOUT = 30.0
+    
+    # Stufen, deren letzte Dauer jedem Truck-Ereignis mitgegeben wird
+    EVENT_STAGES = ('capture', 'match', 'ocr', 'decide')
+    
+    def __init__(self, ssh_config, device_id=None):
+        super().__init__(f"LKW-Bot[{device_id}]" if device_id else "LKW-Bot", ssh_config)
+        self.device_id = device_id or 'default'
         
         self.thread = None
         self.status = "Gestoppt"
@@ -62,7 +114,6 @@ class LKWBotController(BotBase):
         self.strength_limit = 60.0
         self.use_server_filter = False
         self.server_number = "49"
-        self.reset_interval = 15
         self.share_mode = "world"
         
         # Statistiken
@@ -73,127 +124,145 @@ class LKWBotController(BotBase):
         self.last_success_time = time.time()
         self.maintenance_mode = False
         self.no_truck_threshold = 300
+        # ESC ohne LKW ändert die Karte kaum (kein Übergang messbar): kurze Pause statt 2 s + 1 s
+        self.no_truck_delay = float(ssh_config.get('no_truck_delay', 0.5))
+        
+        # Template Matching: 'full' oder 'pyramid' (grob-fein)
+        self.match_mode = ssh_config.get('match_mode', 'full')
+        self.pyramid_scale = float(ssh_config.get('pyramid_scale', 0.5))
+        self.pyramid_refine_window = int(ssh_config.get('pyramid_refine_window', 8))
+        
+        # Geteilte Stärken: gleitende Ablaufzeit = reset_interval
+        self.staerken = DedupStore(self.work_path(self.STAERKEN_FILE), ttl=15 * 60)
+        
+        # Bereits geteilte LKWs per Perceptual Hash (vor jeder OCR)
+        self.hash_index = HashIndex(self.work_path(self.HASHES_FILE), ttl=15 * 60)
+        self.reset_interval = 15
+        
+        # OCR (prozessweit geteilt, cached pro Frame)
+        self.ocr = get_ocr_service()
+        self._info_image = (None, None)
+        
+        # Analyse in Worker-Prozessen (0 = im Bot-Thread)
+        self.analysis_pool = get_analysis_pool(int(ssh_config.get('analysis_workers', 0)))
+        
+        # Matching nur bei geänderten Frames bzw. nur in geänderten Bereichen
+        self.frame_gate = None
+        if ssh_config.get('frame_gate', True):
+            self.frame_gate = FrameGate(threshold=float(ssh_config.get('gate_threshold', 3.0)))
+        self._last_matches = None
+        self._last_template = None
+        
+        # Pipeline-Modus: Capture/Erkennung/OCR in eigenen Stufen
+        self.pipeline_mode = bool(ssh_config.get('pipeline_mode', False))
+        self.pipeline = None
+        
+        # Jede Entscheidung als Ereignis (Log + Stunden-/Tages-Rollups in STATS_FILE)
+        self.truck_events = TruckEventStore(self.work_path(EVENTS_FILE), self.work_path(self.STATS_FILE))
         
-        # Screenshot retry config
-        self.screenshot_retry_delay = 1  # Sekunden zwischen Retries
-        self.screenshot_max_wait = 20  # Maximale Wartezeit für Screenshot
+        # Versionierter Status für /api/status/stream
+        self.status_channel = StatusChannel()
+        self.publish_status()
     
     def make_screenshot_robust(self, filename='screen.png'):
-        """
-        Robustes Screenshot-Handling mit mehreren Strategien
-        """
-        max_attempts = 5
-        
-        for attempt in range(max_attempts):
-            try:
-                local_port = self.ssh_config.get('local_adb_port')
-                if not local_port:
-                    logger.error(f"{self.bot_name}: ADB-Port nicht konfiguriert")
-                    return False
-                
-                adb_device = f'localhost:{local_port}'
-                
-                # Strategie 1: Normaler Screenshot
-                logger.info(f"{self.bot_name}: Screenshot-Versuch {attempt + 1}/{max_attempts}")
-                
-                # Lösche alte Datei
-                if os.path.exists(filename):
-                    try:
-                        os.remove(filename)
-                    except:
-                        pass
-                
-                # Screenshot auf Device erstellen
-                screencap_cmd = ['adb', '-s', adb_device, 'shell', 'screencap', '-p', f'/sdcard/{filename}']
-                result_screencap = subprocess.run(
-                    screencap_cmd,
-                    timeout=self.screenshot_max_wait,
-                    capture_output=True
-                )
-                
-                if result_screencap.returncode != 0:
-                    logger.warning(f"{self.bot_name}: screencap failed: {result_screencap.stderr}")
-                    raise Exception("screencap fehlgeschlagen")
-                
-                # Kurz warten
-                time.sleep(0.5)
-                
-                # Screenshot pullen
-                pull_cmd = ['adb', '-s', adb_device, 'pull', f'/sdcard/{filename}', filename]
-                result_pull = subprocess.run(
-                    pull_cmd,
-                    timeout=self.screenshot_max_wait,
-                    capture_output=True
-                )
-                
-                if result_pull.returncode != 0:
-                    logger.warning(f"{self.bot_name}: pull failed: {result_pull.stderr}")
-                    raise Exception("pull fehlgeschlagen")
-                
-                # Prüfe ob Datei existiert und valide ist
-                if os.path.exists(filename):
-                    file_size = os.path.getsize(filename)
-                    if file_size > 1000:  # Mindestens 1KB
-                        self.consecutive_errors = 0
-                        logger.info(f"{self.bot_name}: Screenshot erfolgreich ({file_size} bytes)")
-                        return True
-                    else:
-                        logger.warning(f"{self.bot_name}: Screenshot zu klein ({file_size} bytes)")
-                        raise Exception("Screenshot zu klein")
-                else:
-                    raise Exception("Screenshot-Datei nicht erstellt")
-                    
-            except subprocess.TimeoutExpired:
-                logger.warning(f"{self.bot_name}: Screenshot timeout bei Versuch {attempt + 1}")
-                self.consecutive_errors += 1
-                
-                # Bei 3 Fehlern: SSH reconnect
-                if self.consecutive_errors >= 3 and attempt < max_attempts - 1:
-                    logger.error(f"{self.bot_name}: 3 Fehler - SSH-Reconnect")
-                    self.close_ssh_tunnel()
-                    time.sleep(3)
-                    if self.setup_ssh_tunnel():
-                        self.consecutive_errors = 0
-                    time.sleep(self.screenshot_retry_delay)
-                    continue
-                    
-            except Exception as e:
-                logger.error(f"{self.bot_name}: Screenshot-Fehler (Versuch {attempt + 1}): {e}")
-                self.consecutive_errors += 1
-                
-                # Bei 3 Fehlern: SSH reconnect
-                if self.consecutive_errors >= 3 and attempt < max_attempts - 1:
-                    logger.error(f"{self.bot_name}: 3 Fehler - SSH-Reconnect")
-                    self.close_ssh_tunnel()
-                    time.sleep(3)
-                    if self.setup_ssh_tunnel():
-                        self.consecutive_errors = 0
-                    time.sleep(self.screenshot_retry_delay)
-                    continue
-            
-            # Warte vor nächstem Versuch
-            if attempt < max_attempts - 1:
-                time.sleep(self.screenshot_retry_delay)
-        
-        # Kompletter Reset bei zu vielen Fehlern
-        if self.consecutive_errors >= self.max_consecutive_errors:
-            logger.error(f"{self.bot_name}: {self.max_consecutive_errors} Fehler - KOMPLETTER RESET")
-            self.close_ssh_tunnel()
-            time.sleep(5)
-            self.setup_ssh_tunnel()
-            self.consecutive_errors = 0
+        """Screenshot mit der großzügigeren Policy 'screenshot_robust'"""
+        if not self.make_screenshot(filename, operation='screenshot_robust'):
+            return False
+        if self.capture_mode != 'file':
+            stats = self.capture_stats
+            logger.debug(f"{self.bot_name}: Screenshot erfolgreich "
+                         f"({stats.last_bytes} bytes, {stats.last_ms:.0f} ms)")
+        return True
+    
+    def tap_step(self, coords, transitions, step, reference=None, settle=False, wait=True, want_frame=True):
+        """Klickt einen Schritt und wartet auf dessen UI-Übergang (wait=False: nur der Tap)"""
+        x, y = coords[step]
+        if not wait:
+            self.click(x, y, delay=0, action=step)
+            return None
+        return self.click_and_wait(x, y, transitions.get(step), reference=reference, settle=settle, action=step,
+                                   want_frame=want_frame)
+    
+    def close_info_panel(self, wait=True):
+        """Schließt das Info-Panel per ESC; gibt (Referenz-Frame, Übergangs-Region) des ESC zurück"""
+        reference = self.get_frame('info.png')
+        self.tap_step(self.COORDS_NEW, self.TRANSITIONS_NEW, 'esc', reference=reference, wait=wait, want_frame=False)
+        return reference, self.TRANSITIONS_NEW.get('esc')
+    
+    def get_info_image(self):
+        """Info-Screenshot als PIL-Bild (aus dem Speicher, einmal pro Frame konvertiert)"""
+        frame_id = self.frame_ids.get('info.png')
+        if self._info_image[0] == frame_id and frame_id is not None:
+            return self._info_image[1]
+        frame = self.get_frame('info.png')
+        if frame is None:
+            return None
+        img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        self._info_image = (frame_id, img)
+        return img
+    
+    def ocr_box(self, box, config=''):
+        """OCR eines Ausschnitts des Info-Screenshots (gecacht pro Frame)"""
+        start = time.perf_counter()
+        try:
+            return self._ocr_box(box, config)
+        finally:
+            self.metrics.observe('ocr', time.perf_counter() - start)
+    
+    def _ocr_box(self, box, config):
+        if self.analysis_pool:
+            frame_id = self.frame_ids.get('info.png')
+            text = self.ocr.cached(frame_id, box, config)
+            if text is None:
+                frame = self.get_frame('info.png')
+                if frame is None:
+                    return ""
+                x1, y1, x2, y2 = box
+                text = self.analysis_pool.ocr(frame[y1:y2, x1:x2], config)
+                self.ocr.store(frame_id, box, config, text)
+            return text
         
-        logger.error(f"{self.bot_name}: Screenshot fehlgeschlagen nach {max_attempts} Versuchen")
-        return False
+        img = self.get_info_image()
+        if img is None:
+            return ""
+        return self.ocr.recognize(img, box, config, frame_id=self.frame_ids.get('info.png'))
+    
+    def glyph_box(self, box):
+        """Schnelle Glyph-Erkennung eines Ausschnitts, None bei zu geringer Sicherheit"""
+        frame = self.get_frame('info.png')
+        if frame is None:
+            return None
+        x1, y1, x2, y2 = box
+        text, confidence = glyph_recognizer.recognize(frame[y1:y2, x1:x2])
+        if text and confidence >= self.GLYPH_MIN_CONFIDENCE:
+            return text
+        return None
+    
+    def server_text(self):
+        """Server-Text aus SERVER_BOX (Glyphs, sonst Tesseract)"""
+        text = self.glyph_box(self.SERVER_BOX)
+        if text is not None:
+            return text
+        return self.ocr_box(self.SERVER_BOX)
+    
+    def info_hash(self):
+        """dHash des Info-Panels oder None"""
+        frame = self.get_frame('info.png')
+        if frame is None:
+            return None
+        x1, y1, x2, y2 = self.INFO_HASH_BOX
+        return dhash(frame[y1:y2, x1:x2])
     
     def ocr_staerke(self):
         """Liest Stärke aus"""
         try:
-            img = Image.open('info.png')
-            staerke_img = img.crop(self.STAERKE_BOX)
+            wert = self.glyph_box(self.STAERKE_BOX)
+            if wert and 'M' in wert:
+                return wert
+            
             configs = ['--psm 7', '--psm 8', '--psm 6']
             for config in configs:
-                wert = pytesseract.image_to_string(staerke_img, lang='eng', config=config).strip()
+                wert = self.ocr_box(self.STAERKE_BOX, config)
                 if wert and ('m' in wert.lower() or 'M' in wert):
                     return wert
             return ""
@@ -204,9 +273,7 @@ class LKWBotController(BotBase):
     def ocr_server(self):
         """Liest Server aus"""
         try:
-            img = Image.open('info.png')
-            server_img = img.crop(self.SERVER_BOX)
-            server_text = pytesseract.image_to_string(server_img, lang='eng').strip()
+            server_text = self.server_text()
             s_txt = re.sub(r'[^0-9]', '', server_text)
             return s_txt if s_txt else "Unknown"
         except Exception as e:
@@ -216,11 +283,9 @@ class LKWBotController(BotBase):
     def ist_server_passend(self):
         """Prüft ob Server passt"""
         try:
-            if not os.path.exists('info.png'):
+            if self.get_frame('info.png') is None:
                 return False
-            img = Image.open('info.png')
-            server_img = img.crop(self.SERVER_BOX)
-            server_text = pytesseract.image_to_string(server_img, lang='eng').strip()
+            server_text = self.server_text()
             
             cleaned_text = server_text.replace('O', '0').replace('o', '0')
             found_numbers = re.findall(r'\d+', cleaned_text)
@@ -231,19 +296,49 @@ class LKWBotController(BotBase):
             logger.error(f"{self.bot_name}: Server-Check-Fehler: {e}")
             return False
     
-    def rentier_lkw_finden(self):
-        """Findet LKW per Template Matching"""
+    def rentier_lkw_finden(self, screenshot=None):
+        """Findet LKWs per Template Matching, [(x, y, score), ...] bester zuerst"""
+        start = time.perf_counter()
         try:
-            screenshot = cv2.imread('screen.png')
-            template = cv2.imread(self.TEMPLATE_FILE)
+            if screenshot is None:
+                screenshot = self.get_frame('screen.png')
+            template = get_template(self.TEMPLATE_FILE)
             if screenshot is None or template is None:
                 return None
-            result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
-            locations = np.where(result >= 0.40)
-            matches = [(int(pt[0]), int(pt[1])) for pt in zip(*locations[::-1])]
+            
+            outcome, regions = self.frame_gate.check(screenshot) if self.frame_gate else (CHANGED, [])
+            if template is not self._last_template or self._last_matches is None:
+                outcome = CHANGED
+            
+            if outcome == UNCHANGED:
+                # Bildschirm unverändert: letztes Ergebnis weiterverwenden
+                matches = self._last_matches
+            elif outcome == PARTIAL:
+                matches = match_regions(screenshot, template, self.MATCH_THRESHOLD, self.MAX_CANDIDATES,
+                                        regions, self._last_matches)
+            elif self.analysis_pool:
+                matches = self.analysis_pool.match(screenshot, self.TEMPLATE_FILE, self.MATCH_THRESHOLD,
+                                                   self.MAX_CANDIDATES, mode=self.match_mode,
+                                                   scale=self.pyramid_scale,
+                                                   refine_window=self.pyramid_refine_window)
+            elif self.match_mode == 'pyramid':
+                matches = match_pyramid(screenshot, template, self.MATCH_THRESHOLD, self.MAX_CANDIDATES,
+                                        scale=self.pyramid_scale,
+                                        refine_window=self.pyramid_refine_window)
+            else:
+                matches = match_full(screenshot, template, self.MATCH_THRESHOLD, self.MAX_CANDIDATES)
+            
+            self._last_matches = list(matches or [])
+            self._last_template = template
+            if self.frame_gate:
+                self.frame_gate.stats.record(outcome)
+            self.metrics.observe('match', time.perf_counter() - start)
             return matches if matches else None
         except Exception as e:
             logger.error(f"{self.bot_name}: Template-Matching-Fehler: {e}")
+            self._last_matches = None
+            if self.frame_gate:
+                self.frame_gate.reset()
             return None
     
     def staerke_float_wert(self, staerke_text):
@@ -260,34 +355,214 @@ class LKWBotController(BotBase):
                 return None
         return None
     
-    def load_staerken(self):
-        """Lädt geteilte Stärken"""
-        if os.path.exists(self.STAERKEN_FILE):
-            try:
-                with open(self.STAERKEN_FILE, 'r', encoding="utf-8") as f:
-                    return f.read().splitlines()
-            except Exception as e:
-                logger.error(f"{self.bot_name}: Fehler beim Laden: {e}")
-                return []
-        return []
+    @property
+    def reset_interval(self):
+        """Minuten, nach denen eine geteilte Stärke wieder vergessen wird"""
+        return self._reset_interval
+    
+    @reset_interval.setter
+    def reset_interval(self, minutes):
+        self._reset_interval = minutes
+        self.staerken.ttl = minutes * 60
+        self.hash_index.store.ttl = minutes * 60
+    
+    def ist_geteilt(self, staerke):
+        """
+        O(1)-Lookup, ob die Stärke zuletzt innerhalb von reset_interval
+        gesehen wurde; ein Treffer verlängert das Fenster (nur im Speicher)
+        """
+        return self.staerken.get(staerke, touch=True) is not None
     
     def save_staerke(self, staerke):
         """Speichert Stärke"""
-        try:
-            with open(self.STAERKEN_FILE, "a", encoding="utf-8") as f:
-                f.write(staerke + "\n")
-        except Exception as e:
-            logger.error(f"{self.bot_name}: Save-Fehler: {e}")
+        self.staerken.add(staerke)
     
     def reset_staerken(self):
         """Resettet Stärken-Liste"""
         try:
-            with open(self.STAERKEN_FILE, "w", encoding="utf-8") as f:
-                f.write("")
+            self.staerken.clear()
+            self.hash_index.reset()
             logger.info(f"{self.bot_name}: Stärken zurückgesetzt")
         except Exception as e:
             logger.error(f"{self.bot_name}: Reset-Fehler: {e}")
     
+    def _check_pause(self):
+        """Pause/Wartung behandeln; True = diese Runde überspringen"""
+        if self.paused:
+            self.status = "Pausiert"
+            self.last_action = "Bot pausiert"
+            time.sleep(1)
+            return True
+        
+        if self.maintenance_mode:
+            self.status = "Wartungsmodus"
+            self.last_action = "Wartungsarbeiten aktiv"
+            time.sleep(10)
+            return True
+        return False
+    
+    def handle_no_truck(self, wait=True):
+        """Kein LKW auf der Karte: ESC (wait=False: ohne Pause danach)"""
+        self.last_action = "Kein LKW gefunden - ESC"
+        self.click(self.COORDS_NEW['esc'][0], self.COORDS_NEW['esc'][1],
+                   delay=self.no_truck_delay if wait else 0, action='esc')
+        self.metrics.outcome('no_truck')
+        self.trucks_processed += 1
+    
+    def open_truck(self, treffer):
+        """Klickt den besten Treffer an und legt den Info-Screenshot ab"""
+        lx, ly, score = treffer[0]
+        self.last_action = f"LKW gefunden bei ({lx}, {ly}), Score {score:.2f}"
+        logger.info(f"{self.bot_name}: Treffer bei: ({lx}, {ly}), Score {score:.2f} "
+                    f"({len(treffer)} Kandidaten)")
+        
+        lx += 5
+        ly += 5
+        
+        # Der Frame nach dem Übergang ist direkt der Info-Screenshot
+        info_frame = self.click_and_wait(lx, ly, self.TRANSITIONS_NEW['truck'],
+                                         reference=self.get_frame('screen.png'), settle=True, action='truck')
+        
+        self.last_action = "Hole LKW-Details..."
+        if info_frame is not None:
+            self.store_frame('info.png', info_frame)
+        elif not self.make_screenshot_robust('info.png'):
+            self.last_action = "Info-Screenshot fehlgeschlagen"
+            self.click(self.COORDS_NEW['esc'][0], self.COORDS_NEW['esc'][1], delay=self.tap_delay, action='esc')
+            return False
+        return True
+    
+    def decide_truck(self):
+        """
+        Entscheidet anhand des Info-Screenshots (ohne Klicks).
+        Gibt {'share': bool, 'reason': str, 'outcome': str, 'staerke': str, 'server': str,
+        'info_hash': int} zurück.
+        """
+        decision = {'share': False, 'reason': '', 'outcome': 'duplicate', 'staerke': '', 'server': None,
+                    'info_hash': None}
+        
+        # Schon geteilt? Nur ein exakter Hash-Treffer spart die OCR. Ein bloß
+        # ähnlicher Hash (z.B. 12.3M vs. 12.8M) wird per OCR bestätigt
+        # (ist_geteilt unten), sonst würden neue LKWs übersprungen.
+        info_hash = self.info_hash()
+        decision['info_hash'] = info_hash
+        bekannt, distance = self.hash_index.match(info_hash) if info_hash is not None else (None, None)
+        if bekannt is not None and distance == 0:
+            self.hash_index.touch(info_hash)
+            decision['reason'] = f"Stärke {bekannt} bereits geteilt (Hash) - Skip"
+            return decision
+        if bekannt is not None:
+            logger.debug(f"{self.bot_name}: Hash ähnlich zu {bekannt} (Distanz {distance}) - OCR prüft")
+        
+        # Server prüfen
+        if self.use_server_filter:
+            self.last_action = "Prüfe Server..."
+            passend = self.ist_server_passend()
+            # Server-OCR ist für diesen Frame schon gecacht
+            decision['server'] = self.ocr_server()
+            if not passend:
+                decision['reason'] = "Falscher Server - Skip"
+                decision['outcome'] = 'wrong_server'
+                return decision
+        
+        # Stärke prüfen
+        self.last_action = "Lese Stärke..."
+        staerke = self.ocr_staerke()
+        wert = self.staerke_float_wert(staerke)
+        decision['staerke'] = staerke
+        
+        if wert and self.use_limit and wert > self.strength_limit:
+            decision['reason'] = f"Stärke {wert}M > {self.strength_limit}M - Skip"
+            decision['outcome'] = 'over_limit'
+            return decision
+        
+        if wert is None:
+            decision['reason'] = "Stärke nicht erkannt - Skip"
+            decision['outcome'] = 'ocr_failure'
+            return decision
+        
+        if self.ist_geteilt(staerke):
+            decision['reason'] = f"Stärke {staerke} bereits geteilt - Skip"
+            # Nächstes Mal ohne OCR erkennen
+            if info_hash is not None:
+                self.hash_index.add(info_hash, staerke)
+            return decision
+        
+        decision['share'] = True
+        decision['outcome'] = 'shared'
+        if decision['server'] is None:
+            decision['server'] = self.ocr_server()
+        return decision
+    
+    def timed_decide_truck(self):
+        """decide_truck mit Latenz-Metrik"""
+        start = time.perf_counter()
+        try:
+            return self.decide_truck()
+        finally:
+            self.metrics.observe('decide', time.perf_counter() - start)
+    
+    def execute_decision(self, decision, wait=True):
+        """
+        Führt die Entscheidung aus: überspringen oder teilen. Mit wait=False
+        wird nach dem abschließenden ESC nicht auf den Übergang gewartet.
+        Gibt (Referenz-Frame, Übergangs-Region) dieses ESC zurück.
+        """
+        self.metrics.outcome(decision['outcome'])
+        self.record_truck_event(decision)
+        if not decision['share']:
+            self.last_action = decision['reason']
+            closed = self.close_info_panel(wait=wait)
+            self.trucks_skipped += 1
+            self.trucks_processed += 1
+            return closed
+        
+        # LKW teilen
+        staerke = decision['staerke']
+        self.save_staerke(staerke)
+        if decision['info_hash'] is not None:
+            self.hash_index.add(decision['info_hash'], staerke)
+        coords = self.COORDS_ALLIANCE if self.share_mode == "alliance" else self.COORDS_NEW
+        transitions = self.TRANSITIONS_ALLIANCE if self.share_mode == "alliance" else self.TRANSITIONS_NEW
+        mode_text = "Allianz" if self.share_mode == "alliance" else "Welt"
+        
+        self.last_action = f"Teile {staerke} im {mode_text}chat..."
+        logger.info(f"{self.bot_name}: Teile LKW {staerke} im {mode_text}chat")
+        
+        # Jeder Übergangs-Frame ist die Referenz für den nächsten Schritt
+        frame = self.get_frame('info.png')
+        for step in ('share', 'share_confirm1', 'share_confirm2'):
+            frame = self.tap_step(coords, transitions, step, reference=frame)
+        self.tap_step(coords, transitions, 'esc', reference=frame, wait=wait, want_frame=False)
+        
+        self.trucks_shared += 1
+        self.trucks_processed += 1
+        self.last_action = f"✓ LKW {staerke} geteilt! (Gesamt: {self.trucks_shared})"
+        self.last_success_time = time.time()
+        return frame, transitions.get('esc')
+    
+    def record_truck_event(self, decision):
+        """Entscheidung an den Event-Store geben (nicht blockierend)"""
+        staerke = decision['staerke']
+        last = self.metrics.last
+        self.truck_events.record({
+            'device': self.device_id,
+            'outcome': decision['outcome'],
+            'strength': staerke,
+            'strength_value': self.staerke_float_wert(staerke) if staerke else None,
+            'server': decision.get('server'),
+            'latency': {stage: round(last[stage] * 1000, 1) for stage in self.EVENT_STAGES if stage in last}
+        })
+    
+    def _handle_loop_error(self, e):
+        logger.error(f"{self.bot_name}: Fehler: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        self.last_action = f"Fehler: {str(e)[:50]}"
+        self.consecutive_errors += 1
+        # Backoff statt fester Pause, wächst mit Fehlern in Folge
+        time.sleep(self.device_guard.backoff('loop', self.consecutive_errors - 1))
+    
     def bot_loop(self):
         """Haupt-Loop"""
         logger.info(f"{self.bot_name}: Bot-Schleife gestartet")
@@ -300,21 +575,21 @@ class LKWBotController(BotBase):
         # Keepalive starten
         self.start_keepalive()
         
-        # Reset-Thread
-        reset_thread = threading.Thread(target=self._reset_timer, daemon=True)
-        reset_thread.start()
+        if self.pipeline_mode:
+            self._pipeline_loop()
+        else:
+            self._serial_loop()
         
+        self.close_ssh_tunnel()
+        self.stop_keepalive()
+        self.status = "Gestoppt"
+        self.last_action = "Bot gestoppt"
+        logger.info(f"{self.bot_name}: Beendet")
+    
+    def _serial_loop(self):
+        """Capture, Erkennung, OCR und Aktionen nacheinander"""
         while self.running:
-            if self.paused:
-                self.status = "Pausiert"
-                self.last_action = "Bot pausiert"
-                time.sleep(1)
-                continue
-            
-            if self.maintenance_mode:
-                self.status = "Wartungsmodus"
-                self.last_action = "Wartungsarbeiten aktiv"
-                time.sleep(10)
+            if self._check_pause():
                 continue
             
             try:
@@ -331,98 +606,175 @@ class LKWBotController(BotBase):
                 treffer = self.rentier_lkw_finden()
                 
                 if not treffer:
-                    self.last_action = "Kein LKW gefunden - ESC"
-                    self.click(self.COORDS_NEW['esc'][0], self.COORDS_NEW['esc'][1])
-                    self.trucks_processed += 1
-                    time.sleep(1)
+                    self.handle_no_truck()
                     continue
                 
-                self.last_action = f"LKW gefunden bei {treffer[0]}"
-                logger.info(f"{self.bot_name}: Treffer bei: {treffer[0]}")
-                
-                lx = treffer[0][0] + 5
-                ly = treffer[0][1] + 5
-                self.click(lx, ly)
-                
-                self.last_action = "Hole LKW-Details..."
-                if not self.make_screenshot_robust('info.png'):
-                    self.last_action = "Info-Screenshot fehlgeschlagen"
-                    self.click(self.COORDS_NEW['esc'][0], self.COORDS_NEW['esc'][1])
+                if not self.open_truck(treffer):
                     continue
                 
-                # Server prüfen
-                if self.use_server_filter:
-                    self.last_action = "Prüfe Server..."
-                    if not self.ist_server_passend():
-                        self.last_action = f"Falscher Server - Skip"
-                        self.click(self.COORDS_NEW['esc'][0], self.COORDS_NEW['esc'][1])
-                        self.trucks_skipped += 1
-                        self.trucks_processed += 1
-                        continue
-                
-                # Stärke prüfen
-                self.last_action = "Lese Stärke..."
-                staerke = self.ocr_staerke()
-                wert = self.staerke_float_wert(staerke)
+                self.execute_decision(self.timed_decide_truck())
                 
-                if wert and self.use_limit and wert > self.strength_limit:
-                    self.last_action = f"Stärke {wert}M > {self.strength_limit}M - Skip"
-                    self.click(self.COORDS_NEW['esc'][0], self.COORDS_NEW['esc'][1])
-                    self.trucks_skipped += 1
-                    self.trucks_processed += 1
+            except Exception as e:
+                self._handle_loop_error(e)
+    
+    # ---------- Pipeline-Modus ----------
+    
+    def _pipe_capture(self, _item):
+        """
+        Produzent: nimmt Karten-Screenshots auf, solange der Executor einen
+        Frame angefordert hat (ab dem letzten Tap einer Runde bis er einen
+        zur Ruhe gekommenen Frame übernimmt). Während Info-Panel und
+        Share-Taps ruht die Stufe.
+        """
+        if self.paused or self.maintenance_mode:
+            time.sleep(0.5)
+            return None
+        if not self.pipeline.wait_frame_request():
+            return None
+        epoch = self.pipeline.epoch
+        captured_at = time.time()
+        if not self.make_screenshot_robust('pipeline.png'):
+            time.sleep(3)
+            return None
+        return self.pipeline.item((self.get_frame('pipeline.png'), captured_at), epoch=epoch)
+    
+    def _pipe_detect(self, item):
+        """Template Matching auf dem Frame des Items, parallel zur nächsten Aufnahme"""
+        frame, captured_at = item.payload
+        treffer = self.rentier_lkw_finden(frame)
+        height, width = frame.shape[:2]
+        probe = region_probe(frame, (0, 0, width, height), scale=8)
+        return self.pipeline.derive(item, (frame, treffer, probe, captured_at))
+    
+    def _await_map(self, treffer_q, reference=None, region=None, fallback=0.0):
+        """
+        Fordert Karten-Frames an und wartet auf das erste brauchbare Ergebnis
+        von Capture und Erkennung: zwei Frames in Folge gleich (Bildschirm zur
+        Ruhe gekommen) und - mit Referenz - in region gegenüber dem Bildschirm
+        vor dem letzten Tap verändert oder mindestens fallback Sekunden danach
+        aufgenommen. (Frame, Treffer) oder None.
+        """
+        pipeline = self.pipeline
+        start = time.time()
+        ref_probe = None
+        if reference is not None:
+            if region is None:
+                region = (0, 0, reference.shape[1], reference.shape[0])
+            ref_probe = region_probe(reference, region)
+        last_probe = None
+        pipeline.request_frame()
+        try:
+            while self.running and not self.paused:
+                if time.time() - start > self.PIPELINE_FRAME_TIMEOUT:
+                    logger.warning(f"{self.bot_name}: Kein Karten-Frame aus der Pipeline")
+                    return None
+                try:
+                    item = treffer_q.get(timeout=0.5)
+                except queue.Empty:
                     continue
-                
-                if wert is None or staerke in self.load_staerken():
-                    if wert is None:
-                        self.last_action = "Stärke nicht erkannt - Skip"
-                    else:
-                        self.last_action = f"Stärke {staerke} bereits geteilt - Skip"
-                    self.click(self.COORDS_NEW['esc'][0], self.COORDS_NEW['esc'][1])
-                    self.trucks_skipped += 1
-                    self.trucks_processed += 1
+                if pipeline.is_stale(item):
                     continue
-                
-                # LKW teilen
-                self.save_staerke(staerke)
-                coords = self.COORDS_ALLIANCE if self.share_mode == "alliance" else self.COORDS_NEW
-                mode_text = "Allianz" if self.share_mode == "alliance" else "Welt"
-                
-                self.last_action = f"Teile {staerke} im {mode_text}chat..."
-                logger.info(f"{self.bot_name}: Teile LKW {staerke} im {mode_text}chat")
-                
-                self.click(coords['share'][0], coords['share'][1])
-                self.click(coords['share_confirm1'][0], coords['share_confirm1'][1])
-                self.click(coords['share_confirm2'][0], coords['share_confirm2'][1])
-                self.click(coords['esc'][0], coords['esc'][1])
-                
-                self.trucks_shared += 1
-                self.trucks_processed += 1
-                self.last_action = f"✓ LKW {staerke} geteilt! (Gesamt: {self.trucks_shared})"
-                self.last_success_time = time.time()
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"{self.bot_name}: Fehler: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
-                self.last_action = f"Fehler: {str(e)[:50]}"
-                self.consecutive_errors += 1
-                time.sleep(5)
+                frame, treffer, probe, captured_at = item.payload
+                settled = last_probe is not None and probe_diff(probe, last_probe) < self.transition_threshold / 2
+                last_probe = probe
+                if not settled:
+                    continue
+                if (ref_probe is not None and captured_at - start < fallback
+                        and probe_diff(region_probe(frame, region), ref_probe) < self.transition_threshold):
+                    continue
+                return frame, treffer
+            return None
+        finally:
+            pipeline.frame_taken()
+    
+    def _pipeline_loop(self):
+        """
+        Capture und Erkennung laufen in eigenen Threads voraus: ab dem letzten
+        Tap einer Runde (ESC) wird schon die nächste Karte aufgenommen, und
+        während ein Frame gematcht wird, läuft bereits die nächste Aufnahme.
+        Das Warten auf den ESC-Übergang bzw. no_truck_delay übernehmen diese
+        Vorab-Frames. OCR/Entscheidung und die Taps laufen in diesem Thread,
+        da jeder Schritt vom vorherigen abhängt.
+        """
+        pipeline = self.pipeline = Pipeline(self.bot_name)
+        detect_q = pipeline.queue()
+        treffer_q = pipeline.queue()
+        # Capture ist höchstens einen Frame voraus: Aufnahme k+1 läuft, während k gematcht wird
+        pipeline.add_stage('capture', self._pipe_capture, outbox=detect_q, backpressure=True)
+        pipeline.add_stage('detect', self._pipe_detect, inbox=detect_q, outbox=treffer_q)
+        pipeline.start()
+        # Übergang des letzten Taps: (Referenz-Frame, Region, Fallback in Sekunden)
+        pending = (None, None, 0.0)
         
-        self.close_ssh_tunnel()
-        self.stop_keepalive()
-        self.status = "Gestoppt"
-        self.last_action = "Bot gestoppt"
-        logger.info(f"{self.bot_name}: Beendet")
+        try:
+            while self.running:
+                if self._check_pause():
+                    continue
+                
+                try:
+                    self.status = "Läuft - Suche LKWs..."
+                    result = self._await_map(treffer_q, *pending)
+                    pending = (None, None, 0.0)
+                    if result is None:
+                        continue
+                    frame, treffer = result
+                    
+                    # Ab jetzt ändert sich der Bildschirm
+                    pipeline.invalidate()
+                    
+                    with pipeline.busy('executor'):
+                        if not treffer:
+                            self.handle_no_truck(wait=False)
+                            pending = (frame, None, self.no_truck_delay)
+                            continue
+                        
+                        self.store_frame('screen.png', frame)
+                        if not self.open_truck(treffer):
+                            continue
+                        reference, region = self.execute_decision(self.timed_decide_truck(), wait=False)
+                        pending = (reference, region, self.transition_timeout)
+                except Exception as e:
+                    self._handle_loop_error(e)
+                finally:
+                    # Frames, die vor bzw. während der Taps aufgenommen wurden, verwerfen
+                    pipeline.invalidate()
+        finally:
+            pipeline.stop()
     
-    def _reset_timer(self):
-        """Reset-Timer Thread"""
-        while self.running:
-            time.sleep(self.reset_interval * 60)
-            if self.running:
-                self.reset_staerken()
-                self.last_action = f"Stärken-Liste zurückgesetzt ({self.reset_interval} Min)"
+    def live_status(self):
+        """Felder des Dashboards für /api/status/stream"""
+        status = super().live_status()
+        status.update({
+            'device': self.device_id,
+            'status': self.status,
+            'last_action': self.last_action,
+            'current_user': self.current_user,
+            'trucks_processed': self.trucks_processed,
+            'trucks_shared': self.trucks_shared,
+            'trucks_skipped': self.trucks_skipped
+        })
+        return status
+    
+    def status_dict(self):
+        """Status für /api/status"""
+        return {
+            'device': self.device_id,
+            'running': self.running,
+            'paused': self.paused,
+            'status': self.status,
+            'last_action': self.last_action,
+            'trucks_processed': self.trucks_processed,
+            'trucks_shared': self.trucks_shared,
+            'trucks_skipped': self.trucks_skipped,
+            'adb_connected': self.adb_connected,
+            'tunnel': self.tunnel_status(),
+            'resilience': self.device_guard.to_dict(),
+            'current_user': self.current_user,
+            'capture': self.capture_status(),
+            'detection': self.frame_gate.stats.to_dict() if self.frame_gate else None,
+            'pipeline': self.pipeline.stats() if self.pipeline else None,
+            'analysis_pool': self.analysis_pool.to_dict() if self.analysis_pool else None
+        }
     
     def start(self, username=None):
         """Startet Bot"""
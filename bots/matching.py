@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Template Matching: Peak-Extraktion mit Non-Maximum Suppression
+Version 3.2
+"""
+
+import logging
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def find_peaks(result, threshold, template_size, max_candidates=10):
+    """
+    Extrahiert unterschiedliche Treffer aus der matchTemplate-Antwort.
+    Gibt [(x, y, score), ...] absteigend nach Score zurück.
+    """
+    tw, th = template_size
+    # Lokale Maxima per Max-Filter (ungerade Kernelgröße ~ halbe Templategröße)
+    kw = max(3, (tw // 2) | 1)
+    kh = max(3, (th // 2) | 1)
+    dilated = cv2.dilate(result, np.ones((kh, kw), np.uint8))
+    ys, xs = np.nonzero((result >= threshold) & (result >= dilated))
+    if len(xs) == 0:
+        return []
+
+    scores = result[ys, xs]
+    order = np.argsort(-scores, kind='stable')
+    candidates = [(int(xs[i]), int(ys[i]), float(scores[i])) for i in order]
+    return suppress(candidates, template_size, max_candidates)
+
+
+def suppress(candidates, template_size, max_candidates=10):
+    """Entfernt Kandidaten, die näher als eine halbe Templategröße an einem besseren liegen"""
+    tw, th = template_size
+    min_dx = max(1, tw // 2)
+    min_dy = max(1, th // 2)
+    peaks = []
+    for x, y, score in sorted(candidates, key=lambda c: -c[2]):
+        if any(abs(x - px) < min_dx and abs(y - py) < min_dy for px, py, _ in peaks):
+            continue
+        peaks.append((x, y, score))
+        if len(peaks) >= max_candidates:
+            break
+    return peaks
+
+
+def match_full(screen, template, threshold, max_candidates=10):
+    """Matching in voller Auflösung (BGR)"""
+    result = cv2.matchTemplate(screen, template.bgr, cv2.TM_CCOEFF_NORMED)
+    return find_peaks(result, threshold, (template.width, template.height), max_candidates)
+
+
+def match_pyramid(screen, template, threshold, max_candidates=10,
+                  scale=0.5, refine_window=8, coarse_margin=0.10):
+    """
+    Grob-Fein-Suche: Matching auf verkleinertem Graustufenbild, danach
+    Verfeinerung in voller Auflösung nur um die groben Treffer herum.
+    """
+    gray = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    tmpl_small = template.scaled_gray(scale)
+    if small.shape[0] < tmpl_small.shape[0] or small.shape[1] < tmpl_small.shape[1]:
+        return []
+
+    coarse = cv2.matchTemplate(small, tmpl_small, cv2.TM_CCOEFF_NORMED)
+    # Graustufen + Verkleinerung drücken den Score, daher etwas tiefere Schwelle
+    coarse_peaks = find_peaks(coarse, threshold - coarse_margin,
+                              (tmpl_small.shape[1], tmpl_small.shape[0]), max_candidates * 2)
+
+    sh, sw = screen.shape[:2]
+    tw, th = template.width, template.height
+    refined = []
+    for cx, cy, _ in coarse_peaks:
+        x0 = max(0, int(cx / scale) - refine_window)
+        y0 = max(0, int(cy / scale) - refine_window)
+        x1 = min(sw - tw, int(cx / scale) + refine_window)
+        y1 = min(sh - th, int(cy / scale) + refine_window)
+        if x1 < x0 or y1 < y0:
+            continue
+        roi = screen[y0:y1 + th, x0:x1 + tw]
+        result = cv2.matchTemplate(roi, template.bgr, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        if max_val >= threshold:
+            refined.append((x0 + max_loc[0], y0 + max_loc[1], float(max_val)))
+
+    return suppress(refined, (tw, th), max_candidates)
+
+
+
+def match_regions(screen, template, threshold, max_candidates, regions, previous):
+    """
+    Nur geänderte Bereiche neu matchen. regions: [(x1, y1, x2, y2), ...] in
+    voller Auflösung; Treffer aus previous, deren Fenster keinen Bereich
+    berühren, bleiben gültig.
+    """
+    sh, sw = screen.shape[:2]
+    tw, th = template.width, template.height
+
+    def touches(x, y, region):
+        x1, y1, x2, y2 = region
+        return x < x2 and x + tw > x1 and y < y2 and y + th > y1
+
+    candidates = [p for p in previous or [] if not any(touches(p[0], p[1], r) for r in regions)]
+    for x1, y1, x2, y2 in regions:
+        # Um Templategröße erweitern: alle Fenster, die den Bereich schneiden
+        cx1, cy1 = max(0, x1 - tw + 1), max(0, y1 - th + 1)
+        cx2, cy2 = min(sw, x2 + tw - 1), min(sh, y2 + th - 1)
+        if cx2 - cx1 < tw or cy2 - cy1 < th:
+            continue
+        result = cv2.matchTemplate(screen[cy1:cy2, cx1:cx2], template.bgr, cv2.TM_CCOEFF_NORMED)
+        candidates.extend((x + cx1, y + cy1, score)
+                          for x, y, score in find_peaks(result, threshold, (tw, th), max_candidates))
+    return suppress(candidates, (tw, th), max_candidates)
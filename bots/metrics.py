@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latenz-Histogramme und Zähler pro Bot, Export im Prometheus-Textformat
+Version 3.2
+"""
+
+from bisect import bisect_left
+
+# Bucket-Grenzen in Sekunden (von schnellen Taps bis zu Reconnects)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGES = ('capture', 'poll', 'match', 'ocr', 'decide', 'transition', 'reconnect', 'rotation')
+CLICK_ACTIONS = ('truck', 'esc', 'share', 'share_confirm1', 'share_confirm2', 'tap')
+OUTCOMES = ('shared', 'duplicate', 'over_limit', 'wrong_server', 'ocr_failure', 'no_truck')
+
+
+class Histogram:
+    """
+    Histogramm mit fest vorbelegten Buckets: observe() zählt nur hoch,
+    ohne Objekte anzulegen.
+    """
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        # Erster Bucket mit Grenze >= Wert (Prometheus: le = "kleiner gleich")
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class BotMetrics:
+    """Histogramme pro Stufe und Klick-Aktion, Zähler pro Entscheidungs-Ergebnis"""
+
+    def __init__(self):
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.clicks = {action: Histogram() for action in CLICK_ACTIONS}
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.last = {}  # Stufe -> letzte Dauer (für Truck-Ereignisse)
+
+    def observe(self, stage, seconds):
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = Histogram()
+        hist.observe(seconds)
+        self.last[stage] = seconds
+
+    def click(self, action, seconds):
+        hist = self.clicks.get(action)
+        if hist is None:
+            hist = self.clicks[action] = Histogram()
+        hist.observe(seconds)
+
+    def outcome(self, name):
+        self.outcomes[name] = self.outcomes.get(name, 0) + 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+class PrometheusWriter:
+    """
+    Baut die Textausgabe. Samples werden pro Metrik-Familie gesammelt, damit
+    jede Familie (HELP, TYPE, alle Samples aller Geräte) genau ein
+    zusammenhängender Block ist, egal in welcher Reihenfolge sie kommen.
+    """
+
+    def __init__(self):
+        self.families = {}  # Name -> Zeilen (Einfügereihenfolge bleibt erhalten)
+
+    def _family(self, name, kind, help_text):
+        lines = self.families.get(name)
+        if lines is None:
+            lines = self.families[name] = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        return lines
+
+    def sample(self, name, kind, help_text, labels, value):
+        self._family(name, kind, help_text).append(f'{name}{{{_labels(labels)}}} {value}')
+
+    def histogram(self, name, help_text, labels, hist):
+        lines = self._family(name, 'histogram', help_text)
+        base = _labels(labels)
+        cumulative = 0
+        for bound, count in zip(hist.bounds, hist.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{base},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{base},le="+Inf"}} {hist.count}')
+        lines.append(f'{name}_sum{{{base}}} {hist.sum:.6f}')
+        lines.append(f'{name}_count{{{base}}} {hist.count}')
+
+    def text(self):
+        return '\n'.join(line for lines in self.families.values() for line in lines) + '\n'
+
+
+def render_prometheus(bots):
+    """Prometheus-Textformat für alle Bots (Liste von LKWBotController)"""
+    out = PrometheusWriter()
+    for bot in bots:
+        device = {'device': bot.device_id}
+        metrics = bot.metrics
+
+        for stage, hist in metrics.stages.items():
+            out.histogram('lkw_stage_duration_seconds', 'Latenz pro Stufe',
+                          dict(device, stage=stage), hist)
+        for action, hist in metrics.clicks.items():
+            out.histogram('lkw_click_duration_seconds', 'Latenz pro Klick-Aktion (adb input tap)',
+                          dict(device, action=action), hist)
+        for outcome, value in metrics.outcomes.items():
+            out.sample('lkw_truck_outcomes_total', 'counter', 'Entscheidungen pro Ergebnis',
+                       dict(device, outcome=outcome), value)
+
+        out.sample('lkw_trucks_processed_total', 'counter', 'Verarbeitete LKWs', device, bot.trucks_processed)
+        out.sample('lkw_trucks_shared_total', 'counter', 'Geteilte LKWs', device, bot.trucks_shared)
+        out.sample('lkw_trucks_skipped_total', 'counter', 'Übersprungene LKWs', device, bot.trucks_skipped)
+        out.sample('lkw_bot_running', 'gauge', 'Bot läuft', device, int(bot.running))
+        out.sample('lkw_bot_paused', 'gauge', 'Bot pausiert', device, int(bot.paused))
+
+        # Tunnel / Gerät
+        out.sample('lkw_adb_connected', 'gauge', 'ADB verbunden', device, int(bot.adb_connected))
+        out.sample('lkw_tunnel_rotations_total', 'counter', 'SSH-Tunnel-Rotationen', device, bot.tunnel_rotations)
+        out.sample('lkw_tunnel_last_refresh_timestamp_seconds', 'gauge', 'Letzter Tunnel-Aufbau',
+                   device, f'{bot.last_ssh_refresh:.0f}')
+        breaker = bot.device_guard.breaker
+        for state in ('closed', 'open', 'half_open'):
+            out.sample('lkw_circuit_state', 'gauge', 'Circuit-Breaker-Zustand (1 = aktiv)',
+                       dict(device, state=state), int(breaker.state == state))
+        out.sample('lkw_circuit_opened_total', 'counter', 'Öffnungen des Circuit Breakers', device,
+                   breaker.open_count)
+
+        # Capture / Erkennung
+        out.sample('lkw_capture_bytes_total', 'counter', 'Übertragene Screenshot-Bytes', device,
+                   bot.capture_stats.total_bytes)
+        if bot.frame_gate:
+            stats = bot.frame_gate.stats
+            for outcome, value in (('skipped', stats.skipped), ('partial', stats.partial), ('full', stats.full)):
+                out.sample('lkw_frame_gate_frames_total', 'counter', 'Frames nach Matching-Umfang',
+                           dict(device, outcome=outcome), value)
+    return out.text()
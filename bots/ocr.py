@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR-Service mit dauerhafter Tesseract-Instanz und Ergebnis-Cache
+Version 3.2
+"""
+
+import re
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+import pytesseract
+
+
+def _parse_psm(config):
+    """'--psm 7' -> 7 (Standard: 3 wie tesseract)"""
+    match = re.search(r'--psm\s+(\d+)', config or '')
+    return int(match.group(1)) if match else 3
+
+
+class TesserocrEngine:
+    """In-Process Tesseract über tesserocr, eine API-Instanz pro PSM"""
+
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng'):
+        self.lang = lang
+        self._apis = {}
+        self._lock = threading.Lock()
+
+    def image_to_string(self, image, config=''):
+        psm = _parse_psm(config)
+        with self._lock:
+            api = self._apis.get(psm)
+            if api is None:
+                api = tesserocr.PyTessBaseAPI(lang=self.lang, psm=psm)
+                self._apis[psm] = api
+            api.SetImage(image)
+            return api.GetUTF8Text()
+
+    def close(self):
+        with self._lock:
+            for api in self._apis.values():
+                api.End()
+            self._apis.clear()
+
+
+class PytesseractEngine:
+    """Fallback: ein tesseract-Prozess pro Aufruf"""
+
+    name = 'pytesseract'
+
+    def __init__(self, lang='eng'):
+        self.lang = lang
+
+    def image_to_string(self, image, config=''):
+        return pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+    def close(self):
+        pass
+
+
+def create_engine(lang='eng'):
+    """tesserocr wenn installiert, sonst pytesseract"""
+    if tesserocr is not None:
+        try:
+            return TesserocrEngine(lang)
+        except Exception as e:
+            logger.warning(f"tesserocr nicht nutzbar, verwende pytesseract: {e}")
+    return PytesseractEngine(lang)
+
+
+class OcrService:
+    """
+    Erkennt Text in Bildausschnitten. Ergebnisse werden pro
+    (Frame-ID, Box, Config) gecacht, damit jeder Ausschnitt pro Frame
+    höchstens einmal durch Tesseract läuft.
+    """
+
+    def __init__(self, engine=None, cache_size=256):
+        self.engine = engine or create_engine()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def cached(self, frame_id, box, config=''):
+        """Gecachtes Ergebnis oder None"""
+        if frame_id is None:
+            return None
+        key = (frame_id, tuple(box), config)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+        return None
+
+    def store(self, frame_id, box, config, text):
+        """Ergebnis in den Cache legen"""
+        if frame_id is None:
+            return
+        with self._lock:
+            self.misses += 1
+            self._cache[(frame_id, tuple(box), config)] = text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def recognize(self, image, box, config='', frame_id=None):
+        """Text im Ausschnitt box von image (PIL) erkennen"""
+        text = self.cached(frame_id, box, config)
+        if text is not None:
+            return text
+        text = self.engine.image_to_string(image.crop(box), config=config).strip()
+        self.store(frame_id, box, config, text)
+        return text
+
+    def stats(self):
+        return {'engine': self.engine.name, 'hits': self.hits, 'misses': self.misses}
+
+
+# Prozessweiter Service, von allen Bots geteilt
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_ocr_service():
+    """Liefert den prozessweiten OcrService (wird beim ersten Aufruf erstellt)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = OcrService()
+            logger.info(f"OCR-Engine: {_service.engine.name}")
+        return _service
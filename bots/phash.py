@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perceptual Hash (dHash) für bereits gesehene LKWs
+Version 3.2
+"""
+
+import threading
+import logging
+import cv2
+import numpy as np
+
+from .dedup import DedupStore
+
+logger = logging.getLogger(__name__)
+
+
+def dhash(crop, size=8):
+    """64-Bit Difference-Hash eines Bildausschnitts"""
+    gray = crop if crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def _popcount64(values):
+    """Anzahl gesetzter Bits pro uint64"""
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class HashIndex:
+    """Hash -> Stärke mit Ablaufzeit, persistiert über einen DedupStore"""
+
+    def __init__(self, path, ttl, max_distance=4):
+        self.store = DedupStore(path, ttl)
+        self.max_distance = max_distance
+        self._array = None
+        self._lock = threading.Lock()
+
+    def _hash_array(self):
+        with self._lock:
+            if self._array is None:
+                self._array = np.array([int(k, 16) for k in self.store.keys()], dtype=np.uint64)
+            return self._array
+
+    def match(self, h):
+        """
+        (Stärke, Hamming-Distanz) zum nächsten Hash innerhalb max_distance,
+        sonst (None, None). Distanz 0 = exakt derselbe Ausschnitt. Verlängert
+        keine Ablaufzeit (siehe touch()).
+        """
+        strength = self.store.get(f"{h:016x}", touch=False)
+        if strength is not None:
+            return strength, 0
+        hashes = self._hash_array()
+        if not len(hashes):
+            return None, None
+        distances = _popcount64(hashes ^ np.uint64(h))
+        best = int(distances.argmin())
+        if distances[best] <= self.max_distance:
+            # Abgelaufene Einträge liefert der Store als None
+            strength = self.store.get(f"{int(hashes[best]):016x}", touch=False)
+            if strength is not None:
+                return strength, int(distances[best])
+        return None, None
+
+    def lookup(self, h):
+        """Stärke zu einem (fast) gleichen Hash oder None"""
+        return self.match(h)[0]
+
+    def touch(self, h):
+        """Bestätigtes Duplikat: Ablaufzeit des exakten Hashes verlängern (nur im Speicher)"""
+        self.store.get(f"{h:016x}", touch=True)
+
+    def add(self, h, strength):
+        self.store.add(f"{h:016x}", strength)
+        with self._lock:
+            self._array = None
+
+    def reset(self):
+        self.store.clear()
+        with self._lock:
+            self._array = None
+
+    def __len__(self):
+        return len(self.store)
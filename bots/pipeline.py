@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline aus Stufen (Capture, Erkennung, OCR, Aktionen) mit begrenzten Queues
+Version 3.2
+"""
+
+import time
+import queue
+import threading
+import itertools
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineItem:
+    """Ein Frame bzw. Zwischenergebnis mit Sequenznummer und Bildschirm-Epoche"""
+
+    def __init__(self, seq, epoch, payload):
+        self.seq = seq
+        self.epoch = epoch
+        self.payload = payload
+        self.created = time.time()
+
+
+class LatestQueue(queue.Queue):
+    """Begrenzte Queue, die bei vollem Puffer das älteste Element verwirft"""
+
+    def __init__(self, maxsize=1):
+        super().__init__(maxsize)
+        self.dropped = 0
+
+    def put_latest(self, item):
+        while True:
+            try:
+                self.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def clear(self):
+        """Alle wartenden Elemente verwerfen; gibt deren Anzahl zurück"""
+        cleared = 0
+        while True:
+            try:
+                self.get_nowait()
+                cleared += 1
+            except queue.Empty:
+                return cleared
+
+
+class StageStats:
+    """Durchsatz und Auslastung einer Stufe"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.processed = 0
+        self.stale = 0
+        self.errors = 0
+        self.busy = 0.0
+
+    def record(self, seconds):
+        self.processed += 1
+        self.busy += seconds
+
+    def to_dict(self, inbox=None):
+        elapsed = max(time.time() - self.started, 1e-6)
+        return {
+            'processed': self.processed,
+            'stale': self.stale,
+            'errors': self.errors,
+            'utilisation': round(self.busy / elapsed, 3),
+            'avg_ms': round(self.busy / self.processed * 1000, 1) if self.processed else 0.0,
+            'queue_depth': inbox.qsize() if inbox is not None else None,
+            'queue_dropped': inbox.dropped if inbox is not None else None,
+        }
+
+
+class Stage:
+    """
+    Stufe in eigenem Thread: holt Items aus inbox, ruft fn(item) auf und
+    legt das Ergebnis in outbox ab. Ohne inbox ist die Stufe ein Produzent
+    und fn(None) wird fortlaufend aufgerufen; mit backpressure erst, wenn
+    die nächste Stufe das letzte Ergebnis abgeholt hat.
+    """
+
+    def __init__(self, pipeline, name, fn, inbox=None, outbox=None, drop_stale=True, backpressure=False):
+        self.pipeline = pipeline
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.drop_stale = drop_stale
+        self.backpressure = backpressure
+        self.stats = StageStats()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name=f"{self.pipeline.name}-{self.name}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.pipeline.running:
+            item = None
+            if self.inbox is not None:
+                try:
+                    item = self.inbox.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                if self.drop_stale and self.pipeline.is_stale(item):
+                    self.stats.stale += 1
+                    continue
+            elif self.backpressure and self.outbox is not None and self.outbox.full():
+                time.sleep(0.005)
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = self.fn(item)
+            except Exception as e:
+                self.stats.errors += 1
+                logger.error(f"{self.pipeline.name}: Stufe {self.name} Fehler: {e}")
+                time.sleep(0.5)
+                continue
+
+            if result is None:
+                continue
+            self.stats.record(time.perf_counter() - start)
+            if self.outbox is not None:
+                self.outbox.put_latest(result)
+
+
+class Pipeline:
+    """
+    Verbindet Stufen über LatestQueues. Jede Aktion, die den Bildschirm
+    verändert, erhöht die Epoche; Items aus einer alten Epoche sind veraltet.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.running = False
+        self.epoch = 0
+        self._seq = itertools.count(1)
+        self.stages = []
+        self.inline_stats = {}
+        # Gesetzt, sobald der Verbraucher den nächsten Frame braucht
+        self.frame_wanted = threading.Event()
+
+    def queue(self, maxsize=1):
+        return LatestQueue(maxsize)
+
+    def add_stage(self, name, fn, inbox=None, outbox=None, drop_stale=True, backpressure=False):
+        stage = Stage(self, name, fn, inbox, outbox, drop_stale, backpressure)
+        self.stages.append(stage)
+        return stage
+
+    def item(self, payload, epoch=None):
+        """Neues Item mit fortlaufender Sequenznummer"""
+        return PipelineItem(next(self._seq), self.epoch if epoch is None else epoch, payload)
+
+    def derive(self, item, payload):
+        """Folge-Item mit gleicher Sequenznummer und Epoche"""
+        return PipelineItem(item.seq, item.epoch, payload)
+
+    def invalidate(self):
+        """Bildschirm ändert sich: alle laufenden Items werden veraltet"""
+        self.epoch += 1
+
+    def is_stale(self, item):
+        return item.epoch != self.epoch
+
+    def request_frame(self):
+        """Verbraucher braucht den nächsten Frame: Capture nimmt fortlaufend auf, bis frame_taken()"""
+        self.frame_wanted.set()
+
+    def frame_taken(self):
+        """Verbraucher hat seinen Frame: Capture ruht bis zur nächsten Anforderung"""
+        self.frame_wanted.clear()
+
+    def wait_frame_request(self, timeout=0.2):
+        """Für den Capture-Produzenten: True, solange ein Frame angefordert ist"""
+        return self.frame_wanted.wait(timeout)
+
+    @contextmanager
+    def busy(self, name):
+        """Misst Arbeitszeit einer Stufe, die im Aufrufer-Thread läuft"""
+        stats = self.inline_stats.setdefault(name, StageStats())
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.record(time.perf_counter() - start)
+
+    def start(self):
+        self.running = True
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        self.running = False
+        for stage in self.stages:
+            if stage.thread:
+                stage.thread.join(timeout=5)
+
+    def stats(self):
+        result = {stage.name: stage.stats.to_dict(stage.inbox) for stage in self.stages}
+        for name, stats in self.inline_stats.items():
+            result[name] = stats.to_dict()
+        result['epoch'] = self.epoch
+        return result
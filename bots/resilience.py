@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Retry-Policy mit exponentiellem Backoff und Circuit Breaker für Geräte-Kommandos
+Version 3.2
+"""
+
+import time
+import random
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Gerät gilt als gestört, Kommando wird nicht ausgeführt"""
+
+
+class RetryPolicy:
+    """
+    Versuche pro Operation mit exponentiellem Backoff und Jitter.
+    budget begrenzt die Gesamtzeit inklusive Wartezeiten (Sekunden).
+    """
+
+    def __init__(self, attempts=3, base_delay=0.5, max_delay=8.0, multiplier=2.0, jitter=0.5, budget=None):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.budget = budget
+
+    def delay(self, attempt):
+        """Wartezeit nach dem Fehlversuch attempt (0-basiert)"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        return delay * (1 - self.jitter * random.random())
+
+
+class CircuitBreaker:
+    """
+    closed: Kommandos laufen normal. Nach failure_threshold Fehlern in Folge
+    -> open: Kommandos schlagen sofort fehl. Nach reset_timeout -> half_open:
+    ein Probe-Kommando entscheidet über closed oder erneut open (mit
+    verdoppeltem Timeout bis max_reset_timeout).
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=5.0, max_reset_timeout=120.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self._probe_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Darf ein Kommando ausgeführt werden?"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.time() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = HALF_OPEN
+                self._probe_running = False
+                logger.info(f"{self.name}: Circuit half-open - Probe-Kommando")
+            # half_open: nur ein Probe-Kommando gleichzeitig
+            if self._probe_running:
+                return False
+            self._probe_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"{self.name}: Circuit geschlossen")
+            self.state = CLOSED
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self._probe_running = False
+
+    def half_open(self):
+        """Nach erfolgreichem Reconnect nicht bis reset_timeout warten: nächstes Kommando ist die Probe"""
+        with self._lock:
+            if self.state == OPEN:
+                self.state = HALF_OPEN
+                self._probe_running = False
+                logger.info(f"{self.name}: Circuit half-open nach Reconnect - Probe-Kommando")
+
+    def record_failure(self):
+        """Fehler zählen; True, wenn der Circuit dadurch geöffnet wurde"""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+            elif self.state != CLOSED or self.failures < self.failure_threshold:
+                return False
+            self.state = OPEN
+            self.opened_at = time.time()
+            self.open_count += 1
+            self._probe_running = False
+            logger.warning(f"{self.name}: Circuit geöffnet nach {self.failures} Fehlern "
+                           f"(Probe in {self.reset_timeout:.0f}s)")
+            return True
+
+    def retry_in(self):
+        """Sekunden bis zum nächsten Probe-Kommando (0 wenn nicht offen)"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.time())
+
+    def to_dict(self):
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'open_count': self.open_count,
+            'reset_timeout': self.reset_timeout,
+            'retry_in': round(self.retry_in(), 1)
+        }
+
+
+class OperationStats:
+    """Zähler pro Operation"""
+
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def to_dict(self):
+        return {'calls': self.calls, 'retries': self.retries,
+                'failures': self.failures, 'rejected': self.rejected}
+
+
+class DeviceGuard:
+    """
+    Führt Geräte-Kommandos eines Bots mit der Policy der Operation aus.
+    Alle Operationen teilen sich einen Circuit Breaker; beim Öffnen wird
+    einmalig on_open (z.B. Tunnel-Reconnect) aufgerufen statt bei jedem Fehler.
+    Meldet on_open Erfolg (truthy), geht der Breaker sofort auf half_open.
+    """
+
+    def __init__(self, name, policies, breaker, on_open=None):
+        self.name = name
+        self.policies = policies
+        self.breaker = breaker
+        self.on_open = on_open
+        self.stats = {op: OperationStats() for op in policies}
+
+    def call(self, operation, fn, *args, **kwargs):
+        """fn(*args, **kwargs) mit Retries; wirft CircuitOpen oder den letzten Fehler"""
+        policy = self.policies[operation]
+        stats = self.stats[operation]
+        stats.calls += 1
+        start = time.time()
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                stats.rejected += 1
+                raise CircuitOpen(f"{operation}: Gerät gestört, nächste Probe in {self.breaker.retry_in():.0f}s")
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                stats.failures += 1
+                if self.breaker.record_failure() and self.on_open:
+                    self._handle_open()
+                attempt += 1
+                if attempt >= policy.attempts or self.breaker.state == OPEN:
+                    raise
+                delay = policy.delay(attempt - 1)
+                if policy.budget is not None and time.time() - start + delay > policy.budget:
+                    raise
+                logger.warning(f"{self.name}: {operation} fehlgeschlagen ({e}), "
+                               f"Versuch {attempt + 1}/{policy.attempts} in {delay:.1f}s")
+                stats.retries += 1
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _handle_open(self):
+        try:
+            if self.on_open():
+                self.breaker.half_open()
+        except Exception as e:
+            logger.error(f"{self.name}: Reconnect nach Circuit-Öffnung fehlgeschlagen: {e}")
+
+    def backoff(self, operation, attempt):
+        """Wartezeit laut Policy, z.B. nach Fehlern im Bot-Loop"""
+        return self.policies[operation].delay(attempt)
+
+    def to_dict(self):
+        return {
+            'circuit': self.breaker.to_dict(),
+            'operations': {op: s.to_dict() for op, s in self.stats.items()}
+        }
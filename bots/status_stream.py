@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Versionierter Bot-Status für Server-Sent Events: der Bot-Thread meldet
+Änderungen, /api/status/stream schickt nur die geänderten Felder
+Version 3.2
+"""
+
+import json
+import threading
+from collections import deque
+
+_MISSING = object()
+
+SNAPSHOT = 'snapshot'
+DELTA = 'delta'
+
+
+class PublishedField:
+    """
+    Attribut, dessen Änderung den Status des Besitzers veröffentlicht
+    (ruft obj.publish_status() auf, wenn sich der Wert wirklich ändert).
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.key = '_' + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.key]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj, value):
+        if obj.__dict__.get(self.key, _MISSING) != value:
+            obj.__dict__[self.key] = value
+            obj.publish_status()
+
+
+class StatusChannel:
+    """
+    Letzter Status-Snapshot mit Versionsnummer und den letzten Deltas.
+    publish() erhöht die Version nur bei echten Änderungen und weckt alle
+    wartenden Streams; Clients, die zu weit zurückliegen, bekommen wieder
+    den vollen Snapshot.
+    """
+
+    def __init__(self, history=64):
+        self.cond = threading.Condition()
+        self.version = 0
+        self.snapshot = {}
+        self.deltas = deque(maxlen=history)  # (version, geänderte Felder)
+
+    def publish(self, snapshot):
+        """Neuen Status übernehmen; gibt die (ggf. unveränderte) Version zurück"""
+        with self.cond:
+            delta = {key: value for key, value in snapshot.items()
+                     if self.snapshot.get(key, _MISSING) != value}
+            if not delta:
+                return self.version
+            self.snapshot = dict(snapshot)
+            self.version += 1
+            self.deltas.append((self.version, delta))
+            self.cond.notify_all()
+            return self.version
+
+    def changes_since(self, version, timeout=None):
+        """
+        Wartet bis timeout auf eine neuere Version als version.
+        (SNAPSHOT|DELTA, Version, Daten) oder (None, version, None) bei Timeout.
+        """
+        with self.cond:
+            if version == self.version:
+                self.cond.wait_for(lambda: self.version != version, timeout)
+            if version == self.version:
+                return None, version, None
+            if version < 0 or version > self.version or not self.deltas or self.deltas[0][0] > version + 1:
+                return SNAPSHOT, self.version, dict(self.snapshot)
+            merged = {}
+            for delta_version, delta in self.deltas:
+                if delta_version > version:
+                    merged.update(delta)
+            return DELTA, self.version, merged
+
+
+def sse_events(channel, version=-1, heartbeat=15.0, on_idle=None):
+    """
+    Generator im text/event-stream-Format: erst der Snapshot (bzw. die
+    Änderungen seit version), dann ein Event pro neuer Version. Ohne
+    Änderung kommt nach heartbeat Sekunden ein Kommentar, damit Proxies
+    die Verbindung nicht schließen; on_idle() darf dann den Status neu
+    veröffentlichen.
+    """
+    yield 'retry: 3000\n\n'
+    while True:
+        kind, version, data = channel.changes_since(version, timeout=heartbeat)
+        if kind is None:
+            if on_idle:
+                on_idle()
+            yield ': keepalive\n\n'
+            continue
+        yield f'id: {version}\nevent: {kind}\ndata: {json.dumps(data)}\n\n'
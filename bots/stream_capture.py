@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dauerhafter Bildschirm-Stream: screenrecord (H.264) -> ffmpeg -> Ringpuffer
+Version 3.2
+"""
+
+import os
+import re
+import time
+import shutil
+import subprocess
+import threading
+import logging
+from collections import deque
+
+import numpy as np
+
+from .capture import next_frame_id
+
+logger = logging.getLogger(__name__)
+
+
+class StreamFrame:
+    """Dekodierter Frame mit ID und Empfangszeit"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.frame_id = next_frame_id()
+        self.timestamp = time.time()
+
+    @property
+    def age(self):
+        return time.time() - self.timestamp
+
+
+class FrameRing:
+    """Ringpuffer der letzten Frames; Leser können auf neuere Frames warten"""
+
+    def __init__(self, size=8):
+        self.frames = deque(maxlen=size)
+        self.cond = threading.Condition()
+
+    def push(self, frame):
+        item = StreamFrame(frame)
+        with self.cond:
+            self.frames.append(item)
+            self.cond.notify_all()
+        return item
+
+    def latest(self):
+        with self.cond:
+            return self.frames[-1] if self.frames else None
+
+    def wait_newer(self, after, timeout):
+        """Neuester Frame, sofern jünger als after; sonst None nach timeout"""
+        deadline = time.time() + timeout
+        with self.cond:
+            while True:
+                if self.frames and self.frames[-1].timestamp > after:
+                    return self.frames[-1]
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+
+
+def parse_wm_size(output):
+    """'Physical size: 1080x1920' (ggf. 'Override size') -> (1080, 1920)"""
+    text = output.decode(errors='replace') if isinstance(output, bytes) else output
+    sizes = dict(re.findall(r'(\w+) size:\s*(\d+x\d+)', text))
+    size = sizes.get('Override') or sizes.get('Physical')
+    if not size:
+        raise ValueError(f"Bildschirmgröße nicht erkannt: {text.strip()[:100]}")
+    width, height = size.split('x')
+    return int(width), int(height)
+
+
+def probe_file_size(path):
+    """Auflösung einer Video-Datei per ffprobe"""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'stream=width,height', '-of', 'csv=p=0', path],
+        capture_output=True, text=True, timeout=10
+    )
+    width, height = result.stdout.strip().split(',')[:2]
+    return int(width), int(height)
+
+
+class ScreenStream:
+    """
+    Startet einen langlaufenden screenrecord-Stream über adb (oder liest
+    eine aufgezeichnete H.264-Datei), dekodiert ihn mit ffmpeg zu BGR und
+    legt jeden Frame im Ringpuffer ab. screenrecord liefert nur bei
+    Bildschirmänderungen neue Frames - der letzte Frame ist also immer
+    der aktuelle Bildschirm.
+    """
+
+    def __init__(self, source, size, bit_rate=4000000, ring_size=8, realtime=True):
+        if not shutil.which('ffmpeg'):
+            raise RuntimeError("Stream-Capture benötigt ffmpeg im PATH")
+        self.source = source
+        self.offline = os.path.isfile(source)
+        self.width, self.height = size
+        self.bit_rate = bit_rate
+        self.realtime = realtime
+        self.ring = FrameRing(ring_size)
+        self.running = False
+        self.thread = None
+        self.procs = []
+        self.frames_decoded = 0
+        self.restarts = 0
+        self.started_at = None
+        self.finished = threading.Event()
+
+    def _ffmpeg_cmd(self, input_args):
+        return ['ffmpeg', '-loglevel', 'error', '-fflags', 'nobuffer', '-flags', 'low_delay',
+                '-probesize', '32', '-analyzeduration', '0'] + input_args + [
+                '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{self.width}x{self.height}', 'pipe:1']
+
+    def _spawn(self):
+        """Startet adb/ffmpeg und liefert den stdout mit Rohframes"""
+        if self.offline:
+            input_args = (['-re'] if self.realtime else []) + ['-f', 'h264', '-i', self.source]
+            ffmpeg = subprocess.Popen(self._ffmpeg_cmd(input_args), stdout=subprocess.PIPE,
+                                      stderr=subprocess.DEVNULL)
+            self.procs = [ffmpeg]
+            return ffmpeg.stdout
+
+        adb = subprocess.Popen(
+            ['adb', '-s', self.source, 'exec-out', 'screenrecord', '--output-format=h264',
+             '--size', f'{self.width}x{self.height}', '--bit-rate', str(self.bit_rate), '-'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        ffmpeg = subprocess.Popen(self._ffmpeg_cmd(['-f', 'h264', '-i', 'pipe:0']),
+                                  stdin=adb.stdout, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        # Pipe gehört jetzt ffmpeg
+        adb.stdout.close()
+        self.procs = [adb, ffmpeg]
+        return ffmpeg.stdout
+
+    def _kill(self):
+        for proc in self.procs:
+            if proc.poll() is None:
+                proc.kill()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+        self.procs = []
+
+    def _run(self):
+        frame_bytes = self.width * self.height * 3
+        while self.running:
+            try:
+                stdout = self._spawn()
+                while self.running:
+                    data = stdout.read(frame_bytes)
+                    if len(data) < frame_bytes:
+                        break
+                    frame = np.frombuffer(data, dtype=np.uint8).reshape((self.height, self.width, 3))
+                    self.ring.push(frame)
+                    self.frames_decoded += 1
+            except Exception as e:
+                logger.error(f"Stream {self.source}: Fehler: {e}")
+            finally:
+                self._kill()
+
+            if self.offline:
+                break
+            if self.running:
+                # screenrecord endet nach spätestens 3 Minuten - neu starten
+                self.restarts += 1
+                logger.info(f"Stream {self.source}: Neustart #{self.restarts}")
+                time.sleep(0.5)
+        self.finished.set()
+
+    def start(self):
+        self.running = True
+        self.started_at = time.time()
+        self.finished.clear()
+        self.thread = threading.Thread(target=self._run, name=f"stream-{self.source}", daemon=True)
+        self.thread.start()
+        logger.info(f"Stream {self.source}: gestartet ({self.width}x{self.height})")
+
+    def stop(self):
+        self.running = False
+        self._kill()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def frame_after(self, after, timeout=1.0):
+        """
+        Frame, der nach Zeitpunkt after (z.B. letzter Tap) empfangen wurde.
+        Kommt innerhalb von timeout keiner, hat sich der Bildschirm nicht
+        geändert und der letzte Frame wird geliefert.
+        """
+        item = self.ring.wait_newer(after, timeout)
+        return item or self.ring.latest()
+
+    def to_dict(self):
+        latest = self.ring.latest()
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        return {
+            'source': self.source,
+            'size': f'{self.width}x{self.height}',
+            'frames': self.frames_decoded,
+            'fps': round(self.frames_decoded / elapsed, 1) if elapsed else 0.0,
+            'restarts': self.restarts,
+            'frame_age_ms': round(latest.age * 1000) if latest else None
+        }
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Template-Cache für das Template Matching
+Version 3.2
+"""
+
+import os
+import threading
+import logging
+import cv2
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateVariants:
+    """Einmal geladenes Template mit vorberechneten Varianten"""
+
+    def __init__(self, path, bgr, mtime):
+        self.path = path
+        self.mtime = mtime
+        self.bgr = bgr
+        self.gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        self.edges = cv2.Canny(self.gray, 50, 150)
+        self.height, self.width = self.gray.shape[:2]
+        self._scaled = {}
+        self._lock = threading.Lock()
+
+    def scaled_gray(self, scale):
+        """Verkleinerte Graustufen-Variante (wird beim ersten Zugriff berechnet)"""
+        with self._lock:
+            scaled = self._scaled.get(scale)
+            if scaled is None:
+                size = (max(1, int(round(self.width * scale))), max(1, int(round(self.height * scale))))
+                scaled = cv2.resize(self.gray, size, interpolation=cv2.INTER_AREA)
+                self._scaled[scale] = scaled
+            return scaled
+
+
+class TemplateCache:
+    """Lädt Templates einmal und nur bei geänderter mtime neu"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Liefert die TemplateVariants für path oder None"""
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            logger.error(f"Template {path} nicht gefunden")
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime == mtime:
+                return entry
+
+            bgr = cv2.imread(path)
+            if bgr is None:
+                logger.error(f"Template {path} konnte nicht geladen werden")
+                return None
+            entry = TemplateVariants(path, bgr, mtime)
+            self._entries[path] = entry
+            logger.info(f"Template {path} geladen ({entry.width}x{entry.height})")
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Prozessweiter Cache, von allen Bots geteilt
+template_cache = TemplateCache()
+
+
+def get_template(path):
+    """Template aus dem prozessweiten Cache"""
+    return template_cache.get(path)
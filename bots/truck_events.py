@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Truck-Ereignisse: Append-only-Log (JSON Lines) mit Stunden-Index und
+vorab aggregierten Stunden-/Tages-Rollups für /api/admin/stats
+Version 3.2
+"""
+
+import os
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+EVENTS_FILE = 'truck_events.jsonl'
+HOUR_FORMAT = '%Y-%m-%dT%H'
+DAY_FORMAT = '%Y-%m-%d'
+STRENGTH_BIN = 10      # Breite der Stärke-Klassen in M
+STRENGTH_BIN_MAX = 100  # alles darüber landet in der letzten Klasse
+
+
+def _new_bucket():
+    return {
+        'count': 0,
+        'outcomes': {},
+        'shared': 0,
+        'strength_sum': 0.0,
+        'strength_count': 0,
+        'strength_max': None,
+        'strength_bins': {},
+        'servers': {},
+        'latency': {}  # Stufe -> [Summe ms, Anzahl]
+    }
+
+
+def _add_event(bucket, event):
+    bucket['count'] += 1
+    outcome = event.get('outcome') or 'unknown'
+    bucket['outcomes'][outcome] = bucket['outcomes'].get(outcome, 0) + 1
+    for stage, ms in (event.get('latency') or {}).items():
+        total = bucket['latency'].setdefault(stage, [0.0, 0])
+        total[0] += ms
+        total[1] += 1
+    if outcome != 'shared':
+        return
+    # Stärke- und Server-Statistik nur für geteilte LKWs
+    bucket['shared'] += 1
+    strength = event.get('strength_value')
+    if strength is not None:
+        bucket['strength_sum'] += strength
+        bucket['strength_count'] += 1
+        if bucket['strength_max'] is None or strength > bucket['strength_max']:
+            bucket['strength_max'] = strength
+        key = str(min(int(strength // STRENGTH_BIN) * STRENGTH_BIN, STRENGTH_BIN_MAX))
+        bucket['strength_bins'][key] = bucket['strength_bins'].get(key, 0) + 1
+    server = event.get('server')
+    if server:
+        bucket['servers'][server] = bucket['servers'].get(server, 0) + 1
+
+
+def _merge(target, bucket):
+    target['count'] += bucket['count']
+    target['shared'] += bucket['shared']
+    target['strength_sum'] += bucket['strength_sum']
+    target['strength_count'] += bucket['strength_count']
+    if bucket['strength_max'] is not None and (target['strength_max'] is None
+                                               or bucket['strength_max'] > target['strength_max']):
+        target['strength_max'] = bucket['strength_max']
+    for field in ('outcomes', 'strength_bins', 'servers'):
+        for key, value in bucket[field].items():
+            target[field][key] = target[field].get(key, 0) + value
+    for stage, (total, count) in bucket['latency'].items():
+        entry = target['latency'].setdefault(stage, [0.0, 0])
+        entry[0] += total
+        entry[1] += count
+
+
+class TruckEventStore:
+    """
+    Ein Store pro Gerät. record() legt das Ereignis nur in eine Queue; ein
+    Writer-Thread schreibt gesammelt ins Log, aktualisiert die Rollups und
+    speichert sie atomar. Stunden-Rollups und Index-Einträge älter als
+    hourly_retention_days werden verworfen, Tages-Rollups bleiben. Beim
+    Beenden des Prozesses schreibt close() die restlichen Ereignisse.
+
+    Rollup-Datei:
+        {"hourly": {"2024-05-01T13": {...}}, "daily": {"2024-05-01": {...}},
+         "index": {"2024-05-01T13": <Byte-Offset im Log>}}
+    """
+
+    def __init__(self, events_path, rollup_path, flush_interval=1.0, batch_size=200,
+                 max_queue=10000, hourly_retention_days=35):
+        self.events_path = events_path
+        self.rollup_path = rollup_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.hourly_retention_days = hourly_retention_days
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.dropped = 0
+        self.written = 0
+        self.hourly = {}
+        self.daily = {}
+        self.index = {}
+        self._load()
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._writer_loop, name='truck-events', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def _load(self):
+        if not os.path.exists(self.rollup_path):
+            return
+        try:
+            with open(self.rollup_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.hourly = data.get('hourly', {})
+            self.daily = data.get('daily', {})
+            self.index = data.get('index', {})
+        except Exception as e:
+            logger.error(f"Fehler beim Laden von {self.rollup_path}: {e}")
+
+    def record(self, event):
+        """Ereignis einreihen (blockiert nie; bei voller Queue wird verworfen)"""
+        event.setdefault('timestamp', datetime.now().isoformat(timespec='seconds'))
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer_loop(self):
+        while not self._stop.is_set() or not self.queue.empty():
+            batch = []
+            try:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    logger.error(f"Fehler beim Schreiben von Truck-Ereignissen: {e}")
+
+    def _write_batch(self, batch):
+        with open(self.events_path, 'ab') as f:
+            offset = f.tell()
+            lines = []
+            with self.lock:
+                for event in batch:
+                    ts = datetime.fromisoformat(event['timestamp'])
+                    hour, day = ts.strftime(HOUR_FORMAT), ts.strftime(DAY_FORMAT)
+                    self.index.setdefault(hour, offset)
+                    line = (json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8')
+                    offset += len(line)
+                    lines.append(line)
+                    _add_event(self.hourly.setdefault(hour, _new_bucket()), event)
+                    _add_event(self.daily.setdefault(day, _new_bucket()), event)
+                self._prune()
+                data = json.dumps({'hourly': self.hourly, 'daily': self.daily, 'index': self.index})
+            f.write(b''.join(lines))
+        self.written += len(batch)
+
+        tmp = self.rollup_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, self.rollup_path)
+
+    def _prune(self):
+        cutoff = (datetime.now() - timedelta(days=self.hourly_retention_days)).strftime(HOUR_FORMAT)
+        for hour in [h for h in self.hourly if h < cutoff]:
+            del self.hourly[hour]
+        for hour in [h for h in self.index if h < cutoff]:
+            del self.index[hour]
+
+    def summary(self, start, end):
+        """
+        Aggregat über [start, end] aus den Rollups: ganze Tage aus den
+        Tages-, Randstunden aus den Stunden-Rollups (Auflösung 1 Stunde).
+        Aufwand hängt nur von der Länge des Zeitraums ab, nicht vom Log.
+        """
+        total = _new_bucket()
+        daily = {}
+        cursor = start.replace(minute=0, second=0, microsecond=0)
+        with self.lock:
+            while cursor <= end:
+                day_key = cursor.strftime(DAY_FORMAT)
+                next_day = cursor.replace(hour=0) + timedelta(days=1)
+                if cursor.hour == 0 and next_day - timedelta(seconds=1) <= end:
+                    bucket = self.daily.get(day_key)
+                    cursor = next_day
+                else:
+                    bucket = self.hourly.get(cursor.strftime(HOUR_FORMAT))
+                    cursor += timedelta(hours=1)
+                if bucket:
+                    _merge(total, bucket)
+                    daily[day_key] = daily.get(day_key, 0) + bucket['shared']
+        total['daily'] = daily
+        return total
+
+    def events(self, start, end, limit=1000):
+        """Rohereignisse in [start, end]; der Stunden-Index springt direkt zum Anfang"""
+        if not os.path.exists(self.events_path):
+            return []
+        start_hour = start.strftime(HOUR_FORMAT)
+        with self.lock:
+            offsets = [offset for hour, offset in self.index.items() if hour >= start_hour]
+            # Start vor der ältesten indizierten Stunde: Index ist dort schon verworfen
+            if self.index and start_hour < min(self.index):
+                offsets = [0]
+        if not offsets:
+            return []
+        start_iso = start.isoformat(timespec='seconds')
+        end_iso = end.isoformat(timespec='seconds')
+        result = []
+        with open(self.events_path, 'r', encoding='utf-8') as f:
+            f.seek(min(offsets))
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                ts = event.get('timestamp', '')
+                if ts > end_iso:
+                    break
+                if ts >= start_iso:
+                    result.append(event)
+                    if len(result) >= limit:
+                        break
+        return result
+
+    def to_dict(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped
+        }
+
+    def close(self, timeout=5):
+        """Restliche Ereignisse schreiben und Writer beenden (mehrfach aufrufbar)"""
+        self._stop.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+
+
+def summary_to_dict(bucket):
+    """Rollup-Aggregat in das Format von /api/admin/stats"""
+    latency = {stage: round(total / count, 1) for stage, (total, count) in bucket['latency'].items() if count}
+    bins = {f"{int(key)}-{int(key) + STRENGTH_BIN}M" if int(key) < STRENGTH_BIN_MAX else f"{key}M+": value
+            for key, value in sorted(bucket['strength_bins'].items(), key=lambda item: int(item[0]))}
+    return {
+        'total': bucket['shared'],
+        'processed': bucket['count'],
+        'avg_strength': round(bucket['strength_sum'] / bucket['strength_count'], 1) if bucket['strength_count'] else None,
+        'max_strength': bucket['strength_max'],
+        'unique_servers': len(bucket['servers']),
+        'strength_bins': bins,
+        'daily': dict(sorted(bucket['daily'].items())),
+        'top_servers': sorted(bucket['servers'].items(), key=lambda item: -item[1])[:10],
+        'outcomes': bucket['outcomes'],
+        'latency_ms': latency
+    }
+
+
+def merge_summaries(buckets):
+    """Aggregate mehrerer Geräte zusammenführen"""
+    total = _new_bucket()
+    total['daily'] = {}
+    for bucket in buckets:
+        _merge(total, bucket)
+        for day, value in bucket['daily'].items():
+            total['daily'][day] = total['daily'].get(day, 0) + value
+    return total
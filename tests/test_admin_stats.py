@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/api/admin/stats: Zeitpunkte mit Zeitzonen-Offset
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('LOG_FILE', os.path.join(tempfile.gettempdir(), 'lkw-bot-test.log'))
+
+import app as lkw_app
+
+
+def _admin_client():
+    client = lkw_app.app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = 'admin'
+    return client
+
+
+def test_start_with_offset_and_default_end():
+    client = _admin_client()
+    for start in ('2024-05-01T10:00:00+02:00', '2024-05-01T08:00:00Z'):
+        response = client.get('/api/admin/stats', query_string={'start': start, 'events': 1})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        expected = datetime(2024, 5, 1, 8, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        assert response.get_json()['start'] == expected.isoformat()
+
+
+def test_invalid_date_is_rejected():
+    response = _admin_client().get('/api/admin/stats', query_string={'start': 'gestern'})
+    assert response.status_code == 400
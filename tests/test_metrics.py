@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prometheus-Ausgabe mit mehreren Geräten
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bots.lkw_bot import LKWBotController
+from bots.metrics import render_prometheus
+
+
+def _families(text):
+    """Familienname pro Zeile (HELP/TYPE und Samples, Histogramm-Suffixe entfernt)"""
+    types = {}
+    names = []
+    for line in text.splitlines():
+        if line.startswith('# '):
+            _, kind, name = line.split(' ', 3)[:3]
+            if kind == 'TYPE':
+                types[name] = line.split(' ')[3]
+            names.append(name)
+            continue
+        name = line.split('{', 1)[0]
+        for suffix in ('_bucket', '_sum', '_count'):
+            base = name[:-len(suffix)]
+            if name.endswith(suffix) and types.get(base) == 'histogram':
+                name = base
+        names.append(name)
+    return names
+
+
+def test_each_family_is_one_block(tmp_path):
+    bots = [LKWBotController({'workdir': str(tmp_path / device)}, device_id=device) for device in ('emu1', 'emu2')]
+    for bot in bots:
+        bot.metrics.observe('capture', 0.05)
+        bot.metrics.outcome('shared')
+    text = render_prometheus(bots)
+
+    assert text.count('# HELP lkw_stage_duration_seconds ') == 1
+    names = _families(text)
+    blocks = [name for i, name in enumerate(names) if i == 0 or names[i - 1] != name]
+    assert len(blocks) == len(set(blocks)), f"Familien nicht zusammenhängend: {blocks}"
+    for device in ('emu1', 'emu2'):
+        assert f'lkw_trucks_processed_total{{device="{device}"}} 0' in text
+        assert f'lkw_stage_duration_seconds_count{{device="{device}",stage="capture"}} 1' in text
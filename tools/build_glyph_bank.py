@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Erstellt die Glyph-Bank (glyphs.npz) aus gelabelten Ausschnitten.
+
+Dateiname = Label, optional mit Suffix nach '_':
+    crops/12.5M_001.png  -> "12.5M"
+    crops/49_a.png       -> "49"
+
+Aufruf:
+    python tools/build_glyph_bank.py crops/ [--out glyphs.npz]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from bots.glyphs import GlyphBank, GLYPH_FILE, segment, normalize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('crop_dir')
+    parser.add_argument('--out', default=GLYPH_FILE)
+    args = parser.parse_args()
+
+    labels = []
+    vectors = []
+    skipped = 0
+    for name in sorted(os.listdir(args.crop_dir)):
+        if not name.lower().endswith('.png'):
+            continue
+        label = os.path.splitext(name)[0].split('_')[0]
+        crop = cv2.imread(os.path.join(args.crop_dir, name))
+        if crop is None:
+            continue
+        glyphs = segment(crop)
+        if len(glyphs) != len(label):
+            print(f"Übersprungen: {name} ({len(glyphs)} Zeichen gefunden, {len(label)} erwartet)")
+            skipped += 1
+            continue
+        for char, glyph in zip(label, glyphs):
+            labels.append(char)
+            vectors.append(normalize(glyph))
+
+    if not labels:
+        sys.exit("Keine verwertbaren Ausschnitte gefunden")
+
+    GlyphBank(labels, np.stack(vectors)).save(args.out)
+    print(f"{args.out}: {len(labels)} Vorlagen für Zeichen {''.join(sorted(set(labels)))} "
+          f"({skipped} Dateien übersprungen)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Spielt eine aufgezeichnete H.264-Datei durch den Stream-Capture ab
+(ohne Gerät) und misst Frames, FPS, Frame-Alter und Template-Treffer.
+
+Aufnahme am Gerät:
+    adb exec-out screenrecord --output-format=h264 - > aufnahme.h264
+
+Aufruf:
+    python tools/stream_replay.py aufnahme.h264 [--size 1080x1920] [--fast]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bots.lkw_bot import LKWBotController
+from bots.stream_capture import ScreenStream, probe_file_size
+from bots.template_cache import get_template
+from bots.matching import match_full
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file')
+    parser.add_argument('--size', help='Ausgabegröße BxH (Standard: Größe der Aufnahme)')
+    parser.add_argument('--fast', action='store_true', help='so schnell wie möglich statt in Echtzeit dekodieren')
+    parser.add_argument('--interval', type=float, default=0.5, help='Abstand der Abfragen in Sekunden')
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.split('x')) if args.size else probe_file_size(args.file)
+    stream = ScreenStream(args.file, size, realtime=not args.fast)
+    template = get_template(LKWBotController.TEMPLATE_FILE)
+
+    stream.start()
+    last_id = None
+    while not stream.finished.is_set():
+        time.sleep(args.interval)
+        item = stream.ring.latest()
+        if item is None or item.frame_id == last_id:
+            continue
+        last_id = item.frame_id
+        line = f"Frame {item.frame_id}: Alter {item.age * 1000:.0f} ms"
+        if template is not None:
+            matches = match_full(item.frame, template, LKWBotController.MATCH_THRESHOLD,
+                                 LKWBotController.MAX_CANDIDATES)
+            line += f", {len(matches)} Treffer"
+        print(line)
+    stream.stop()
+
+    print(stream.to_dict())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Logging über Queue: Bot-Threads schreiben nur in eine Queue, ein Listener-
+Thread übernimmt Datei (mit Rotation), Konsole und Ringpuffer
+"""
+
+import os
+import re
+import queue
+import atexit
+import logging
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FILE = 'lkw-bot.log'
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+
+
+class RingBufferHandler(logging.Handler):
+    """Hält die letzten capacity Log-Einträge für /api/admin/logs"""
+
+    def __init__(self, capacity=2000):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.sequence = 0
+
+    def emit(self, record):
+        try:
+            message = record.getMessage()
+            if record.exc_text:
+                message = f"{message}\n{record.exc_text}"
+            # handle() hält self.lock bereits
+            self.sequence += 1
+            self.records.append({
+                'id': self.sequence,
+                'time': record.created,
+                'level': record.levelname,
+                'logger': record.name,
+                'thread': record.threadName,
+                'message': message
+            })
+        except Exception:
+            self.handleError(record)
+
+    def tail(self, limit=200, level=None, logger_prefix=None, since=None):
+        """Neueste Einträge (älteste zuerst), gefiltert nach Mindest-Level, Logger und ID"""
+        min_level = logging.getLevelName(level.upper()) if level else 0
+        if not isinstance(min_level, int):
+            min_level = 0
+        with self.lock:
+            records = list(self.records)
+        result = []
+        for entry in reversed(records):
+            if since is not None and entry['id'] <= since:
+                break
+            if logging.getLevelName(entry['level']) < min_level:
+                continue
+            if logger_prefix and not entry['logger'].startswith(logger_prefix):
+                continue
+            result.append(entry)
+            if len(result) >= limit:
+                break
+        result.reverse()
+        return result
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lässt nur jeden n-ten werkzeug-Zugriff durch; Antworten mit Status
+    >= 400 und alles ab WARNING immer.
+    """
+
+    def __init__(self, every=10):
+        super().__init__()
+        self.every = max(1, int(every))
+        self.count = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        args = record.args if isinstance(record.args, tuple) else ()
+        # werkzeug log_request: '"%s" %s %s' % (Request-Zeile, Status, Größe);
+        # der Status kann im Terminal ANSI-eingefärbt sein
+        if len(args) >= 2 and ANSI_ESCAPE.sub('', str(args[1])).strip()[:1] in ('4', '5'):
+            return True
+        self.count += 1
+        return (self.count - 1) % self.every == 0
+
+
+class LoggingControl:
+    """Queue-Listener, Ringpuffer und Level-Steuerung zur Laufzeit"""
+
+    def __init__(self, listener, ring, sampling):
+        self.listener = listener
+        self.ring = ring
+        self.sampling = sampling
+        self.stopped = False
+
+    def set_level(self, name, level):
+        """Level eines Loggers setzen ('' bzw. 'root' = Root-Logger)"""
+        value = logging.getLevelName(str(level).upper())
+        if not isinstance(value, int):
+            raise ValueError(f"Unbekanntes Level: {level}")
+        logging.getLogger(None if name in ('', 'root') else name).setLevel(value)
+
+    def levels(self):
+        """Explizit gesetzte Level aller bekannten Logger"""
+        levels = {'root': logging.getLevelName(logging.getLogger().level)}
+        for name, logger in sorted(logging.Logger.manager.loggerDict.items()):
+            if isinstance(logger, logging.Logger) and logger.level:
+                levels[name] = logging.getLevelName(logger.level)
+        return levels
+
+    def stop(self):
+        """Restliche Einträge schreiben und Listener beenden (mehrfach aufrufbar)"""
+        if not self.stopped:
+            self.stopped = True
+            self.listener.stop()
+
+
+def setup_logging(level=logging.INFO):
+    """
+    Root-Logger auf einen QueueHandler umstellen. Einstellungen per
+    Umgebungsvariable:
+        LOG_FILE             (Standard lkw-bot.log)
+        LOG_MAX_BYTES        Rotation nach Größe (Standard 10 MB)
+        LOG_BACKUPS          Anzahl alter Dateien (Standard 5)
+        LOG_ROTATE_WHEN      z.B. 'midnight': Rotation nach Zeit statt Größe
+        LOG_RING_SIZE        Einträge im Ringpuffer (Standard 2000)
+        LOG_WERKZEUG_SAMPLE  nur jeden n-ten Zugriff loggen (Standard 10)
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    log_file = os.environ.get('LOG_FILE', LOG_FILE)
+    backups = int(os.environ.get('LOG_BACKUPS', 5))
+    when = os.environ.get('LOG_ROTATE_WHEN')
+    if when:
+        file_handler = TimedRotatingFileHandler(log_file, when=when, backupCount=backups, encoding='utf-8')
+    else:
+        file_handler = RotatingFileHandler(log_file, maxBytes=int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+                                           backupCount=backups, encoding='utf-8')
+    stream_handler = logging.StreamHandler()
+    ring = RingBufferHandler(int(os.environ.get('LOG_RING_SIZE', 2000)))
+    for handler in (file_handler, stream_handler, ring):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, stream_handler, ring, respect_handler_level=True)
+    listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    sampling = SamplingFilter(int(os.environ.get('LOG_WERKZEUG_SAMPLE', 10)))
+    logging.getLogger('werkzeug').addFilter(sampling)
+    control = LoggingControl(listener, ring, sampling)
+    atexit.register(control.stop)
+    return control
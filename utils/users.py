@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-User Management
+User Management: Benutzer im Speicher, Datei nur bei Änderung neu lesen
 """
 
 import os
 import json
+import time
+import sqlite3
+import logging
+import threading
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 
 USERS_FILE = 'users.json'
 
+logger = logging.getLogger(__name__)
+
 
 class User(UserMixin):
     def __init__(self, username, password, role='user', blocked=False, 
@@ -28,7 +34,7 @@ class User(UserMixin):
 
 def init_users():
     """Initialisiere Benutzer-Datenbank"""
-    if not os.path.exists(USERS_FILE):
+    if not users_repository().exists():
         users = {
             'admin': {
                 'password': generate_password_hash('rREq8/1F4m#'),
@@ -55,41 +61,209 @@ def init_users():
                 'can_use_zombie_bot': False
             }
         }
-        with open(USERS_FILE, 'w') as f:
+        save_users(users)
+
+
+class JsonUserBackend:
+    """users.json; Schreiben atomar über Temp-Datei + Rename"""
+
+    def __init__(self, path=USERS_FILE):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def version(self):
+        """Änderungsmarke (mtime + Größe) oder None, wenn die Datei fehlt"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def read(self):
+        if not self.exists():
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def write(self, users):
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
             json.dump(users, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+class SqliteUserBackend:
+    """
+    SQLite-Datei (ein JSON-Datensatz pro Benutzer). Beim ersten Start wird
+    eine vorhandene users.json übernommen.
+    """
+
+    def __init__(self, path, import_file=USERS_FILE):
+        self.path = path
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, data TEXT NOT NULL)')
+            empty = db.execute('SELECT COUNT(*) FROM users').fetchone()[0] == 0
+        if empty and import_file and os.path.exists(import_file):
+            self.write(JsonUserBackend(import_file).read())
+            logger.info(f"Benutzer aus {import_file} nach {path} übernommen")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def exists(self):
+        with self._connect() as db:
+            return db.execute('SELECT 1 FROM users LIMIT 1').fetchone() is not None
+
+    def version(self):
+        # Rollback-Journal (Standard): jeder Commit ändert die Datenbankdatei
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def read(self):
+        with self._connect() as db:
+            return {username: json.loads(data) for username, data in db.execute('SELECT username, data FROM users')}
+
+    def write(self, users):
+        db = self._connect()
+        try:
+            with db:
+                db.execute('DELETE FROM users')
+                db.executemany('INSERT INTO users (username, data) VALUES (?, ?)',
+                               [(username, json.dumps(data)) for username, data in users.items()])
+        finally:
+            db.close()
+
+
+def _make_user(username, user_data):
+    has_zombie_access = user_data.get('can_use_zombie_bot', False)
+    if user_data.get('role') == 'admin':
+        has_zombie_access = True
+    
+    return User(
+        username, 
+        user_data['password'], 
+        user_data.get('role', 'user'), 
+        user_data.get('blocked', False),
+        user_data.get('can_choose_share_mode', True),
+        user_data.get('forced_share_mode', None),
+        has_zombie_access
+    )
+
+
+class UserRepository:
+    """
+    Hält alle Benutzer und fertige User-Objekte im Speicher. Neu gelesen wird
+    nur, wenn sich die Änderungsmarke des Backends ändert (geprüft höchstens
+    alle check_interval Sekunden); eigene Schreibvorgänge aktualisieren den
+    Cache direkt.
+    """
+
+    def __init__(self, backend, check_interval=1.0):
+        self.backend = backend
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self._users = {}
+        self._user_objects = {}
+        self._version = None
+        self._loaded = False
+        self._next_check = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._loaded and now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        version = self.backend.version()
+        if self._loaded and version == self._version:
+            return
+        try:
+            users = self.backend.read()
+        except Exception as e:
+            # Halb geschriebene Datei o.ä.: alten Stand behalten, beim nächsten Mal erneut
+            logger.error(f"Fehler beim Laden der Benutzer: {e}")
+            if self._loaded:
+                return
+            users = {}
+        self._set(users, version)
+
+    def _set(self, users, version):
+        self._users = users
+        self._user_objects = {}
+        self._version = version
+        self._loaded = True
+
+    def exists(self):
+        return self.backend.exists()
+
+    def all(self):
+        """Kopie aller Benutzerdaten {username: data}"""
+        with self.lock:
+            self._refresh()
+            return {username: dict(data) for username, data in self._users.items()}
+
+    def get_data(self, username):
+        """Kopie der Daten eines Benutzers oder None"""
+        with self.lock:
+            self._refresh()
+            data = self._users.get(username)
+            return dict(data) if data is not None else None
+
+    def get(self, username):
+        """User-Objekt (einmal pro Dateistand gebaut) oder None"""
+        with self.lock:
+            self._refresh()
+            user = self._user_objects.get(username)
+            if user is None and username in self._users:
+                user = self._user_objects[username] = _make_user(username, self._users[username])
+            return user
+
+    def save(self, users):
+        with self.lock:
+            self.backend.write(users)
+            self._set({username: dict(data) for username, data in users.items()}, self.backend.version())
+            self._next_check = time.monotonic() + self.check_interval
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def users_repository():
+    """
+    Prozessweites Repository: SQLite, wenn die Umgebungsvariable USERS_DB
+    gesetzt ist, sonst users.json
+    """
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            db_path = os.environ.get('USERS_DB')
+            backend = SqliteUserBackend(db_path) if db_path else JsonUserBackend(USERS_FILE)
+            _repository = UserRepository(backend)
+        return _repository
 
 
 def load_users():
-    """Lade User-Datenbank"""
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+    """Lade User-Datenbank (Kopie aus dem Cache)"""
+    return users_repository().all()
+
+
+def get_user_data(username):
+    """Daten eines Benutzers oder None"""
+    return users_repository().get_data(username)
 
 
 def save_users(users):
     """Speichere User-Datenbank"""
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
+    users_repository().save(users)
 
 
 def load_user(username):
     """User Loader für Flask-Login"""
-    users = load_users()
-    if username in users:
-        user_data = users[username]
-        
-        has_zombie_access = user_data.get('can_use_zombie_bot', False)
-        if user_data.get('role') == 'admin':
-            has_zombie_access = True
-            
-        return User(
-            username, 
-            user_data['password'], 
-            user_data.get('role', 'user'), 
-            user_data.get('blocked', False),
-            user_data.get('can_choose_share_mode', True),
-            user_data.get('forced_share_mode', None),
-            has_zombie_access
-        )
-    return None
+    return users_repository().get(username)